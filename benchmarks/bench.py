@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试 - 分阶段测量转换耗时、吞吐量和峰值内存，并与基线比较
+
+用法:
+    python benchmarks/bench.py                      # 运行全部语料并与基线比较
+    python benchmarks/bench.py --save-baseline      # 把本次结果保存为基线
+    python benchmarks/bench.py -c huge tables -s 2  # 指定语料和规模
+    python benchmarks/bench.py --threshold 0.1      # 超过基线10%即视为退化
+
+基线与机器相关，应在同一台机器上生成和比较。
+"""
+
+import io
+import sys
+import json
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from md2doc import MarkdownConverter, __version__
+from corpus import CORPORA, generate_corpus
+
+STAGES = ('read', 'parse', 'render', 'save')
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+# 低于该值的耗时受计时噪声影响较大，不参与退化判断
+NOISE_FLOOR = 0.005
+
+
+def convert_stages(converter: MarkdownConverter, md_file: Path, timings: Dict[str, float]) -> int:
+    """用 convert() 转换单个文件（与命令行的读取、解析、渲染路径相同），按其记录的各阶段耗时累加，返回块数"""
+    metrics: dict = {}
+    doc, _ = converter.convert(md_file, metrics)
+    if doc is None:
+        raise RuntimeError(f"转换失败: {md_file}")
+    converter.save(doc, io.BytesIO(), metrics)
+
+    for stage in STAGES:
+        timings[stage] += metrics['stages'].get(stage, 0.0)
+    return sum(metrics['blocks'].values())
+
+
+def run_corpus(converter: MarkdownConverter, files: List[Path], repeat: int) -> dict:
+    """测量一个语料：各阶段取多次运行中的最小值，峰值内存单独测量"""
+    best = dict.fromkeys(STAGES, float('inf'))
+    blocks = 0
+    for _ in range(repeat):
+        timings = dict.fromkeys(STAGES, 0.0)
+        blocks = sum(convert_stages(converter, f, timings) for f in files)
+        for stage in STAGES:
+            best[stage] = min(best[stage], timings[stage])
+
+    # tracemalloc 会显著拖慢执行，因此与计时分开运行；只统计Python堆，不含lxml的C层分配
+    tracemalloc.start()
+    try:
+        peak = 0
+        for f in files:
+            tracemalloc.reset_peak()
+            convert_stages(converter, f, dict.fromkeys(STAGES, 0.0))
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    total = sum(best.values())
+    size = sum(f.stat().st_size for f in files)
+    return {
+        'files': len(files),
+        'bytes': size,
+        'blocks': blocks,
+        'stages': {stage: round(best[stage], 6) for stage in STAGES},
+        'total': round(total, 6),
+        'files_per_sec': round(len(files) / total, 2) if total else None,
+        'mb_per_sec': round(size / total / 1e6, 3) if total else None,
+        'peak_memory': peak,
+    }
+
+
+def run(corpora: List[str], scale: int = 1, seed: int = 0, repeat: int = 3) -> dict:
+    """生成语料并运行基准测试"""
+    converter = MarkdownConverter(logger=logging.getLogger('md2doc.bench'))
+    converter.new_document()  # 预先构建模板，不计入耗时
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in corpora:
+            files = generate_corpus(name, Path(tmp) / name, scale, seed)
+            results[name] = run_corpus(converter, files, repeat)
+
+    return {
+        'meta': {
+            'md2doc': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': scale,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'corpora': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    与基线比较
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        threshold: 允许的相对增长（0.2 表示 20%）
+
+    Returns:
+        List[str]: 退化项说明，空列表表示没有退化
+    """
+    regressions = []
+    if current['meta'].get('scale') != baseline['meta'].get('scale'):
+        return [f"规模不一致（基线 {baseline['meta'].get('scale')}，本次 {current['meta'].get('scale')}），无法比较"]
+
+    for name, result in current['corpora'].items():
+        base = baseline['corpora'].get(name)
+        if base is None:
+            continue
+        metrics = [(f'{name}.{stage}', result['stages'][stage], base['stages'].get(stage)) for stage in STAGES]
+        metrics.append((f'{name}.total', result['total'], base.get('total')))
+        for label, value, old in metrics:
+            if old is None or max(value, old) < NOISE_FLOOR:
+                continue
+            if value > old * (1 + threshold):
+                regressions.append(f"{label}: {old * 1000:.1f}ms -> {value * 1000:.1f}ms (+{(value / old - 1):.0%})")
+
+        old_peak = base.get('peak_memory')
+        if old_peak and result['peak_memory'] > old_peak * (1 + threshold):
+            regressions.append(f"{name}.peak_memory: {old_peak / 1e6:.1f}MB -> "
+                               f"{result['peak_memory'] / 1e6:.1f}MB (+{(result['peak_memory'] / old_peak - 1):.0%})")
+    return regressions
+
+
+def print_report(results: dict):
+    print(f"{'语料':<8}{'文件':>6}{'块数':>8}" + ''.join(f'{s:>10}' for s in STAGES)
+          + f"{'合计':>10}{'文件/秒':>10}{'MB/秒':>8}{'峰值MB':>8}")
+    for name, r in results['corpora'].items():
+        stages = ''.join(f"{r['stages'][s] * 1000:>8.1f}ms" for s in STAGES)
+        print(f"{name:<8}{r['files']:>6}{r['blocks']:>8}{stages}{r['total'] * 1000:>8.1f}ms"
+              f"{r['files_per_sec'] or 0:>10.1f}{r['mb_per_sec'] or 0:>8.2f}{r['peak_memory'] / 1e6:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='md2doc 基准测试')
+    parser.add_argument('-c', '--corpus', nargs='+', choices=list(CORPORA), default=list(CORPORA),
+                        help='要运行的语料（默认: 全部）')
+    parser.add_argument('-s', '--scale', type=int, default=1, help='语料规模倍数（默认: 1）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（默认: 0）')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='重复次数，取最小值（默认: 3）')
+    parser.add_argument('-b', '--baseline', type=Path, default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='退化阈值（默认: 0.2，即20%%）')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('-o', '--output', type=Path, help='把本次结果写入JSON文件')
+    args = parser.parse_args(argv)
+
+    results = run(args.corpus, args.scale, args.seed, max(1, args.repeat))
+    print_report(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\n基线已保存: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\n未找到基线 {args.baseline}，使用 --save-baseline 生成")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n发现性能退化（阈值 {args.threshold:.0%}）:")
+        for item in regressions:
+            print(f"  ✗ {item}")
+        return 1
+    print(f"\n✓ 未发现性能退化（阈值 {args.threshold:.0%}）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
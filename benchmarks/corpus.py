@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+合成语料生成 - 为基准测试生成确定性的Markdown文件
+
+同一个种子和规模总是生成完全相同的文件，便于在不同版本之间比较耗时。
+"""
+
+import random
+from pathlib import Path
+from typing import Callable, Dict, List
+
+_PHRASES = [
+    '根据上级工作部署', '结合本单位实际情况', '经研究决定', '现将有关事项通知如下',
+    '各部门要高度重视', '认真组织实施', '确保各项工作落到实处', '加强统筹协调',
+    '及时总结经验', '进一步完善工作机制', '切实提高工作效率', '严格落实安全责任',
+]
+
+_NUMERALS = '一二三四五六七八九十'
+
+
+def _sentence(rng: random.Random, words: int = 6) -> str:
+    return '，'.join(rng.choice(_PHRASES) for _ in range(words)) + '。'
+
+
+def _official_document(rng: random.Random, index: int, sections: int) -> str:
+    """公文式文档：标题、分级标题、正文、列表、引用与落款"""
+    lines = [f'# 关于开展第{index}批专项工作的通知', '']
+    for s in range(sections):
+        lines.append(f'## {_NUMERALS[s % 10]}、工作要求')
+        lines.append(_sentence(rng, rng.randint(4, 10)))
+        lines.append(f'### （{_NUMERALS[s % 10]}）具体安排')
+        for i in range(rng.randint(2, 5)):
+            lines.append(f'{i + 1}. {_sentence(rng, 3)}')
+        if rng.random() < 0.3:
+            lines.append(f'> {_sentence(rng, 2)}')
+        lines.append(_sentence(rng, rng.randint(6, 14)))
+        lines.append('')
+    lines.append('---')
+    lines.append('辅导员：张三')
+    lines.append('日期：2025年1月1日')
+    return '\n'.join(lines) + '\n'
+
+
+def _table_document(rng: random.Random, index: int, tables: int, rows: int, cols: int) -> str:
+    """以表格为主的文档"""
+    lines = [f'# 统计报表{index}', '']
+    for t in range(tables):
+        lines.append(f'## 表{t + 1}')
+        lines.append('| ' + ' | '.join(f'列{c + 1}' for c in range(cols)) + ' |')
+        lines.append('|' + '---|' * cols)
+        for _ in range(rows):
+            cells = [rng.choice(_PHRASES) if rng.random() < 0.5 else str(rng.randint(0, 99999))
+                     for _ in range(cols)]
+            lines.append('| ' + ' | '.join(cells) + ' |')
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def _inline_document(rng: random.Random, index: int, paragraphs: int) -> str:
+    """行内标记密集的文档（含未闭合标记和转义字符）"""
+    markers = ['**{}**', '*{}*', '`{}`', '**{}', '*{}', '\\*{}\\*', '_{}_']
+    lines = [f'# 行内格式样例{index}', '']
+    for _ in range(paragraphs):
+        parts = []
+        for _ in range(rng.randint(10, 30)):
+            phrase = rng.choice(_PHRASES)
+            parts.append(rng.choice(markers).format(phrase) if rng.random() < 0.6 else phrase)
+        lines.append(' '.join(parts))
+    return '\n'.join(lines) + '\n'
+
+
+def _small(root: Path, rng: random.Random, scale: int) -> List[Path]:
+    return [_write(root / f'notice_{i:04d}.md', _official_document(rng, i, rng.randint(2, 5)))
+            for i in range(50 * scale)]
+
+
+def _huge(root: Path, rng: random.Random, scale: int) -> List[Path]:
+    return [_write(root / 'huge.md', _official_document(rng, 0, 500 * scale))]
+
+
+def _tables(root: Path, rng: random.Random, scale: int) -> List[Path]:
+    return [_write(root / f'tables_{i:02d}.md', _table_document(rng, i, 5, 40 * scale, 6))
+            for i in range(4)]
+
+
+def _inline(root: Path, rng: random.Random, scale: int) -> List[Path]:
+    return [_write(root / f'inline_{i:02d}.md', _inline_document(rng, i, 200 * scale))
+            for i in range(4)]
+
+
+def _write(path: Path, text: str) -> Path:
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+# 语料名称 -> 生成函数
+CORPORA: Dict[str, Callable[[Path, random.Random, int], List[Path]]] = {
+    'small': _small,
+    'huge': _huge,
+    'tables': _tables,
+    'inline': _inline,
+}
+
+
+def generate_corpus(name: str, root: Path, scale: int = 1, seed: int = 0) -> List[Path]:
+    """
+    生成指定语料
+
+    Args:
+        name: 语料名称（见 CORPORA）
+        root: 输出目录（不存在时自动创建）
+        scale: 规模倍数
+        seed: 随机种子
+
+    Returns:
+        List[Path]: 生成的Markdown文件（按文件名排序）
+    """
+    if name not in CORPORA:
+        raise ValueError(f"未知语料: {name}（可选: {', '.join(CORPORA)}）")
+    root.mkdir(parents=True, exist_ok=True)
+    return sorted(CORPORA[name](root, random.Random(f'{name}:{seed}'), scale))
@@ -5,6 +5,7 @@
 """
 
 import sys
+import multiprocessing
 from pathlib import Path
 
 # 添加src目录到路径
@@ -14,4 +15,6 @@ sys.path.insert(0, str(src_path))
 from md2doc.cli import main
 
 if __name__ == '__main__':
+    # 打包为可执行文件后，并行转换的子进程需要此调用
+    multiprocessing.freeze_support()
     main()
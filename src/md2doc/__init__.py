@@ -6,7 +6,25 @@ Markdown to Word Converter
 __version__ = '2.0.0'
 __author__ = 'Your Name'
 
-from .converter import MarkdownConverter
-from .config import ConverterConfig
+# python-docx 导入较慢，公开接口在首次访问时才加载对应模块（PEP 562）
+_LAZY_EXPORTS = {
+    'MarkdownConverter': '.converter',
+    'ConverterConfig': '.config',
+    'parse': '.parser',
+}
 
-__all__ = ['MarkdownConverter', 'ConverterConfig']
+__all__ = ['MarkdownConverter', 'ConverterConfig', 'parse']
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+增量构建缓存 - 跳过源文件和配置均未变化的Markdown文件
+
+缓存清单保存在输出目录中，按源文件内容哈希和配置指纹判断是否需要重新转换。
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_NAME = '.md2doc-cache.json'
+MANIFEST_VERSION = 1
+
+
+def file_digest(path: Path) -> str:
+    """计算文件内容的SHA-256哈希"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def config_fingerprint(config, **options) -> str:
+    """计算配置指纹：ConverterConfig + md2doc版本 + 影响输出的命令行选项"""
+    from . import __version__
+
+    payload = {
+        'config': config.as_dict(),
+        'version': __version__,
+        'options': options,
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _image_stat(path: str) -> Optional[List[int]]:
+    """图片的 [大小, 修改时间]，不存在时为None（与清单中JSON读出的格式一致）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildCache:
+    """输出目录中的增量构建清单
+
+    每个源文件（相对输入目录的路径）对应一条记录：
+    内容哈希、配置指纹、文件大小与修改时间（用于快速判断），以及生成的输出文件；
+    引用了图片的源文件另外记录各图片的大小与修改时间，图片变化时同样重新转换。
+
+    Args:
+        output_dir: 输出目录（清单文件所在位置）
+        fingerprint: 当前配置指纹
+        logger: 日志记录器
+        name: 清单文件名（多个分片共用输出目录时各自使用不同的清单）
+    """
+
+    def __init__(self, output_dir: Path, fingerprint: str, logger: Optional[logging.Logger] = None,
+                 name: str = MANIFEST_NAME):
+        self.output_dir = output_dir
+        self.path = output_dir / name
+        self.fingerprint = fingerprint
+        self.logger = logger or logging.getLogger(__name__)
+        self.entries: Dict[str, dict] = {}
+        self._seen = set()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('files', {})
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"缓存清单无法读取，将重新转换全部文件: {e}")
+            self.entries = {}
+
+    def check(self, key: str, md_file: Path) -> Tuple[bool, Optional[str]]:
+        """判断源文件是否可以跳过
+
+        Returns:
+            Tuple[bool, str]: (是否未变化, 内容哈希)
+        """
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        stat = md_file.stat()
+
+        # 大小和修改时间均未变化时直接沿用已记录的哈希，避免重复读取
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            digest = entry.get('hash')
+        else:
+            digest = file_digest(md_file)
+
+        if not entry or entry.get('hash') != digest or entry.get('fingerprint') != self.fingerprint:
+            return False, digest
+
+        images = entry.get('images') or {}
+        if any(_image_stat(path) != recorded for path, recorded in images.items()):
+            return False, digest
+
+        outputs = entry.get('outputs') or []
+        fresh = bool(outputs) and all((self.output_dir / name).exists() for name in outputs)
+        return fresh, digest
+
+    def record(self, key: str, md_file: Path, digest: str, outputs: List[str],
+               output_hashes: Optional[Dict[str, str]] = None, images: Optional[Iterable[str]] = None):
+        """记录一次成功的转换，并清理该源文件以前生成、本次不再生成的输出
+
+        output_hashes（输出文件名 -> 内容哈希）一并写入清单，供上传等后续步骤判断输出是否变化；
+        images 为源文件引用的图片路径（不存在的图片也记录，之后补上图片时重新转换）。
+        """
+        old = self.entries.get(key)
+        if old:
+            stale = set(old.get('outputs') or []) - set(outputs)
+            if stale:
+                self._delete_outputs(key, stale)
+
+        stat = md_file.stat()
+        self.entries[key] = {
+            'hash': digest,
+            'fingerprint': self.fingerprint,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'outputs': list(outputs),
+        }
+        if output_hashes:
+            self.entries[key]['output_hashes'] = dict(output_hashes)
+        if images:
+            self.entries[key]['images'] = {path: _image_stat(path) for path in images}
+        self._seen.add(key)
+        self._dirty = True
+
+    def invalidate(self, key: str):
+        """转换失败时移除记录，下次运行重新尝试"""
+        if self.entries.pop(key, None) is not None:
+            self._dirty = True
+
+    def prune(self, keys: Optional[Iterable[str]] = None) -> List[str]:
+        """删除已不存在的源文件所对应的输出
+
+        Args:
+            keys: 当前存在的源文件；默认使用本次运行中检查过的文件
+
+        Returns:
+            List[str]: 被删除的输出文件名
+        """
+        alive = set(keys) if keys is not None else self._seen
+        removed = []
+        for key in [k for k in self.entries if k not in alive]:
+            removed.extend(self.remove(key))
+        return removed
+
+    def remove(self, key: str) -> List[str]:
+        """移除一个源文件的记录并删除其输出，返回被删除的输出文件名"""
+        entry = self.entries.pop(key, None)
+        self._seen.discard(key)
+        if entry is None:
+            return []
+        self._dirty = True
+        return self._delete_outputs(key, entry.get('outputs') or [])
+
+    def _delete_outputs(self, key: str, names: Iterable[str]) -> List[str]:
+        """删除输出文件（仍被其他源文件引用的除外）"""
+        shared = {name for k, e in self.entries.items() if k != key for name in e.get('outputs') or []}
+        removed = []
+        for name in names:
+            if name in shared:
+                continue
+            target = self.output_dir / name
+            try:
+                target.unlink()
+                removed.append(name)
+                self.logger.info(f"  删除过期输出: {name}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"  无法删除 {name}: {e}")
+        return removed
+
+    def save(self):
+        """写入清单（先写临时文件再替换，避免写入中断导致清单损坏）"""
+        if not self._dirty:
+            return
+        data = {'version': MANIFEST_VERSION, 'files': self.entries}
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -6,16 +6,34 @@
 
 import sys
 import io
+import codecs
+import time
+import itertools
 import argparse
 import logging
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
 # 添加src目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from md2doc import MarkdownConverter, ConverterConfig
-from docx2pdf import convert
+# 只导入轻量模块；python-docx 和 docx2pdf 在真正需要转换时才加载（见 create_converter）
+from md2doc.parser import iter_blocks, sanitize_filename
+from md2doc.source import SourceFile
+from md2doc.cache import BuildCache, MANIFEST_NAME, config_fingerprint, file_digest
+from md2doc.metrics import MetricsCollector, stage_timer, peak_rss
+from md2doc.watch import create_watcher, debounced
+from md2doc.split import SplitOptions, split_convert
+from md2doc.save import SaveOptions, COMPRESSION_METHODS, file_hash
+from md2doc.discover import iter_sources
+from md2doc.merge import MERGE_BREAKS, merge_convert
+from md2doc.shard import parse_shard, select_shard
+from md2doc.report import RunReport, report_name, summary_lines
+from md2doc.journal import BuildJournal, journal_name, outputs_intact
+from md2doc.memory import MemoryOptions, MemoryTrace, estimate_memory, format_bytes
+from md2doc.images import IMAGE_CACHE_DIR, ImageOptions
+from md2doc.pdf import PDF_BACKENDS, DEFAULT_BACKEND, PdfPipeline, create_backend
 
 
 def setup_logging(log_file=None, verbose=False):
@@ -38,7 +56,14 @@ def setup_logging(log_file=None, verbose=False):
     return logging.getLogger(__name__)
 
 
-def convert_single_file(md_file: Path, output_dir: Path, converter, logger, export_pdf=False) -> bool:
+def create_converter(converter_options: dict):
+    """创建转换器（首次调用时才加载 python-docx，使 --help、--check 等路径保持快速启动）"""
+    from md2doc.converter import MarkdownConverter
+    return MarkdownConverter(**converter_options)
+
+
+def convert_single_file(md_file: Path, output_dir: Path, converter, logger, export_pdf=False,
+                        report: Optional[dict] = None) -> bool:
     """转换单个文件
 
     Args:
@@ -46,30 +71,225 @@ def convert_single_file(md_file: Path, output_dir: Path, converter, logger, expo
         output_dir: 输出目录
         converter: 转换器实例
         logger: 日志记录器
-        export_pdf: 是否同时导出PDF
+        export_pdf: 是否同时导出PDF（True 使用默认后端，也可以是后端名称，见 md2doc.pdf）
+        report: 可选，用于回传本次生成的输出文件名（report['outputs']）、
+                各docx的内容哈希（report['digests']，文件名 -> SHA-256）、
+                转换指标（report['metrics']，格式见 md2doc.metrics）
+                和引用的图片（report['images']，绝对路径，有图片时才有）
     """
+    metrics = None
+    if report is not None:
+        report['outputs'] = []
+        report['digests'] = {}
+        metrics = report['metrics'] = {'file': md_file.name, 'success': False, 'stages': {}}
+    start = time.perf_counter()
+    trace = MemoryTrace(converter.memory.trace)
     try:
-        doc, title = converter.convert(md_file)
-        if doc is None:
-            return False
+        # 预计超出内存预算的文件改用流式写入（输出相同，内存与文件大小无关）
+        stream = converter.stream
+        limit = converter.memory.limit
+        if limit and not stream and not converter.split:
+            estimate = estimate_memory(md_file.stat().st_size)
+            if estimate > limit:
+                logger.warning(f"  {md_file.name} 预计占用内存 {format_bytes(estimate)}，"
+                               f"超出预算 {format_bytes(limit)}，改用流式写入")
+                stream = True
+
+        if converter.split:
+            # 拆分为多个文档，另写索引文件
+            logger.info(f"开始处理: {md_file.name}")
+            with stage_timer(metrics, 'split'):
+                outputs = split_convert(md_file, output_dir, converter, converter.split, logger,
+                                        report['digests'] if report is not None else None)
+            docx_paths = [output_dir / name for name in outputs[:-1]]
+            logger.info(f"✓ Word: {docx_paths[0].name} 等 {len(docx_paths)} 个文件" if len(docx_paths) > 1
+                        else f"✓ Word: {docx_paths[0].name}")
+            if report is not None:
+                report['outputs'].extend(outputs)
+        elif stream:
+            # 流式写入：边解析边写docx
+            output_path = converter.convert_streaming(md_file, output_dir, metrics)
+            if output_path is None:
+                return False
+            output_filename = output_path.name
+            title = output_path.stem
+            digest = file_hash(output_path)
+        else:
+            doc, title = converter.convert(md_file, metrics)
+            if doc is None:
+                return False
+
+            # 生成输出文件名
+            output_filename = f"{title}.docx"
+            output_path = output_dir / output_filename
+
+            # 保存Word文档
+            digest = converter.save(doc, output_path, metrics)
+        if report is not None and converter.image_sources:
+            report['images'] = sorted({str(path.absolute()) for path in converter.image_sources})
+        if not converter.split:
+            docx_paths = [output_path]
+            logger.info(f"✓ Word: {output_filename}")
+            logger.debug(f"  SHA-256: {digest}")
+            if report is not None:
+                report['outputs'].append(output_filename)
+                report['digests'][output_filename] = digest
+
+        # 如果需要导出PDF（同一文件的各部分在一次会话中转换）
+        if export_pdf:
+            backend = create_backend(export_pdf if isinstance(export_pdf, str) else DEFAULT_BACKEND)
+            with stage_timer(metrics, 'pdf'):
+                errors = backend.convert_batch(docx_paths)
+            log_pdf_results(docx_paths, errors, logger, report)
 
-        # 生成输出文件名
-        output_filename = f"{title}.docx"
-        output_path = output_dir / output_filename
+        if metrics is not None:
+            metrics['success'] = True
+        return True
 
-        # 保存Word文档
-        doc.save(output_path)
-        logger.info(f"✓ Word: {output_filename}")
+    except Exception as e:
+        logger.error(f"✗ 失败: {md_file.name} - {e}")
+        return False
+
+    finally:
+        traced = trace.stop()
+        if traced is not None:
+            logger.info(f"  内存峰值: {format_bytes(traced)}")
+        if metrics is not None:
+            metrics['total'] = time.perf_counter() - start
+            metrics['output_bytes'] = sum((output_dir / name).stat().st_size for name in report['outputs']
+                                          if (output_dir / name).exists())
+            metrics['peak_rss'] = peak_rss()
+            if traced is not None:
+                metrics['peak_traced'] = traced
+
+
+def convert_source(md_file: Path, input_dir: Path, output_dir: Path, converter, logger, export_pdf=False,
+                   report: Optional[dict] = None) -> bool:
+    """转换输入目录中的文件，输出写入输出目录中的对应子目录（镜像源目录结构）
+
+    参数同 convert_single_file；report['outputs'] 中是相对输出目录的路径（posix格式）。
+    """
+    subdir = md_file.parent.relative_to(input_dir)
+    if not subdir.parts:
+        return convert_single_file(md_file, output_dir, converter, logger, export_pdf, report)
+
+    target_dir = output_dir / subdir
+    target_dir.mkdir(parents=True, exist_ok=True)
+    success = convert_single_file(md_file, target_dir, converter, logger, export_pdf, report)
+    if report is not None and report.get('outputs'):
+        prefix = subdir.as_posix()
+        report['outputs'] = [f"{prefix}/{name}" for name in report['outputs']]
+        report['digests'] = {f"{prefix}/{name}": digest for name, digest in report['digests'].items()}
+    return success
+
+
+def merge_files(md_files, output_path: Path, converter, logger, export_pdf=False, section=False,
+                report: Optional[dict] = None) -> bool:
+    """把多个文件合并转换为一个Word文档
+
+    Args:
+        md_files: 源文件（按合并顺序，可以是惰性迭代器）
+        output_path: 输出的docx路径
+        converter: 转换器实例
+        logger: 日志记录器
+        export_pdf: 是否同时导出PDF（同 convert_single_file）
+        section: 源文件之间使用分节符（默认分页符）
+        report: 可选，回传输出文件名、内容哈希和指标（同 convert_single_file），
+                以及已合并和跳过的源文件数（report['merged']、report['failed']）
+    """
+    metrics = None
+    if report is not None:
+        report.update(outputs=[], digests={}, merged=0, failed=0)
+        metrics = report['metrics'] = {'file': output_path.name, 'success': False, 'stages': {}}
+    start = time.perf_counter()
+    try:
+        logger.info(f"开始合并: {output_path.name}")
+        result = merge_convert(md_files, output_path, converter, section, logger, metrics)
+        logger.info(f"✓ Word: {output_path.name}（合并 {len(result.sources)} 个文件）")
+        if report is not None:
+            report.update(merged=len(result.sources), failed=len(result.failed))
+            report['outputs'].append(output_path.name)
+            report['digests'][output_path.name] = result.digest
 
-        # 如果需要导出PDF
         if export_pdf:
-            try:
-                pdf_path = output_dir / f"{title}.pdf"
-                convert(str(output_path), str(pdf_path))
-                logger.info(f"✓ PDF:  {title}.pdf")
-            except Exception as pdf_error:
-                logger.warning(f"  PDF转换失败: {pdf_error}")
+            backend = create_backend(export_pdf if isinstance(export_pdf, str) else DEFAULT_BACKEND)
+            with stage_timer(metrics, 'pdf'):
+                errors = backend.convert_batch([output_path])
+            log_pdf_results([output_path], errors, logger, report)
 
+        if metrics is not None:
+            metrics['success'] = True
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ 合并失败: {output_path.name} - {e}")
+        return False
+
+    finally:
+        if metrics is not None:
+            metrics['total'] = time.perf_counter() - start
+            metrics['output_bytes'] = sum((output_path.parent / name).stat().st_size for name in report['outputs']
+                                          if (output_path.parent / name).exists())
+            metrics['peak_rss'] = peak_rss()
+
+
+def log_pdf_results(docx_paths, errors, logger, report: Optional[dict] = None):
+    """输出PDF导出结果，并把成功生成的PDF加入 report['outputs']
+
+    Args:
+        docx_paths: 提交导出的docx路径
+        errors: 与 docx_paths 一一对应的错误信息（成功为None）
+        logger: 日志记录器
+        report: 可选，convert_single_file 回传的信息
+    """
+    for docx_path, error in zip(docx_paths, errors):
+        if error is None:
+            pdf_path = docx_path.with_suffix('.pdf')
+            logger.info(f"✓ PDF:  {pdf_path.name}")
+            if report is not None:
+                report['outputs'].append(pdf_path.name)
+        else:
+            logger.warning(f"  PDF转换失败: {docx_path.name} - {error}")
+
+
+# 块类型的中文名称（用于检查模式的统计输出）
+BLOCK_LABELS = {
+    'title': '标题',
+    'heading': '小标题',
+    'paragraph': '段落',
+    'signature': '落款',
+    'quote': '引用',
+    'list_item': '列表',
+    'table': '表格',
+    'separator': '分隔线',
+    'code': '代码块',
+    'break': '分页',
+    'image': '图片',
+}
+
+
+def check_single_file(md_file: Path, logger, encoding_fallback: Optional[str] = None) -> bool:
+    """仅解析文件（不生成Word），用于快速检查
+
+    Args:
+        md_file: Markdown文件路径
+        logger: 日志记录器
+        encoding_fallback: 可选，UTF-8 解码失败时使用的后备编码
+    """
+    try:
+        blocks = list(iter_blocks(SourceFile(md_file, encoding_fallback)))
+
+        counts = {}
+        for block in blocks:
+            counts[block.kind] = counts.get(block.kind, 0) + 1
+        summary = '，'.join(f"{BLOCK_LABELS.get(kind, kind)} {n}" for kind, n in counts.items())
+        logger.info(f"✓ 检查: {md_file.name} - {len(blocks)} 个块（{summary or '空文档'}）")
+
+        if 'title' not in counts:
+            logger.warning(f"  {md_file.name} 缺少文档主标题 (#)")
+        for block in blocks:
+            if block.kind == 'image' and not (md_file.parent / block.path).is_file():
+                logger.warning(f"  {md_file.name} 引用的图片不存在: {block.path}")
         return True
 
     except Exception as e:
@@ -77,6 +297,79 @@ def convert_single_file(md_file: Path, output_dir: Path, converter, logger, expo
         return False
 
 
+def watch_directory(input_dir: Path, output_dir: Path, converter, cache: BuildCache, logger,
+                    export_pdf=False, prune=False, debounce=0.3, on_result=None, recursive=False,
+                    include=(), exclude=()):
+    """常驻监视输入目录，只重新转换新建或修改的文件（Ctrl-C 退出）
+
+    监视的文件与批量转换相同（递归、包含/排除模式，输出目录不监视），子目录中的文件输出到镜像的子目录。
+
+    Args:
+        input_dir: 输入目录
+        output_dir: 输出目录
+        converter: 常驻的转换器实例
+        cache: 增量缓存（用于跳过内容未变化的保存）
+        logger: 日志记录器
+        export_pdf: 是否同时导出PDF
+        prune: 源文件删除时是否同时删除其输出
+        debounce: 合并连续保存事件的时间窗口（秒）
+        on_result: 可选，每个文件转换后以 (md_file, success, report) 调用
+        recursive: 是否监视子目录
+        include: 包含模式
+        exclude: 排除模式
+    """
+    selection = dict(recursive=recursive, include=include, exclude=exclude, skip_dirs=[output_dir])
+    watcher = create_watcher(input_dir, logger=logger, **selection)
+    logger.info(f"正在监视: {input_dir.absolute()}（按 Ctrl-C 退出）")
+    try:
+        for names in debounced(watcher, debounce):
+            if names is None:
+                # 事件队列溢出或子目录变化，按同样的筛选重新扫描；缓存中源文件已不存在的按删除处理
+                names = {p.relative_to(input_dir).as_posix()
+                         for p in iter_sources(input_dir, logger=logger, **selection)}
+                names |= {key for key in cache.entries if not (input_dir / key).is_file()}
+
+            for name in sorted(names):
+                md_file = input_dir / name
+                try:
+                    if not md_file.is_file():
+                        if prune:
+                            for output in cache.remove(name):
+                                logger.info(f"- 源文件已删除，移除输出: {output}")
+                        else:
+                            logger.info(f"- 源文件已删除: {name}")
+                        continue
+                    fresh, digest = cache.check(name, md_file)
+                except OSError:
+                    continue  # 文件在处理过程中被删除或替换，等待后续事件
+                if fresh:
+                    logger.debug(f"- 跳过（内容未变化）: {name}")
+                    continue
+
+                report = {}
+                success = convert_source(md_file, input_dir, output_dir, converter, logger, export_pdf, report)
+                if success and report.get('outputs'):
+                    cache.record(name, md_file, digest, report['outputs'], report.get('digests'),
+                                 report.get('images'))
+                else:
+                    cache.invalidate(name)
+                if on_result:
+                    on_result(md_file, success, report)
+            cache.save()
+    finally:
+        watcher.close()
+        cache.save()
+
+
+def write_metrics(collector: MetricsCollector, path: str, logger):
+    """写出指标报告"""
+    try:
+        collector.write(Path(path))
+        logger.info(f"指标报告: {path}")
+    except OSError as e:
+        logger.warning(f"指标报告写入失败: {e}")
+
+
 def main():
     """主函数"""
     # 修复Windows控制台编码问题
@@ -84,6 +377,18 @@ def main():
         sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+    # 子命令
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from md2doc.server import serve_main
+        serve_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'merge-reports':
+        from md2doc.report import main as merge_reports_main
+        sys.exit(merge_reports_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'importtime':
+        from md2doc.startup import main as importtime_main
+        sys.exit(importtime_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
         description='Markdown 转 Word 批量转换工具',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -101,8 +406,58 @@ def main():
   # 同时导出PDF
   python -m md2doc.cli -p
 
+  # 不依赖办公软件测试PDF导出流程（生成空白PDF）
+  python -m md2doc.cli -p --pdf-backend stub
+
+  # 忽略增量缓存，重新转换全部文件，并删除已移除源文件的输出
+  python -m md2doc.cli --force --prune
+
+  # 使用自定义Word模板（.dotx/.docx）
+  python -m md2doc.cli -t 公文模板.dotx
+
+  # 超大文档使用流式写入，内存占用与文档大小无关
+  python -m md2doc.cli --stream
+
+  # 按章节（##）拆分超大文档，每个文档最多约20MB文本
+  python -m md2doc.cli --split --split-size 20
+
+  # 递归转换子目录（输出保持相同的目录结构），跳过草稿目录
+  python -m md2doc.cli -r --exclude 'drafts' --exclude '*.tmp.md'
+
+  # 把input文件夹（含子目录）中的所有文件按顺序合并为一个文档，文件之间分节
+  python -m md2doc.cli -r --merge 合订本 --merge-break section
+
+  # 可重现输出：内容不变时重新生成的docx逐字节相同（便于去重和缓存）
+  python -m md2doc.cli --deterministic
+
+  # 中间结果不压缩以加快保存；归档时使用最高压缩级别
+  python -m md2doc.cli --compression store --no-sync
+  python -m md2doc.cli --compress-level 9
+
+  # 仅解析检查，不生成Word文档
+  python -m md2doc.cli --check
+
+  # 使用4个进程并行转换，单个文件超过120秒视为失败
+  python -m md2doc.cli -j 4 --timeout 120
+
+  # 记录每个文件各阶段的耗时、块数和输出大小
+  python -m md2doc.cli --metrics metrics.json
+
+  # 转换后常驻监视input文件夹，文件保存后自动重新转换
+  python -m md2doc.cli --watch
+
   # 显示详细信息
   python -m md2doc.cli -v
+
+  # 在4台机器上分担转换（每台机器运行其中一个分片），完成后合并各分片的报告
+  python -m md2doc.cli -r --shard 1/4
+  python -m md2doc.cli merge-reports output/
+
+  # 常驻转换服务（HTTP或标准输入输出 JSON-RPC），详见 serve --help
+  python -m md2doc.cli serve
+
+  # 统计启动时的模块导入耗时
+  python -m md2doc.cli importtime
         """
     )
 
@@ -112,14 +467,106 @@ def main():
                        help='输出文件夹路径 (默认: output)')
     parser.add_argument('-f', '--file', type=str,
                        help='转换单个文件')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                       help='递归转换子目录中的文件，输出目录保持相同的目录结构')
+    parser.add_argument('--include', action='append', default=[], metavar='PATTERN',
+                       help='只转换匹配的文件（可多次指定；含 / 时匹配相对路径，否则匹配文件名）')
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                       help='跳过匹配的文件或目录（可多次指定，规则同 --include）')
     parser.add_argument('-l', '--log', type=str,
                        help='日志文件路径')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='显示详细日志')
     parser.add_argument('-p', '--pdf', action='store_true',
                        help='同时导出PDF文件')
+    parser.add_argument('--pdf-backend', choices=sorted(PDF_BACKENDS), default=DEFAULT_BACKEND,
+                       help=f'PDF导出后端 (默认: {DEFAULT_BACKEND}；stub 不依赖办公软件，仅用于测试)')
+    parser.add_argument('-t', '--template', type=str,
+                       help='Word模板文件 (.dotx/.docx)，页面设置和样式在其基础上应用')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='批量转换的并行进程数 (默认: CPU核心数)')
+    parser.add_argument('--timeout', type=float,
+                       help='单个文件的转换超时时间（秒），超时视为失败')
+    parser.add_argument('--stream', action='store_true',
+                       help='流式写入docx（适合超大文档，内存占用恒定）')
+    parser.add_argument('--encoding-fallback', type=str, metavar='ENCODING',
+                       help='源文件不是UTF-8时使用的编码（如 gb18030，用于旧文件）')
+    parser.add_argument('--split', action='store_true',
+                       help='按一级标题（##）把每个源文件拆分为多个Word文档，并生成索引文件')
+    parser.add_argument('--split-blocks', type=int, metavar='N',
+                       help='拆分时每个文档最多N个块（可与 --split 同时使用）')
+    parser.add_argument('--split-size', type=float, metavar='MB',
+                       help='拆分时每个文档最多约MB兆字节的文本（可与 --split 同时使用）')
+    parser.add_argument('--merge', type=str, metavar='NAME',
+                       help='把输入目录中的所有文件按顺序合并为一个Word文档 NAME.docx')
+    parser.add_argument('--merge-break', choices=MERGE_BREAKS, default='page',
+                       help='合并时源文件之间的分隔 (默认: page 分页符；section 分节符)')
+    parser.add_argument('--deterministic', action='store_true',
+                       help='可重现输出：相同输入和配置生成逐字节相同的docx（固定时间戳，可用 SOURCE_DATE_EPOCH 指定）')
+    parser.add_argument('--compression', choices=list(COMPRESSION_METHODS), default='deflate',
+                       help='docx压缩方式 (默认: deflate；store 不压缩，保存最快，适合临时输出)')
+    parser.add_argument('--compress-level', type=int, metavar='N',
+                       help='DEFLATE 压缩级别 0-9 (默认: 6；0 不压缩，1 最快，9 体积最小，适合归档)')
+    parser.add_argument('--no-sync', action='store_true',
+                       help='输出文件替换前后不同步到磁盘（每个文件省去两次 fsync，适合临时输出；'
+                            '断电或系统崩溃时输出可能不完整）')
+    parser.add_argument('--check', action='store_true',
+                       help='仅解析检查Markdown文件，不生成文档')
+    parser.add_argument('--force', action='store_true',
+                       help='忽略增量缓存，重新转换所有文件')
+    parser.add_argument('--resume', action='store_true',
+                       help='从上次中断处继续：跳过运行日志中已完成的文件，重试中断时正在转换的文件')
+    parser.add_argument('--prune', action='store_true',
+                       help='删除输入目录中已不存在的源文件所对应的输出')
+    parser.add_argument('--watch', action='store_true',
+                       help='批量转换后继续监视输入目录，自动转换新建或修改的文件')
+    parser.add_argument('--max-memory', type=float, metavar='MB',
+                       help='单个文件转换的内存预算：预计超出的文件改用流式写入，转换中超出的文件记为失败')
+    parser.add_argument('--trace-memory', action='store_true',
+                       help='用 tracemalloc 统计每个文件转换的内存峰值（写入日志和指标报告，转换会变慢）')
+    parser.add_argument('--image-dpi', type=int, metavar='N',
+                       help='按显示尺寸把图片缩小到不超过N DPI并重新压缩（需要安装 Pillow），'
+                            f'处理结果缓存在输出目录的 {IMAGE_CACHE_DIR}/ 中')
+    parser.add_argument('--image-quality', type=int, default=85, metavar='Q',
+                       help='缩小后重新压缩JPEG图片的质量（1-95，默认: 85）')
+    parser.add_argument('--shard', type=str, metavar='i/N',
+                       help='只转换N个分片中的第i个（按文件大小确定性均衡分配，各机器独立计算）')
+    parser.add_argument('--report', type=str, metavar='FILE',
+                       help='把每个文件的结果、耗时和输出写入JSON报告（分片时默认写入输出目录，'
+                            '可用 merge-reports 合并）')
+    parser.add_argument('--metrics', type=str, metavar='FILE',
+                       help='把每个文件的分阶段耗时、块数、输出大小和汇总百分位写入JSON文件')
 
     args = parser.parse_args()
+    save_options = SaveOptions(deterministic=args.deterministic, compression=args.compression,
+                               level=args.compress_level, sync=not args.no_sync)
+    try:
+        save_options.validate()
+    except ValueError as e:
+        parser.error(str(e))
+    if args.merge and (args.file or args.watch or args.split or args.split_blocks or args.split_size):
+        parser.error('--merge 不能与 -f、--watch 或拆分选项同时使用')
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.file or args.watch or args.merge:
+            parser.error('--shard 不能与 -f、--watch 或 --merge 同时使用')
+    if args.resume and (args.file or args.merge):
+        parser.error('--resume 不能与 -f 或 --merge 同时使用')
+    if args.max_memory is not None and args.max_memory <= 0:
+        parser.error('--max-memory 必须大于0')
+    if args.image_dpi is not None and args.image_dpi <= 0:
+        parser.error('--image-dpi 必须大于0')
+    if not 1 <= args.image_quality <= 95:
+        parser.error('--image-quality 必须在1到95之间')
+    if args.encoding_fallback:
+        try:
+            codecs.lookup(args.encoding_fallback)
+        except LookupError:
+            parser.error(f'未知的编码: {args.encoding_fallback}')
 
     # 设置日志
     logger = setup_logging(args.log, args.verbose)
@@ -130,8 +577,36 @@ def main():
     print('=' * 60)
     print()
 
-    # 创建转换器
-    converter = MarkdownConverter()
+    # 转换器参数（转换器本身在需要时才创建）
+    converter_options = {}
+    if args.template:
+        if not Path(args.template).exists():
+            logger.error(f"模板文件不存在: {args.template}")
+            sys.exit(1)
+        converter_options['template'] = Path(args.template)
+    if args.stream:
+        converter_options['stream'] = True
+    if save_options != SaveOptions():
+        converter_options['save_options'] = save_options
+    if args.split or args.split_blocks or args.split_size:
+        converter_options['split'] = SplitOptions(
+            by_heading=args.split,
+            max_blocks=args.split_blocks,
+            max_bytes=int(args.split_size * 1024 * 1024) if args.split_size else None,
+            jobs=args.jobs,
+        )
+    if args.encoding_fallback:
+        converter_options['encoding_fallback'] = args.encoding_fallback
+    if args.max_memory or args.trace_memory:
+        converter_options['memory'] = MemoryOptions(
+            limit=int(args.max_memory * 1024 * 1024) if args.max_memory else None,
+            trace=args.trace_memory,
+        )
+    if args.image_dpi:
+        converter_options['images'] = ImageOptions(dpi=args.image_dpi, quality=args.image_quality,
+                                                   cache_dir=Path(args.output) / IMAGE_CACHE_DIR)
+    export_pdf = args.pdf_backend if args.pdf else False
+    collector = MetricsCollector(logger=logger) if args.metrics else None
     start_time = datetime.now()
 
     try:
@@ -142,11 +617,19 @@ def main():
                 logger.error(f"文件不存在: {args.file}")
                 sys.exit(1)
 
+            if args.check:
+                sys.exit(0 if check_single_file(md_file, logger, args.encoding_fallback) else 1)
+
             output_dir = Path(args.output)
             output_dir.mkdir(parents=True, exist_ok=True)
 
             logger.info(f"输出目录: {output_dir.absolute()}")
-            success = convert_single_file(md_file, output_dir, converter, logger, args.pdf)
+            converter = create_converter(converter_options)
+            report = {}
+            success = convert_single_file(md_file, output_dir, converter, logger, export_pdf, report)
+            if collector:
+                collector.add(report['metrics'])
+                write_metrics(collector, args.metrics, logger)
 
             if success:
                 print()
@@ -200,45 +683,257 @@ def main():
 
                 sys.exit(0)
 
-            # 创建输出目录
-            output_dir.mkdir(parents=True, exist_ok=True)
-
             logger.info(f"输入目录: {input_dir.absolute()}")
-            logger.info(f"输出目录: {output_dir.absolute()}")
 
-            # 查找所有md文件
-            md_files = list(input_dir.glob('*.md')) + list(input_dir.glob('*.markdown'))
+            # 流式发现md文件：边遍历目录边转换
+            sources = iter_sources(input_dir, args.recursive, args.include, args.exclude,
+                                   skip_dirs=[output_dir], logger=logger)
+            first = next(sources, None)
 
-            if not md_files:
+            if first is None and not (args.watch and not args.check):
                 logger.warning('未找到任何 Markdown 文件')
                 sys.exit(0)
+            if first is not None:
+                sources = itertools.chain([first], sources)
+
+            # 分片：需要遍历完整个目录树后才能确定本分片的文件
+            total = None
+            if shard:
+                discovered = list(sources)
+                sources, total = select_shard(discovered, input_dir, *shard)
+                logger.info(f"分片 {shard[0]}/{shard[1]}: {len(sources)} 个文件（共 {total} 个）")
+
+            # 仅检查模式
+            if args.check:
+                checked = failed = 0
+                for md_file in sources:
+                    checked += 1
+                    failed += not check_single_file(md_file, logger, args.encoding_fallback)
+                elapsed_time = (datetime.now() - start_time).total_seconds()
+                print()
+                print(f'检查完成：{checked - failed} 个通过，{failed} 个失败，耗时 {elapsed_time:.2f} 秒')
+                sys.exit(1 if failed else 0)
+
+            # 创建输出目录
+            output_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"输出目录: {output_dir.absolute()}")
 
-            logger.info(f"找到 {len(md_files)} 个文件")
+            # 合并模式：所有文件一次渲染为一个文档（不使用增量缓存）
+            if args.merge:
+                name = sanitize_filename(args.merge[:-5] if args.merge.lower().endswith('.docx') else args.merge)
+                report = {}
+                success = merge_files(sources, output_dir / f"{name}.docx", create_converter(converter_options),
+                                      logger, export_pdf, args.merge_break == 'section', report)
+                if collector:
+                    collector.add(report['metrics'])
+                    write_metrics(collector, args.metrics, logger)
+
+                elapsed_time = (datetime.now() - start_time).total_seconds()
+                print()
+                print('=' * 60)
+                print('合并完成！' if success else '合并失败！')
+                print(f'  合并: {report["merged"]}')
+                print(f'  跳过: {report["failed"]}')
+                print(f'  耗时: {elapsed_time:.2f} 秒')
+                print(f'  输出: {(output_dir / f"{name}.docx").absolute()}')
+                print('=' * 60)
+                if not success:
+                    sys.exit(1)
+                return
 
             # 转换文件
             results = {
+                'found': 0,
                 'success': 0,
                 'failed': 0,
                 'skipped': 0
             }
 
-            for md_file in md_files:
-                if convert_single_file(md_file, output_dir, converter, logger, args.pdf):
-                    results['success'] += 1
+            # 增量缓存：跳过内容和配置均未变化的文件
+            converter = create_converter(converter_options)
+            template_digest = file_digest(Path(args.template)) if args.template else None
+            split = converter.split
+            fingerprint = config_fingerprint(converter.config, pdf=export_pdf, template=template_digest,
+                                             split=split[:3] if split else None,
+                                             save=converter.save_options._asdict(),
+                                             **({'encoding': args.encoding_fallback} if args.encoding_fallback else {}),
+                                             **({'images': [args.image_dpi, args.image_quality]}
+                                                if args.image_dpi else {}))
+            # 分片共用输出目录时各自使用独立的缓存清单
+            cache = BuildCache(output_dir, fingerprint, logger,
+                               f".md2doc-cache-{shard[0]}-of-{shard[1]}.json" if shard else MANIFEST_NAME)
+            digests = {}
+            run_report = None
+            if args.report or shard:
+                run_report = RunReport(output_dir, shard)
+                run_report.total = total
+
+            # 运行日志：逐个文件追加记录，进程被终止后可用 --resume 继续
+            journal = BuildJournal(output_dir, journal_name(shard), logger)
+            recovered, retry = {}, set()
+            if args.resume:
+                state = journal.load()
+                recovered = {key: r for key, r in state.completed.items() if r.get('fingerprint') == fingerprint}
+                retry = set(state.in_flight)
+                if len(recovered) < len(state.completed):
+                    logger.warning(f"配置已变化，{len(state.completed) - len(recovered)} 个已完成的文件将重新转换")
+                logger.info(f"继续上次运行: {len(recovered)} 个文件已完成，{len(retry)} 个文件中断后重试")
+                results.update(resumed=0, retried=0)
+            elif journal.exists():
+                logger.warning('上次运行未正常结束，本次重新开始（使用 --resume 可跳过已完成的文件）')
+            journal.open(resume=args.resume)
+
+            def pending():
+                for md_file in sources:
+                    results['found'] += 1
+                    key = md_file.relative_to(input_dir).as_posix()
+                    try:
+                        fresh, digest = cache.check(key, md_file)
+                    except OSError as e:
+                        logger.warning(f"- 失败（无法读取）: {key} - {e}")
+                        results['failed'] += 1
+                        if run_report:
+                            run_report.add(key, 'failed')
+                        continue
+                    if fresh and not args.force:
+                        logger.debug(f"- 跳过（未修改）: {key}")
+                        results['skipped'] += 1
+                        if run_report:
+                            run_report.add(key, 'skipped', cache.entries[key].get('outputs') or [])
+                        continue
+                    entry = recovered.get(key)
+                    if entry and entry.get('hash') == digest and outputs_intact(output_dir, entry):
+                        # 上次运行已完成、但缓存清单未来得及保存（输出损坏的文件重新转换）
+                        logger.debug(f"- 跳过（已完成）: {key}")
+                        cache.record(key, md_file, digest, entry['outputs'], entry.get('output_hashes'),
+                                     entry.get('images'))
+                        results['skipped'] += 1
+                        results['resumed'] += 1
+                        if run_report:
+                            run_report.add(key, 'skipped', entry['outputs'])
+                        continue
+                    if key in retry:
+                        logger.info(f"- 重试（上次中断）: {key}")
+                        results['retried'] += 1
+                    journal.start(key)
+                    digests[md_file] = (key, digest)
+                    yield md_file
+
+            # 先取出不超过并行数的待转换文件，文件很少时不必启动进程池
+            from md2doc.parallel import WorkerPool, default_jobs
+
+            todo = pending()
+            jobs = args.jobs or default_jobs()
+            head = list(itertools.islice(todo, jobs))
+            jobs = min(jobs, len(head))
+            todo = itertools.chain(head, todo)
+
+            # 批量导出PDF时，docx生成与PDF导出并行：docx完成后交给后台流水线（工作进程只生成docx），
+            # 导出完成后再记录结果
+            pipeline = PdfPipeline(create_backend(args.pdf_backend), logger=logger) if args.pdf and head else None
+
+            def finish(md_file, success, report):
+                key, digest = digests[md_file]
+                if success and report.get('outputs'):
+                    cache.record(key, md_file, digest, report['outputs'], report.get('digests'),
+                                 report.get('images'))
+                    journal.done(key, digest, fingerprint, report['outputs'], report.get('digests'),
+                                 report.get('images'))
+                else:
+                    cache.invalidate(key)
+                    journal.failed(key)
+                results['success' if success else 'failed'] += 1
+                if run_report:
+                    run_report.add(key, 'success' if success else 'failed', report.get('outputs') or [],
+                                   (report.get('metrics') or {}).get('total'))
+                if collector:
+                    collector.add(report.get('metrics') or {'file': md_file.name, 'success': False})
+
+            def finish_pdf(job):
+                md_file, report, docx_paths = job.tag
+                errors = dict(job.errors)
+                log_pdf_results(docx_paths, [errors.get(path) for path in docx_paths], logger, report)
+                metrics = report.get('metrics')
+                if metrics is not None:
+                    metrics['stages']['pdf'] = job.elapsed
+                    metrics['total'] = metrics.get('total', 0.0) + job.elapsed
+                    metrics['output_bytes'] = (metrics.get('output_bytes') or 0) + sum(
+                        path.stat().st_size for path in job.pdf_paths if path.exists())
+                finish(md_file, True, report)
+
+            def record(md_file, success, report):
+                if pipeline and success and report.get('outputs'):
+                    docx_paths = [output_dir / name for name in report['outputs'] if name.endswith('.docx')]
+                    pipeline.submit((md_file, report, docx_paths), docx_paths)
+                    for job in pipeline.completed():
+                        finish_pdf(job)
+                else:
+                    finish(md_file, success, report)
+
+            completed = False
+            try:
+                if jobs > 1 or (head and args.timeout):
+                    # 多进程并行转换，按文件顺序汇总日志和结果
+                    logger.info(f"并行进程数: {max(1, jobs)}")
+                    with WorkerPool(output_dir, jobs, False, args.timeout, logger.getEffectiveLevel(),
+                                    converter_options, input_dir) as pool:
+                        for result in pool.imap(todo):
+                            for level, message in result.records:
+                                logger.log(level, message)
+                            record(result.md_file, result.success, result.report)
                 else:
-                    results['failed'] += 1
+                    for md_file in todo:
+                        report = {}
+                        success = convert_source(md_file, input_dir, output_dir, converter, logger, False, report)
+                        record(md_file, success, report)
+
+                if pipeline:
+                    logger.debug('等待PDF导出完成')
+                    for job in pipeline.close():
+                        finish_pdf(job)
+
+                if args.prune:
+                    # 只删除源文件确实已不存在的输出：本次 -r、--include、--exclude 或分片未选中的文件不算已删除
+                    removed = cache.prune([key for key in cache.entries if (input_dir / key).is_file()])
+                    if removed:
+                        logger.info(f"已删除 {len(removed)} 个过期输出")
+                completed = True
+            finally:
+                if pipeline:
+                    pipeline.close(cancel=True)
+                cache.save()
+                # 正常结束时缓存清单已包含全部结果，不再需要运行日志
+                journal.close(remove=completed)
+                if collector:
+                    write_metrics(collector, args.metrics, logger)
+                if run_report:
+                    report_path = Path(args.report) if args.report else output_dir / report_name(shard)
+                    try:
+                        run_report.write(report_path)
+                        logger.info(f"运行报告: {report_path}")
+                    except OSError as e:
+                        logger.warning(f"运行报告写入失败: {e}")
 
             # 打印结果
             elapsed_time = (datetime.now() - start_time).total_seconds()
             print()
-            print('=' * 60)
-            print('转换完成！')
-            print(f'  成功: {results["success"]}')
-            print(f'  跳过: {results["skipped"]}')
-            print(f'  失败: {results["failed"]}')
-            print(f'  耗时: {elapsed_time:.2f} 秒')
-            print(f'  输出: {output_dir.absolute()}')
-            print('=' * 60)
+            summary = dict(results, total=total if total is not None else results['found'])
+            for line in summary_lines(summary, elapsed_time, output_dir.absolute()):
+                print(line)
+
+            if args.watch:
+                def on_result(md_file, success, report):
+                    if collector:
+                        collector.add(report.get('metrics') or {'file': md_file.name, 'success': False})
+                        write_metrics(collector, args.metrics, logger)
+
+                print()
+                try:
+                    watch_directory(input_dir, output_dir, converter, cache, logger, export_pdf, args.prune,
+                                    on_result=on_result, recursive=args.recursive, include=args.include,
+                                    exclude=args.exclude)
+                except KeyboardInterrupt:
+                    logger.info('已停止监视')
 
     except KeyboardInterrupt:
         logger.info('\n用户中断操作')
@@ -3,294 +3,322 @@
 Markdown转Word转换器核心类
 """
 
-import re
+import io
+import copy
 import logging
+import zipfile
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
 from docx import Document
-from docx.oxml import OxmlElement
+from docx.oxml import OxmlElement, parse_xml
 from docx.oxml.ns import qn
-from docx.shared import Pt
+from docx.shared import Pt, RGBColor
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 
 from .config import ConverterConfig
+from .metrics import stage_timer, count_blocks, move_stage_time
+from .ooxml import table_xml, block_width, page_break_xml, section_break_xml, sect_pr_xml, image_xml
+from .save import SaveOptions, save_document, file_hash, temp_path, durable_replace
+from .memory import MemoryGuard, MemoryOptions
+from .source import SourceFile
+from .images import ImageOptions, ImageProcessor, placeholder, resolve_images
+from .parser import (  # noqa: F401  解析工具函数仍可从本模块导入
+    Block, Title, Heading, Paragraph, Signature, Quote, ListItem, Table, Separator, CodeBlock, Break, Image,
+    parse, iter_blocks,
+    parse_inline_formatting, flatten_inline_spans, strip_inline_formatting,
+    extract_title, extract_title_from_md, sanitize_filename, normalize_list_symbol, is_signature_line,
+)
 
 
 # ==================== 格式化工具函数 ====================
 
-def set_font(run, font_name: str, size: Pt = None, bold: bool = None):
-    """设置中文字体"""
-    run.font.name = font_name
-
-    # 设置颜色为黑色
-    r = run._element
-    if r.rPr is None:
-        rPr = OxmlElement('w:rPr')
-        r.insert(0, rPr)
-    else:
-        rPr = r.rPr
-
-    color_element = OxmlElement('w:color')
-    color_element.set(qn('w:val'), '000000')
-    rPr.append(color_element)
-
-    # 禁用下划线
-    underline = OxmlElement('w:u')
-    underline.set(qn('w:val'), 'none')
-    rPr.append(underline)
-
-    # 设置字体
-    rFonts = OxmlElement('w:rFonts')
-    rFonts.set(qn('w:eastAsia'), font_name)
-    rFonts.set(qn('w:ascii'), font_name)
-    rFonts.set(qn('w:hAnsi'), font_name)
-    rFonts.set(qn('w:cs'), font_name)
-    rPr.append(rFonts)
-
-    if size:
-        run.font.size = size
-    if bold is not None:
-        run.font.bold = bold
-
-
-def set_paragraph_spacing(paragraph, space_before=None, space_after=None, line_spacing=None):
-    """设置段落格式
-
-    注意：space_before和space_after即使是0也需要设置，以覆盖Word默认间距
-    """
-    pPr = paragraph._element.get_or_add_pPr()
-
-    # 创建spacing元素（只要任一参数不为None就创建）
-    if space_before is not None or space_after is not None or line_spacing is not None:
-        spacing = OxmlElement('w:spacing')
-
-        if space_before is not None:
-            spacing.set(qn('w:before'), str(int(space_before)))
-        if space_after is not None:
-            spacing.set(qn('w:after'), str(int(space_after)))
-        if line_spacing is not None:
-            if isinstance(line_spacing, Pt):
-                # 固定值：Pt转缇，1pt = 20缇
-                spacing.set(qn('w:line'), str(int(line_spacing.pt * 20)))
-                spacing.set(qn('w:lineRule'), 'exact')
-            elif isinstance(line_spacing, (int, float)):
-                # 倍数行距
-                spacing.set(qn('w:line'), str(int(line_spacing * 240)))
-                spacing.set(qn('w:lineRule'), 'auto')
-
-        pPr.append(spacing)
+def set_page_margins(section):
+    """设置页边距"""
+    margins = ConverterConfig.MARGINS
+    section.top_margin = Pt(margins.top * 28.35)
+    section.bottom_margin = Pt(margins.bottom * 28.35)
+    section.left_margin = Pt(margins.left * 28.35)
+    section.right_margin = Pt(margins.right * 28.35)
+    section.header_distance = Pt(margins.header * 28.35)
+    section.footer_distance = Pt(margins.footer * 28.35)
 
 
-def set_run_format(run, font_config, bold=False, italic=False):
-    """设置运行格式（字体、粗体、斜体）
+# 文档样式名称：格式在styles.xml中定义一次，段落只引用样式
+STYLE_NAMES = {
+    'title': 'md2doc Title',
+    'heading1': 'md2doc Heading 1',
+    'heading2': 'md2doc Heading 2',
+    'heading3': 'md2doc Heading 3',
+    'body': 'md2doc Body',
+    'quote': 'md2doc Quote',
+    'signature': 'md2doc Signature',
+    'table': 'md2doc Table Text',
+    'separator': 'md2doc Separator',
+}
+
+
+def _style_specs(config) -> Dict[str, tuple]:
+    """各样式的定义：(字体键, 对齐方式, 大纲级别, 首行缩进字符数, 是否设置段前段后)"""
+    indent = config.PARAGRAPH.first_line_indent_chars
+    return {
+        'title': ('title', WD_PARAGRAPH_ALIGNMENT.CENTER, None, None, True),
+        'heading1': ('heading1', WD_PARAGRAPH_ALIGNMENT.LEFT, 0, None, True),
+        'heading2': ('heading2', WD_PARAGRAPH_ALIGNMENT.LEFT, 1, None, True),
+        'heading3': ('heading3', WD_PARAGRAPH_ALIGNMENT.LEFT, 2, None, True),
+        'body': ('body', WD_PARAGRAPH_ALIGNMENT.JUSTIFY, None, indent, True),
+        'quote': ('quote', WD_PARAGRAPH_ALIGNMENT.JUSTIFY, None, indent, True),
+        'signature': ('body', WD_PARAGRAPH_ALIGNMENT.RIGHT, None, 0, True),  # 落款右对齐、不缩进
+        'table': ('body', WD_PARAGRAPH_ALIGNMENT.LEFT, None, None, False),
+        'separator': (None, None, None, None, False),
+    }
+
+
+def define_document_styles(doc: Document, config=None) -> Dict[str, Any]:
+    """在文档的styles.xml中定义转换所需的段落样式
+
+    样式的字体、行距、缩进和对齐均来自ConverterConfig，统一禁用下划线并使用黑色字体。
+    已存在的同名样式（例如来自模板）会被更新而不是重复添加。
 
     Args:
-        run: Word运行对象
-        font_config: 字体配置
-        bold: 是否加粗
-        italic: 是否斜体
-    """
-    set_font(run, font_config.name, font_config.size, bold if bold else font_config.bold)
-    if italic:
-        run.font.italic = True
+        doc: Word文档对象
+        config: 配置对象，默认使用ConverterConfig
 
+    Returns:
+        Dict[str, style]: 样式键到样式对象的映射
+    """
+    config = config or ConverterConfig
+    styles = doc.styles
+    normal = styles['Normal']
+    paragraph = config.PARAGRAPH
+    result = {}
+
+    for key, (font_key, alignment, outline_level, indent_chars, title_spacing) in _style_specs(config).items():
+        name = STYLE_NAMES[key]
+        try:
+            style = styles[name]
+        except KeyError:
+            style = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = normal
+        style.quick_style = True
+
+        pf = style.paragraph_format
+        pf.line_spacing = paragraph.line_spacing
+        if title_spacing:
+            pf.space_before = paragraph.space_before_title
+            pf.space_after = paragraph.space_after_title
+        if alignment is not None:
+            pf.alignment = alignment
+        if indent_chars is not None:
+            # Word中字符单位：1字符 = 100
+            ind = style.element.get_or_add_pPr().get_or_add_ind()
+            ind.set(qn('w:firstLineChars'), str(indent_chars * 100))
+            ind.set(qn('w:firstLine'), str(indent_chars * 100))
+        if outline_level is not None:
+            pPr = style.element.get_or_add_pPr()
+            outline = pPr.find(qn('w:outlineLvl'))
+            if outline is None:
+                outline = OxmlElement('w:outlineLvl')
+                pPr.insert_element_before(outline, 'w:divId', 'w:cnfStyle', 'w:rPr', 'w:sectPr', 'w:pPrChange')
+            outline.set(qn('w:val'), str(outline_level))
+
+        if font_key is not None:
+            font_config = config.get_font(font_key)
+            font = style.font
+            font.name = font_config.name
+            font.size = font_config.size
+            font.bold = font_config.bold
+            font.italic = font_config.italic
+            font.color.rgb = RGBColor(0, 0, 0)  # 禁用彩色字体
+            font.underline = False  # 禁用下划线
+            rFonts = style.element.rPr.rFonts
+            rFonts.set(qn('w:eastAsia'), font_config.name)
+            rFonts.set(qn('w:cs'), font_config.name)
+
+        result[key] = style
 
-def set_first_line_indent_chars(paragraph, chars: int):
-    """设置首行缩进（字符单位）
+    return result
 
-    Args:
-        paragraph: 段落对象
-        chars: 缩进字符数
-    """
-    pPr = paragraph._element.get_or_add_pPr()
-    indent = OxmlElement('w:ind')
 
-    # Word中字符单位：1字符 = 100 twips
-    indent.set(qn('w:firstLineChars'), str(chars * 100))
-    indent.set(qn('w:firstLine'), str(chars * 100))
+# 段落类块对应的样式键（Word渲染和流式写入共用）
+BLOCK_STYLE_KEYS = {
+    'title': 'title',
+    'paragraph': 'body',
+    'signature': 'signature',
+    'quote': 'quote',
+    'list_item': 'body',
+    'separator': 'separator',
+}
 
-    pPr.append(indent)
+# 分隔线输出的文本
+SEPARATOR_TEXT = '_' * 50
 
 
-def set_page_margins(section):
-    """设置页边距"""
-    margins = ConverterConfig.MARGINS
-    section.top_margin = Pt(margins.top * 28.35)
-    section.bottom_margin = Pt(margins.bottom * 28.35)
-    section.left_margin = Pt(margins.left * 28.35)
-    section.right_margin = Pt(margins.right * 28.35)
-    section.header_distance = Pt(margins.header * 28.35)
-    section.footer_distance = Pt(margins.footer * 28.35)
+def block_style_key(block) -> str:
+    """段落类块使用的样式键"""
+    if block.kind == 'heading':
+        return f'heading{block.level}'
+    return BLOCK_STYLE_KEYS[block.kind]
 
 
-def remove_paragraph_border(paragraph):
-    """移除段落边框"""
-    try:
-        pPr = paragraph._element.get_or_add_pPr()
-        pBdr = pPr.find(qn('w:pBdr'))
-        if pBdr is not None:
-            pPr.remove(pBdr)
-    except Exception:
-        pass
+def add_styled_paragraph(container, text: str, style_id: str):
+    """添加引用指定样式的段落
 
+    直接写入样式ID，避免python-docx在每个段落上重复查找样式表。
+    """
+    paragraph = container.add_paragraph(text)
+    paragraph._p.style = style_id
+    return paragraph
 
-def is_signature_line(text: str) -> bool:
-    """判断是否是落款或日期行"""
-    text_stripped = text.strip()
-    return '辅导员：' in text_stripped or '日期：' in text_stripped
 
+# ==================== 文档模板 ====================
 
-# ==================== 解析工具函数 ====================
+# .dotx 模板与 .docx 文档主部件的内容类型
+_TEMPLATE_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml'
+_DOCUMENT_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml'
 
-def parse_inline_formatting(text: str) -> str:
-    r"""清理Markdown格式标记，但保留转义字符
 
-    处理规则:
-    - 移除 **text** → text (不应用加粗格式)
-    - 移除 *text* → text (不应用斜体格式)
-    - 移除 `code` → code (不应用代码格式)
-    - 保留 \* → *
-    - 保留其他转义字符
-    - 移除段首空格（包括全角和半角空格）
-    - 压缩题序和标题之间的多余空格
+def load_template_document(path: Path) -> Document:
+    """加载用户提供的 .dotx/.docx 模板
 
-    Args:
-        text: 原始文本
+    python-docx 只接受 .docx 的内容类型，.dotx 模板在内存中改写内容类型后再打开。
+    """
+    data = Path(path).read_bytes()
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        content_types = zin.read('[Content_Types].xml')
+        if _TEMPLATE_CONTENT_TYPE.encode() not in content_types:
+            return Document(io.BytesIO(data))
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                payload = zin.read(item.filename)
+                if item.filename == '[Content_Types].xml':
+                    payload = payload.replace(_TEMPLATE_CONTENT_TYPE.encode(), _DOCUMENT_CONTENT_TYPE.encode())
+                zout.writestr(item, payload)
+    buffer.seek(0)
+    return Document(buffer)
+
+
+def setup_document(doc: Document, config=None) -> Tuple[Dict[str, str], Optional[str]]:
+    """设置页边距并定义文档样式
 
     Returns:
-        str: 清理格式标记后的文本
+        Tuple[Dict[str, str], str]: (样式键到样式ID的映射, 表格样式ID)
     """
-    result = text
-
-    # 处理转义字符（先处理，避免被后续规则影响）
-    # \* → *
-    result = result.replace('\\*', '*')
-    # \` → `
-    result = result.replace('\\`', '`')
-    # \_ → _
-    result = result.replace('\\_', '_')
-
-    # 处理粗体 **text**
-    i = 0
-    while i < len(result):
-        if result[i:i+2] == '**':
-            j = result.find('**', i + 2)
-            if j != -1:
-                # 移除 ** 和 **，保留中间内容
-                result = result[:i] + result[i+2:j] + result[j+2:]
-                continue
-            else:
-                # 没有结束标记，移除开始的 **
-                result = result[:i] + result[i+2:]
-                continue
-        i += 1
-
-    # 处理斜体 *text* (不处理已经处理过的 ** 部分)
-    i = 0
-    while i < len(result):
-        if result[i] == '*' and (i == 0 or result[i-1] != '*') and (i+1 >= len(result) or result[i+1] != '*'):
-            j = result.find('*', i + 1)
-            if j != -1 and (j+1 >= len(result) or result[j+1] != '*'):
-                # 移除 * 和 *，保留中间内容
-                result = result[:i] + result[i+1:j] + result[j+1:]
-                continue
-            else:
-                # 没有结束标记，移除开始的 *
-                result = result[:i] + result[i+1:]
-                continue
-        i += 1
-
-    # 处理反引号 `code`
-    i = 0
-    while i < len(result):
-        if result[i] == '`':
-            j = result.find('`', i + 1)
-            if j != -1:
-                # 移除 ` 和 `，保留中间内容
-                result = result[:i] + result[i+1:j] + result[j+1:]
-                continue
-            else:
-                # 没有结束标记，移除开始的 `
-                result = result[:i] + result[i+1:]
-                continue
-        i += 1
-
-    # 移除段首的所有空格（包括全角空格和半角空格）
-    result = re.sub(r'^[\s\u3000]+', '', result)
-
-    # 压缩题序和标题之间的多余空格
-    # 匹配模式：一、二、三、 或 （一）、（二） 或 1.、2. 或 （1）、（2）等题序
-    # 将题序后的多个空格移除（包括全角和半角空格）
-    result = re.sub(r'([一二三四五六七八九十]+、|（[一二三四五六七八九十]+）|\d+[\.\)、\uff09])([\s\u3000]+)', r'\1', result)
+    config = config or ConverterConfig
+    for section in doc.sections:
+        set_page_margins(section)
+    styles = define_document_styles(doc, config)
+    style_ids = {key: style.style_id for key, style in styles.items()}
+    try:
+        table_style_id = doc.styles['Table Grid'].style_id
+    except KeyError:
+        table_style_id = None  # 用户模板中没有网格表格样式
+    return style_ids, table_style_id
 
-    return result
 
+class DocumentTemplate:
+    """预先配置好的基础文档
 
-def extract_title_from_md(md_file_path: str) -> str:
-    """从Markdown文件中提取第一个一级标题"""
-    try:
-        with open(md_file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('#'):
-                    title = line.lstrip('#').strip()
-                    title = re.sub(r'[<>:"/\\|?*]', '', title)
-                    return title if title else '未命名文档'
-    except Exception:
-        pass
+    模板只加载、解析和设置一次（页边距、样式、字体），之后每次转换克隆一份。
+    克隆时样式部件（styles.xml，默认模板中约350KB）在所有文档间共享，
+    其余部件深拷贝，因此克隆比重新创建 Document() 快一个数量级。
+    共享的样式部件应视为只读：不要修改返回文档的 doc.styles。
 
-    return '未命名文档'
+    Args:
+        config: 配置对象，默认使用ConverterConfig
+        path: 可选的 .dotx/.docx 模板路径，默认使用python-docx内置模板
+    """
 
+    def __init__(self, config=None, path: Optional[Path] = None):
+        self.config = config or ConverterConfig
+        self.path = Path(path) if path else None
+        self.document = load_template_document(self.path) if self.path else Document()
+        self.style_ids, self.table_style_id = setup_document(self.document, self.config)
+        self._styles_part = self.document.part._styles_part
 
-def sanitize_filename(filename: str) -> str:
-    """清理文件名，移除非法字符"""
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    filename = filename.strip()
-    if len(filename) > 200:
-        filename = filename[:200]
-    return filename if filename else '未命名文档'
+    def new_document(self) -> Document:
+        """克隆一份基础文档"""
+        return copy.deepcopy(self.document, {id(self._styles_part): self._styles_part})
 
 
-def normalize_list_symbol(text: str) -> str:
-    """移除列表符号前缀
+# ==================== 转换器类 ====================
 
-    Args:
-        text: 原始文本
 
-    Returns:
-        str: 处理后的文本（移除-、+、*、•等列表符号）
-    """
-    # 移除常见的列表符号前缀（包括空格）
-    if text.startswith(('- ', '+ ', '* ')):
-        return text[2:]  # 移除符号和空格
-    elif text.startswith('• '):
-        return text[2:]  # 移除bullet和空格（•是1个字符，加上空格共2个）
-    return text
+class ConversionResult(NamedTuple):
+    """convert_many() 产出的单个结果"""
+    source: Any
+    title: str
+    data: Optional[bytes]  # docx内容，失败时为None
+    error: Optional[Exception]
+    metrics: Optional[dict]
 
 
-# ==================== 转换器类 ====================
+def _counting(blocks: Iterable[Block], counts: Dict[str, int]) -> Iterator[Block]:
+    """边产出块边按类型计数（流式写入时不能预先遍历）"""
+    for block in blocks:
+        counts[block.kind] = counts.get(block.kind, 0) + 1
+        yield block
 
 
 class MarkdownConverter:
     """Markdown转Word转换器"""
 
-    def __init__(self, config: Optional[ConverterConfig] = None, logger: Optional[logging.Logger] = None):
+    def __init__(self, config: Optional[ConverterConfig] = None, logger: Optional[logging.Logger] = None,
+                 template: Optional[Path] = None, stream: bool = False, split=None,
+                 save_options: Optional[SaveOptions] = None, memory: Optional[MemoryOptions] = None,
+                 encoding_fallback: Optional[str] = None, images: Optional[ImageOptions] = None):
         """
         初始化转换器
 
         Args:
             config: 配置对象，默认使用ConverterConfig
             logger: 日志记录器
+            template: 可选的 .dotx/.docx 模板路径（只加载一次）
+            stream: 批量转换时是否使用流式写入（见 convert_streaming）
+            split: 可选的 split.SplitOptions，批量转换时把每个文件拆分为多个文档
+            save_options: 可选的 save.SaveOptions（如可重现输出）
+            memory: 可选的 memory.MemoryOptions（单个文件的内存预算，超出时抛出 MemoryBudgetError）
+            encoding_fallback: 可选，读取源文件时UTF-8解码失败后使用的编码（如 'gb18030'，见 source.SourceFile）
+            images: 可选的 images.ImageOptions（图片缩小、重新压缩和磁盘缓存）
         """
         self.config = config or ConverterConfig()
         self.logger = logger or logging.getLogger(__name__)
-
-    def convert(self, md_file: Path) -> Tuple[Optional[Document], str]:
+        self.template_path = Path(template) if template else None
+        self.stream = stream
+        self.split = split
+        self.save_options = save_options or SaveOptions()
+        self.memory = memory or MemoryOptions()
+        self.encoding_fallback = encoding_fallback
+        self.image_options = images or ImageOptions()
+        self.image_sources: List[Path] = []  # 最近一次转换引用的图片
+        self._template: Optional[DocumentTemplate] = None
+        self._image_processor: Optional[ImageProcessor] = None
+        self._writer = None
+        self._style_ids: Dict[str, str] = {}
+        self._table_style_id: Optional[str] = None
+        self._renderers = {
+            'title': self._process_document_title,
+            'heading': self._process_heading,
+            'paragraph': self._process_paragraph,
+            'signature': self._process_signature,
+            'quote': self._process_quote,
+            'list_item': self._process_list_item,
+            'table': self._process_table,
+            'separator': self._process_separator,
+            'code': self._process_code_block,
+            'break': self._process_break,
+            'image': self._process_image,
+        }
+
+    def convert(self, md_file: Path, metrics: Optional[dict] = None) -> Tuple[Optional[Document], str]:
         """
         转换Markdown文件为Word文档
 
         Args:
             md_file: Markdown文件路径
+            metrics: 可选，记录各阶段耗时（stages.read/parse/render）和按类型统计的块数（blocks）
 
         Returns:
             Tuple[Document, str]: (Word文档对象, 标题)
@@ -298,304 +326,331 @@ class MarkdownConverter:
         try:
             self.logger.info(f"开始处理: {md_file.name}")
 
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # 文件只遍历一次：映射后边解码边解析，标题在同一次遍历中记录
+            with stage_timer(metrics, 'read'):
+                source = self.open_source(md_file)
+
+            guard = MemoryGuard(self.memory.limit)
+            with stage_timer(metrics, 'parse'):
+                blocks = list(self.source_blocks(source))
+            # 源文件边解码边解析，解码耗时发生在解析过程中，从解析阶段移到读取阶段
+            move_stage_time(metrics, 'parse', 'read', source.read_time)
+            return self._render_document(blocks, source.title, guard, metrics)
+
+        except Exception as e:
+            self.logger.error(f"处理文件 {md_file.name} 时出错: {e}")
+            return None, "未命名文档"
+
+    def _build_document(self, content: str, metrics: Optional[dict] = None,
+                        base_dir: Optional[Path] = None) -> Tuple[Document, str]:
+        """解析内容并渲染为Word文档，返回 (文档, 标题)"""
+        guard = MemoryGuard(self.memory.limit)
+        with stage_timer(metrics, 'parse'):
+            title = extract_title(io.StringIO(content))
+            blocks = list(self._resolve_images(parse(content), base_dir))
+        return self._render_document(blocks, title, guard, metrics)
+
+    def _render_document(self, blocks: List[Block], title: str, guard: MemoryGuard,
+                         metrics: Optional[dict] = None) -> Tuple[Document, str]:
+        guard.check()
+        self.logger.info(f"文档标题: {title}")
+        if metrics is not None:
+            metrics['blocks'] = count_blocks(blocks)
+
+        # 渲染为Word文档（标题在内容中处理）
+        with stage_timer(metrics, 'render'):
+            doc = self.render(guard.wrap(blocks))
+        return doc, title
+
+    def convert_text(self, source: Union[str, TextIO], output: Optional[BinaryIO] = None,
+                     metrics: Optional[dict] = None, base_dir: Optional[Path] = None) -> Tuple[Optional[bytes], str]:
+        """
+        在内存中转换Markdown文本，不读写磁盘文件（给出 base_dir 时只读取引用的图片）
+
+        Args:
+            source: Markdown文本，或可读取文本的文件对象
+            output: 可选，docx直接写入该二进制文件对象（如 BytesIO、HTTP响应流）
+            metrics: 可选，记录各阶段耗时和块数（同 convert）
+            base_dir: 可选，图片路径相对的目录；默认不读取任何图片文件，图片输出为替代文字
+
+        Returns:
+            Tuple[bytes, str]: (docx内容，写入 output 时为None, 标题)
+
+        Raises:
+            Exception: 解析、渲染或写入失败时直接抛出（与 convert 不同，不吞掉异常）
+        """
+        if not isinstance(source, str):
+            with stage_timer(metrics, 'read'):
+                source = source.read()
+
+        buffer = io.BytesIO() if output is None else output
+        if self.stream:
+            title = extract_title(io.StringIO(source))
+            blocks = self._resolve_images(iter_blocks(io.StringIO(source)), base_dir)
+            self._stream_blocks(blocks, buffer, metrics, images=base_dir is not None and '![' in source)
+        else:
+            doc, title = self._build_document(source, metrics, base_dir)
+            self.save(doc, buffer, metrics)
+        return (buffer.getvalue() if output is None else None), title
+
+    def convert_bytes(self, source: Union[bytes, BinaryIO], output: Optional[BinaryIO] = None,
+                      metrics: Optional[dict] = None, encoding: str = 'utf-8-sig',
+                      base_dir: Optional[Path] = None) -> Tuple[Optional[bytes], str]:
+        """
+        在内存中转换Markdown字节内容（参数与返回值同 convert_text）
+
+        Args:
+            source: Markdown字节内容，或可读取字节的文件对象
+            encoding: 文本编码（默认UTF-8，自动去除BOM）
 
-            doc = Document()
-            title = extract_title_from_md(md_file)
-            self.logger.info(f"文档标题: {title}")
+        Raises:
+            UnicodeDecodeError: 内容不符合指定编码
+        """
+        if not isinstance(source, (bytes, bytearray, memoryview)):
+            with stage_timer(metrics, 'read'):
+                source = source.read()
+        return self.convert_text(bytes(source).decode(encoding), output, metrics, base_dir)
 
-            # 设置页面格式
-            self._setup_page_layout(doc)
+    def convert_many(self, sources: Iterable[Union[Path, str, bytes, TextIO, BinaryIO]],
+                     metrics: bool = False) -> Iterator[ConversionResult]:
+        """
+        逐个转换，每完成一个就产出结果
 
-            # 解析并转换内容（标题在内容中处理）
-            self._parse_content(doc, content)
+        输入按需取出、结果逐个产出，调用方处理完即可释放，内存占用与数量无关。
+        单个文档失败不会中断后续转换，错误记录在结果的 error 字段中。
 
-            return doc, title
+        Args:
+            sources: Path（读取文件，编码设置和图片路径同 convert）、str（Markdown文本）、bytes 或文件对象
+            metrics: 是否在结果中附带指标
+
+        Yields:
+            ConversionResult: 转换结果，顺序与输入一致
+        """
+        for source in sources:
+            record = {} if metrics else None
+            try:
+                if isinstance(source, Path):
+                    # 与 convert 相同经 SourceFile 解码（遵循后备编码设置），整个文件解码成功后才开始转换
+                    with stage_timer(record, 'read'):
+                        text = '\n'.join(self.open_source(source))
+                    data, title = self.convert_text(text, metrics=record, base_dir=source.parent)
+                elif isinstance(source, (str, io.TextIOBase)):
+                    data, title = self.convert_text(source, metrics=record)
+                else:
+                    data, title = self.convert_bytes(source, metrics=record)
+                yield ConversionResult(source, title, data, None, record)
+            except Exception as e:
+                self.logger.error(f"转换失败: {e}")
+                yield ConversionResult(source, '未命名文档', None, e, record)
+
+    @property
+    def template(self) -> DocumentTemplate:
+        """基础文档模板（首次使用时构建）"""
+        if self._template is None:
+            self._template = DocumentTemplate(self.config, self.template_path)
+        return self._template
+
+    def convert_streaming(self, md_file: Path, output_dir: Path,
+                          metrics: Optional[dict] = None) -> Optional[Path]:
+        """
+        以流式方式转换Markdown文件，直接写出docx
+
+        逐行读取、逐块写入，不构建python-docx对象模型，适合超大文档。
+
+        Args:
+            md_file: Markdown文件路径
+            output_dir: 输出目录
+            metrics: 可选，记录耗时（读取、解析和写入交错进行，合计为 stages.stream）和块数
+
+        Returns:
+            Path: 生成的docx路径，失败时为None
+        """
+        try:
+            self.logger.info(f"开始处理: {md_file.name}")
+
+            # 标题在写入过程中才读到：先写入临时文件，完成后按标题命名
+            source = self.open_source(md_file)
+            tmp_path = temp_path(output_dir / f"{md_file.stem}.docx")
+            try:
+                # 直接写入打开的临时文件（传路径时写入器会再套一层临时文件），完成后同步到磁盘再按标题命名
+                with open(tmp_path, 'wb') as output:
+                    self._stream_blocks(self.source_blocks(source), output, metrics, images=source.contains(b'!['))
+                self.logger.info(f"文档标题: {source.title}")
+                output_path = output_dir / f"{source.title}.docx"
+                durable_replace(tmp_path, output_path, self.save_options.sync)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            return output_path
 
         except Exception as e:
             self.logger.error(f"处理文件 {md_file.name} 时出错: {e}")
-            return None, "未命名文档"
+            return None
+
+    def open_source(self, md_file: Path) -> SourceFile:
+        """按转换器的编码设置打开源文件（惰性读取，迭代时才映射和解码）"""
+        return SourceFile(md_file, self.encoding_fallback)
+
+    def source_blocks(self, source: SourceFile) -> Iterator[Block]:
+        """惰性解析源文件的块，图片路径相对源文件所在目录（开始新文档，引用的图片记入 image_sources）"""
+        self.image_sources = []
+        return self._resolve_images(iter_blocks(source), source.path.parent, self.image_sources)
+
+    def _resolve_images(self, blocks: Iterable[Block], base_dir: Optional[Path],
+                        used: Optional[list] = None) -> Iterator[Block]:
+        if self._image_processor is not None:
+            self._image_processor.reset()  # 图片文件可能在两次转换之间被修改
+        return resolve_images(blocks, base_dir, used)
+
+    @property
+    def image_processor(self) -> ImageProcessor:
+        """图片处理器（首次使用时创建，在多个文件之间共用处理结果）"""
+        if self._image_processor is None:
+            self._image_processor = ImageProcessor(block_width(self.template.document), self.image_options,
+                                                   self.logger)
+        return self._image_processor
+
+    def save(self, doc: Document, target, metrics: Optional[dict] = None) -> str:
+        """
+        按保存选项写出文档
+
+        Args:
+            doc: Word文档对象
+            target: 输出路径或可写的二进制文件对象
+            metrics: 可选，记录耗时（stages.save）
+
+        Returns:
+            str: 写入内容的哈希（SHA-256），可用于判断输出是否变化
+        """
+        with stage_timer(metrics, 'save'):
+            return save_document(doc, target, self.save_options)
+
+    def write_blocks(self, blocks: Iterable[Block], target, metrics: Optional[dict] = None) -> Optional[str]:
+        """把块写为docx（target 为路径或二进制文件对象；流式模式下不构建对象模型）
+
+        Returns:
+            str: 写入内容的哈希；流式写入到文件对象时为None
+        """
+        if self.stream:
+            # 惰性迭代器无法预先检查，视为可能含有图片
+            images = any(block.kind == 'image' for block in blocks) if isinstance(blocks, list) else True
+            self._stream_blocks(blocks, target, metrics, images)
+            return file_hash(target) if isinstance(target, (str, Path)) else None
+        with stage_timer(metrics, 'render'):
+            doc = self.render(MemoryGuard(self.memory.limit).wrap(blocks))
+        return self.save(doc, target, metrics)
+
+    def _stream_blocks(self, blocks: Iterable[Block], target, metrics: Optional[dict] = None, images: bool = False):
+        """流式写入块；images 为 False 时不嵌入图片（图片输出为替代文字，压缩包条目顺序与不含图片时相同）"""
+        from .writer import StreamingDocxWriter
+
+        if self._writer is None:
+            with stage_timer(metrics, 'template'):
+                self._writer = StreamingDocxWriter(self.template, self.save_options)
+
+        with stage_timer(metrics, 'stream'):
+            blocks = MemoryGuard(self.memory.limit).wrap(blocks)
+            if metrics is not None:
+                counts = metrics['blocks'] = {}
+                blocks = _counting(blocks, counts)
+            processor = None
+            if images:
+                processor = self.image_processor
+                blocks = processor.prefetch(blocks)
+            self._writer.write(blocks, target, processor)
+
+    def new_document(self) -> Document:
+        """创建已设置页面布局和样式的空白文档（从模板克隆）"""
+        template = self.template
+        self._style_ids = template.style_ids
+        self._table_style_id = template.table_style_id
+        return template.new_document()
+
+    def render(self, blocks: Iterable[Block], doc: Optional[Document] = None) -> Document:
+        """把块渲染为Word文档
+
+        Args:
+            blocks: parse() 产生的块（可以是惰性迭代器）
+            doc: 追加到的文档，需由 new_document() 创建；默认新建文档
+
+        Returns:
+            Document: Word文档对象
+        """
+        if doc is None:
+            doc = self.new_document()
+        renderers = self._renderers
+        # 图片在后台线程中处理，渲染到图片时结果通常已经就绪
+        blocks = self.image_processor.prefetch(blocks)
+        for block in blocks:
+            renderers[block.kind](doc, block)
+        return doc
 
     def _setup_page_layout(self, doc: Document):
-        """设置页面布局"""
-        for section in doc.sections:
-            set_page_margins(section)
+        """设置页面布局和文档样式（用于不是由 new_document() 创建的文档）"""
+        self._style_ids, self._table_style_id = setup_document(doc, self.config)
 
     def _parse_content(self, doc: Document, content: str):
         """解析Markdown内容并添加到文档"""
-        lines = content.split('\n')
-        in_code_block = False
-        i = 0
-
-        while i < len(lines):
-            line = lines[i].rstrip()
-
-            # 跳过代码块
-            if line.strip().startswith('```'):
-                in_code_block = not in_code_block
-                i += 1
-                continue
-            if in_code_block:
-                i += 1
-                continue
-
-            # 跳过空行
-            if not line:
-                i += 1
-                continue
-
-            # 检测表格（以|开头且包含|）
-            if self._is_table_line(line):
-                # 收集整个表格
-                table_lines = []
-                while i < len(lines) and self._is_table_line(lines[i].rstrip()):
-                    table_lines.append(lines[i].rstrip())
-                    i += 1
-                self._process_table(doc, table_lines)
-                continue
-
-            # 处理各种Markdown元素
-            if line.startswith('# ') and not line.startswith('## '):
-                self._process_document_title(doc, line)  # 文档主标题 (#)
-            elif line.startswith('## ') and not line.startswith('### '):
-                self._process_heading1(doc, line)  # 一级标题 (##)
-            elif line.startswith('### ') and not line.startswith('#### '):
-                self._process_heading2(doc, line)  # 二级标题 (###)
-            elif line.startswith('#### '):
-                self._process_heading3(doc, line)  # 三级标题 (####)
-            elif line.strip().startswith('>'):
-                self._process_quote(doc, line)
-            elif line.strip().startswith('---') or line.strip().startswith('***'):
-                self._process_separator(doc)
-            elif self._is_list_item(line):
-                self._process_list_item(doc, line)
-            else:
-                self._process_paragraph(doc, line)
-
-            i += 1
-
-    def _is_table_line(self, line: str) -> bool:
-        """判断是否是表格行"""
-        return '|' in line and (line.startswith('|') or line.strip().startswith('|'))
-
-    def _process_table(self, doc: Document, table_lines: List[str]):
-        """处理Markdown表格"""
-        if not table_lines:
-            return
-
-        # 过滤掉分隔行并解析数据
-        table_data = []
-        for line in table_lines:
-            if '---' in line:
-                continue
-            # 移除首尾的|，然后按|分割
-            line = line.strip()
-            if line.startswith('|'):
-                line = line[1:]
-            if line.endswith('|'):
-                line = line[:-1]
-            cells = [cell.strip() for cell in line.split('|')]
-            if cells:
-                table_data.append(cells)
+        self.render(parse(content), doc)
 
+    def _process_table(self, doc: Document, block: Table):
+        """处理Markdown表格（列数取第一行，较短的行补空单元格，较长的行截断）"""
+        table_data = block.rows
         if not table_data:
             return
 
-        # 创建Word表格
-        table = doc.add_table(rows=len(table_data), cols=len(table_data[0]))
-        table.style = 'Table Grid'
-        font_config = self.config.get_font('body')
-
-        # 填充表格数据
-        for i, row_data in enumerate(table_data):
-            for j, cell_text in enumerate(row_data):
-                if j < len(table.rows[i].cells):
-                    cell = table.rows[i].cells[j]
-                    para = cell.paragraphs[0]
-                    para.clear()
-
-                    # 清理Markdown格式标记
-                    cell_text = parse_inline_formatting(cell_text)
-                    run = para.add_run(cell_text)
-                    set_run_format(run, font_config)
-
-                    set_paragraph_spacing(para, line_spacing=self.config.PARAGRAPH.line_spacing)
-                    para.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+        # 一次生成整个 w:tbl 再插入正文，避免逐单元格访问 python-docx 对象（其代价随行数平方增长）
+        xml = table_xml(table_data, block_width(doc), self._table_style_id, self._style_ids['table'],
+                        declare_namespace=True)
+        doc.element.body._insert_tbl(parse_xml(xml))
 
-    def _process_document_title(self, doc: Document, line: str):
+    def _process_document_title(self, doc: Document, block: Title):
         """处理文档主标题 (#)"""
-        title_text = line[1:].strip()  # 移除一个 # 字符
-        # 清理Markdown格式标记
-        title_text = parse_inline_formatting(title_text)
-
         # 使用普通段落而不是heading，避免自动添加下划线
-        p = doc.add_paragraph(title_text)
-        p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-
-        font_config = self.config.get_font('title')
-        for run in p.runs:
-            set_font(run, font_config.name, font_config.size, font_config.bold)
-
-        set_paragraph_spacing(
-            p,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-
-        # 移除标题边框和小黑点
-        remove_paragraph_border(p)
-
-    def _process_heading1(self, doc: Document, line: str):
-        """处理一级标题 (##)"""
-        heading_text = line[2:].strip()  # 移除 ## 字符
-        # 清理Markdown格式标记
-        heading_text = parse_inline_formatting(heading_text)
-        heading = doc.add_heading(heading_text, level=1)
-        heading.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT  # 一级标题左对齐
-
-        font_config = self.config.get_font('heading1')
-        for run in heading.runs:
-            set_font(run, font_config.name, font_config.size, font_config.bold)
-
-        set_paragraph_spacing(
-            heading,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-
-        # 移除标题边框和小黑点
-        remove_paragraph_border(heading)
-
-    def _process_heading2(self, doc: Document, line: str):
-        """处理二级标题 (###)"""
-        heading_text = line[3:].strip()  # 移除 ### 字符
-        # 清理Markdown格式标记
-        heading_text = parse_inline_formatting(heading_text)
-        heading = doc.add_heading(heading_text, level=2)
-        heading.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-        font_config = self.config.get_font('heading2')
-        for run in heading.runs:
-            set_font(run, font_config.name, font_config.size, font_config.bold)
-
-        set_paragraph_spacing(
-            heading,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-
-        # 移除标题边框和小黑点
-        remove_paragraph_border(heading)
-
-    def _process_heading3(self, doc: Document, line: str):
-        """处理三级标题 (####)"""
-        heading_text = line[4:].strip()  # 移除 #### 字符
-        # 清理Markdown格式标记
-        heading_text = parse_inline_formatting(heading_text)
-        heading = doc.add_heading(heading_text, level=3)
-        heading.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
-        font_config = self.config.get_font('heading3')
-        for run in heading.runs:
-            set_font(run, font_config.name, font_config.size, font_config.bold)
-
-        set_paragraph_spacing(
-            heading,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-
-        # 移除标题边框和小黑点
-        remove_paragraph_border(heading)
-
-    def _process_quote(self, doc: Document, line: str):
+        add_styled_paragraph(doc, block.text, self._style_ids[block_style_key(block)])
+
+    def _process_heading(self, doc: Document, block: Heading):
+        """处理一至三级标题 (## / ### / ####)"""
+        add_styled_paragraph(doc, block.text, self._style_ids[block_style_key(block)])
+
+    def _process_quote(self, doc: Document, block: Quote):
         """处理引用块"""
-        quote_text = line.strip()[1:].strip()
-        # 清理Markdown格式标记
-        quote_text = parse_inline_formatting(quote_text)
-        p = doc.add_paragraph(quote_text)
-
-        # 设置段间距（包括段前段后0pt）
-        set_paragraph_spacing(
-            p,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-        set_first_line_indent_chars(p, self.config.PARAGRAPH.first_line_indent_chars)
-        p.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-
-        font_config = self.config.get_font('quote')
-        for run in p.runs:
-            set_run_format(run, font_config)
-
-    def _process_separator(self, doc: Document):
+        add_styled_paragraph(doc, block.text, self._style_ids[block_style_key(block)])
+
+    def _process_separator(self, doc: Document, block: Separator):
         """处理分隔线"""
-        p = doc.add_paragraph('_' * 50)
-        set_paragraph_spacing(p, line_spacing=self.config.PARAGRAPH.line_spacing)
+        add_styled_paragraph(doc, SEPARATOR_TEXT, self._style_ids[block_style_key(block)])
 
-    def _is_list_item(self, line: str) -> bool:
-        """判断是否是列表项"""
-        return (line.strip().startswith(('* ', '- ', '• ', '+ ')) or
-                re.match(r'^\s*\d+[\.\)]\s', line))
+    def _process_code_block(self, doc: Document, block: CodeBlock):
+        """代码块不输出到公文中"""
 
-    def _process_list_item(self, doc: Document, line: str):
-        """处理列表项"""
-        list_content = normalize_list_symbol(line.strip())
-        # 清理Markdown格式标记
-        list_content = parse_inline_formatting(list_content)
-        p = doc.add_paragraph(list_content)
-
-        # 设置段间距（包括段前段后0pt）
-        set_paragraph_spacing(
-            p,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-        set_first_line_indent_chars(p, self.config.PARAGRAPH.first_line_indent_chars)
-        p.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-
-        # 统一设置字体格式
-        font_config = self.config.get_font('body')
-        for run in p.runs:
-            set_run_format(run, font_config)
-
-    def _process_paragraph(self, doc: Document, line: str):
-        """处理普通段落"""
-        # 去除首尾空格
-        line = line.strip()
-        # 清理Markdown格式标记
-        line = parse_inline_formatting(line)
-
-        p = doc.add_paragraph(line)
-
-        # 设置段间距（包括段前段后0pt）
-        set_paragraph_spacing(
-            p,
-            space_before=self.config.PARAGRAPH.space_before_title,
-            space_after=self.config.PARAGRAPH.space_after_title,
-            line_spacing=self.config.PARAGRAPH.line_spacing
-        )
-
-        # 检查是否是落款或日期
-        if is_signature_line(line):
-            p.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-            # 落款不缩进
-            pPr = p._element.get_or_add_pPr()
-            indent = OxmlElement('w:ind')
-            indent.set(qn('w:firstLine'), '0')
-            pPr.append(indent)
+    def _process_break(self, doc: Document, block: Break):
+        """插入分页符或分节符（分节时沿用文档的页面设置）"""
+        if block.section:
+            xml = section_break_xml(sect_pr_xml(doc), declare_namespace=True)
         else:
-            set_first_line_indent_chars(p, self.config.PARAGRAPH.first_line_indent_chars)
-            p.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
+            xml = page_break_xml(declare_namespace=True)
+        doc.element.body._insert_p(parse_xml(xml))
+
+    def _process_image(self, doc: Document, block: Image):
+        """嵌入图片（按正文宽度等比缩小；无法读取时输出替代文字）"""
+        image = self.image_processor.get(block.path)
+        if image is None:
+            self._process_paragraph(doc, placeholder(block))
+            return
+        rid, _ = doc.part.get_or_add_image(io.BytesIO(image.data))  # 相同内容的图片只存一份
+        cx, cy = image.fit(block_width(doc))
+        xml = image_xml(rid, doc.part.next_id, cx, cy, Path(block.path).name, block.alt, declare_namespace=True)
+        doc.element.body._insert_p(parse_xml(xml))
+
+    def _process_list_item(self, doc: Document, block: ListItem):
+        """处理列表项"""
+        add_styled_paragraph(doc, block.text, self._style_ids[block_style_key(block)])
+
+    def _process_signature(self, doc: Document, block: Signature):
+        """处理落款或日期（右对齐、不缩进）"""
+        add_styled_paragraph(doc, block.text, self._style_ids[block_style_key(block)])
 
-        # 统一设置字体格式
-        font_config = self.config.get_font('body')
-        for run in p.runs:
-            set_run_format(run, font_config)
+    def _process_paragraph(self, doc: Document, block: Paragraph):
+        """处理普通段落（两端对齐、首行缩进）"""
+        add_styled_paragraph(doc, block.text, self._style_ids[block_style_key(block)])
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+输入发现 - 基于 os.scandir 流式遍历输入目录，按包含/排除模式筛选Markdown文件
+
+iter_sources() 是生成器：每读完一个目录就产出其中的文件，调用方可以在遍历尚未结束时
+开始转换；任何时候只有当前目录的条目和待访问目录的栈驻留内存，适合数十万文件的目录树。
+
+模式使用 fnmatch 语法：含 '/' 的模式匹配相对输入目录的路径（'*' 可跨越目录层级），
+否则只匹配文件名或目录名。排除模式匹配到的目录整体跳过。
+"""
+
+import os
+import fnmatch
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+
+
+def is_markdown_name(name: str) -> bool:
+    """是否为需要转换的Markdown文件名（忽略隐藏文件和编辑器临时文件）"""
+    return name.lower().endswith(MARKDOWN_SUFFIXES) and not name.startswith(('.', '~'))
+
+
+def matches(rel_path: str, patterns: Sequence[str]) -> bool:
+    """相对路径（posix格式）是否匹配任一模式"""
+    name = rel_path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(rel_path if '/' in pattern else name, pattern) for pattern in patterns)
+
+
+def accepts(rel_path: str, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> bool:
+    """相对路径是否为通过包含/排除模式的Markdown文件（所在目录是否被排除由遍历负责）"""
+    if not is_markdown_name(rel_path.rsplit('/', 1)[-1]):
+        return False
+    if include and not matches(rel_path, include):
+        return False
+    return not (exclude and matches(rel_path, exclude))
+
+
+def skip_set(skip_dirs: Iterable[Path]) -> Set[str]:
+    """不进入的目录（规范化的绝对路径，供 enters_directory 使用）"""
+    return {os.path.normcase(os.path.abspath(d)) for d in skip_dirs}
+
+
+def enters_directory(rel_path: str, path: Union[str, Path], exclude: Sequence[str] = (),
+                     skip: Set[str] = frozenset()) -> bool:
+    """递归时是否进入该目录：隐藏目录、被排除的目录和 skip 中的目录不进入"""
+    return (not rel_path.rsplit('/', 1)[-1].startswith('.') and not matches(rel_path, exclude)
+            and os.path.normcase(os.path.abspath(path)) not in skip)
+
+
+def _walk(root: Path, recursive: bool, exclude: Sequence[str], skip: Set[str], logger: logging.Logger,
+          prefix: str = '') -> Iterator[Tuple[Path, str, List[os.DirEntry]]]:
+    """按目录产出 (目录, 相对输入目录的前缀, 目录中的文件条目)，读完一个目录就产出"""
+    stack = [(root, prefix)]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            if directory == root:
+                raise
+            logger.warning(f"无法读取目录 {directory}: {e}")
+            continue
+
+        files = []
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    rel_path = prefix + entry.name
+                    if recursive and enters_directory(rel_path, entry.path, exclude, skip):
+                        subdirs.append((Path(entry.path), rel_path + '/'))
+                elif is_markdown_name(entry.name) and entry.is_file():
+                    files.append(entry)
+            except OSError:
+                continue
+        yield directory, prefix, files
+        stack.extend(reversed(subdirs))
+
+
+def iter_sources(root: Path, recursive: bool = False, include: Sequence[str] = (),
+                 exclude: Sequence[str] = (), skip_dirs: Iterable[Path] = (),
+                 logger: Optional[logging.Logger] = None) -> Iterator[Path]:
+    """
+    遍历输入目录中的Markdown文件
+
+    同一目录内按名称排序，先产出文件再进入子目录；隐藏目录和指向目录的符号链接不进入。
+
+    Args:
+        root: 输入目录
+        recursive: 是否进入子目录
+        include: 包含模式（为空时包含全部Markdown文件）
+        exclude: 排除模式（文件或目录）
+        skip_dirs: 不进入的目录（如位于输入目录中的输出目录）
+        logger: 日志记录器（无法读取的目录记录警告后跳过）
+
+    Yields:
+        Path: root 下的Markdown文件路径
+    """
+    logger = logger or logging.getLogger(__name__)
+    for _, prefix, files in _walk(root, recursive, exclude, skip_set(skip_dirs), logger):
+        for entry in files:
+            if accepts(prefix + entry.name, include, exclude):
+                yield Path(entry.path)
+
+
+def iter_directories(root: Path, exclude: Sequence[str] = (), skip_dirs: Iterable[Path] = (),
+                     prefix: str = '', logger: Optional[logging.Logger] = None) -> Iterator[Tuple[Path, str]]:
+    """
+    遍历递归转换会进入的目录（含 root 本身），用于监视整个目录树
+
+    Args:
+        root: 起始目录
+        exclude: 排除模式
+        skip_dirs: 不进入的目录
+        prefix: root 相对输入目录的前缀（'' 或以 '/' 结尾），排除模式按相对输入目录的路径匹配
+        logger: 日志记录器
+
+    Yields:
+        Tuple[Path, str]: (目录, 相对输入目录的前缀)
+    """
+    logger = logger or logging.getLogger(__name__)
+    for directory, prefix, _ in _walk(root, True, exclude, skip_set(skip_dirs), logger, prefix):
+        yield directory, prefix
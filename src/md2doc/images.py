@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+图片处理 - 读取、测量并按需缩小Markdown中引用的图片，按内容哈希缓存处理结果
+
+图片在线程池中处理（解码和缩放主要在 Pillow 的C代码中进行，会释放GIL），渲染时按需取结果；
+同一份图片内容只处理一次：进程内缓存处理中和已完成的结果，设置缓存目录时处理结果另存到磁盘，
+供后续文件、其他工作进程和以后的运行复用。
+
+缩小和重新压缩需要安装 Pillow（可选依赖）；未安装时图片原样嵌入，只测量尺寸。
+缩小时按适应正文宽度后的显示尺寸计算像素数，并相应设置图片的DPI，文档中显示的尺寸不变。
+"""
+
+import io
+import os
+import hashlib
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from .parser import Block, Image, Paragraph
+
+# 输出目录中图片处理结果的缓存目录
+IMAGE_CACHE_DIR = '.md2doc-images'
+
+# 进程内最多缓存的图片数（报告中反复出现的通常只是少量徽标和图表）
+MEMORY_CACHE_SIZE = 128
+
+# 流式写入时提前提交处理的块数
+PREFETCH_WINDOW = 64
+
+# 可以缩小并保持DPI信息的格式（Pillow 格式名）
+_RESIZABLE_FORMATS = {'png': 'PNG', 'jpg': 'JPEG'}
+
+
+class ImageOptions(NamedTuple):
+    """图片处理选项"""
+    dpi: Optional[int] = None  # 按显示尺寸缩小到不超过该分辨率（需要 Pillow），None 表示不缩小
+    quality: int = 85  # 缩小后重新压缩JPEG的质量
+    cache_dir: Optional[Path] = None  # 处理结果的磁盘缓存目录
+    jobs: Optional[int] = None  # 处理线程数（默认: CPU核心数）
+
+
+class ProcessedImage(NamedTuple):
+    """处理后的图片"""
+    data: bytes
+    ext: str  # 扩展名（png、jpg 等，见 python-docx）
+    content_type: str
+    width: int  # 原始显示宽度（EMU，按图片的DPI计算）
+    height: int
+    digest: str  # data 的 SHA-256
+
+    def fit(self, max_width: int) -> Tuple[int, int]:
+        """缩放到不超过 max_width 的显示尺寸（EMU，保持宽高比）"""
+        if self.width <= max_width or not self.width:
+            return self.width, self.height
+        return max_width, round(self.height * max_width / self.width)
+
+
+def measure(data: bytes) -> ProcessedImage:
+    """测量图片（python-docx 读取文件头，支持 PNG、JPEG、GIF、BMP、TIFF）
+
+    Raises:
+        docx.image.exceptions.UnrecognizedImageError: 不支持的图片格式
+    """
+    from docx.image.image import Image as DocxImage  # 命令行启动时只需要 ImageOptions，不加载 python-docx
+
+    image = DocxImage.from_blob(data)
+    return ProcessedImage(data, image.ext, image.content_type, int(image.width), int(image.height),
+                          hashlib.sha256(data).hexdigest())
+
+
+def downscale(data: bytes, image: ProcessedImage, max_width: int, options: ImageOptions) -> bytes:
+    """按显示宽度把图片缩小到 options.dpi，并把图片的DPI设为 options.dpi，显示尺寸不变
+
+    未安装 Pillow、格式不支持、无需缩小或缩小后反而更大时返回原数据。
+    """
+    fmt = _RESIZABLE_FORMATS.get(image.ext)
+    if not options.dpi or fmt is None:
+        return data
+    try:
+        from PIL import Image as PILImage
+    except ImportError:
+        return data
+
+    with PILImage.open(io.BytesIO(data)) as im:
+        display_width = min(image.width, max_width)
+        target = max(1, round(display_width / 914400 * options.dpi))
+        if target >= im.width:
+            return data
+        height = max(1, round(im.height * target / im.width))
+        dpi = (options.dpi, options.dpi)  # JPEG 只能记录整数DPI
+        resized = im.resize((target, height), PILImage.LANCZOS)
+        buffer = io.BytesIO()
+        if fmt == 'JPEG':
+            resized.save(buffer, fmt, quality=options.quality, optimize=True, dpi=dpi)
+        else:
+            resized.save(buffer, fmt, optimize=True, dpi=dpi)
+    result = buffer.getvalue()
+    return result if len(result) < len(data) else data
+
+
+def process_image(data: bytes, max_width: int, options: ImageOptions) -> ProcessedImage:
+    """测量并按需缩小一张图片"""
+    original = measure(data)
+    processed = downscale(data, original, max_width, options)
+    return original if processed is data else measure(processed)
+
+
+def placeholder(block: Image) -> Paragraph:
+    """图片无法嵌入时代替图片输出的段落（替代文字，没有时为文件名）"""
+    return Paragraph(block.alt or Path(block.path).name)
+
+
+def resolve_images(blocks: Iterable[Block], base_dir: Optional[Path], used: Optional[list] = None) -> Iterator[Block]:
+    """把图片块的路径解析为相对源文件所在目录的路径
+
+    Args:
+        blocks: 块
+        base_dir: 源文件所在目录；None 表示内容不来自文件（如 HTTP 请求），
+                  不读取任何本地图片，图片块替换为 placeholder() 段落
+        used: 可选，追加引用的图片路径（用于增量缓存的依赖检查）
+    """
+    for block in blocks:
+        if block.kind == 'image':
+            if base_dir is None:
+                yield placeholder(block)
+                continue
+            path = base_dir / block.path
+            block = Image(block.alt, str(path))
+            if used is not None:
+                used.append(path)
+        yield block
+
+
+class ImageProcessor:
+    """图片处理器（每个转换器一个，在多个文件之间共用）
+
+    Args:
+        max_width: 正文区域宽度（EMU），图片显示宽度不超过该值
+        options: 处理选项
+        logger: 日志记录器
+    """
+
+    def __init__(self, max_width: int, options: ImageOptions = ImageOptions(),
+                 logger: Optional[logging.Logger] = None):
+        self.max_width = max_width
+        self.options = options
+        self.logger = logger or logging.getLogger(__name__)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._by_content: Dict[str, Future] = {}  # 内容哈希 -> 处理结果
+        self._pending: Dict[str, Future] = {}  # 当前文档中已提交的路径
+        self.processed = 0  # 实际处理（未命中缓存）的图片数
+        option_key = repr((max_width, options.dpi, options.quality if options.dpi else None))
+        self._option_key = option_key.encode('utf-8')
+
+    def submit(self, path: str) -> Future:
+        """提交处理（同一路径在 reset() 之前只提交一次）"""
+        future = self._pending.get(path)
+        if future is None:
+            if self._pool is None:
+                jobs = self.options.jobs or os.cpu_count() or 1
+                self._pool = ThreadPoolExecutor(jobs, thread_name_prefix='md2doc-image')
+            future = self._pool.submit(self._load, path)
+            self._pending[path] = future
+        return future
+
+    def get(self, path: str) -> Optional[ProcessedImage]:
+        """取得处理结果；图片不存在或无法识别时记录警告并返回None"""
+        try:
+            return self.submit(path).result()
+        except Exception as e:
+            self.logger.warning(f"  图片无法嵌入: {path} - {e}")
+            return None
+
+    def prefetch(self, blocks: Iterable[Block], window: int = PREFETCH_WINDOW) -> Iterator[Block]:
+        """提前提交前方 window 个块中的图片，渲染到图片时结果通常已经就绪"""
+        if isinstance(blocks, (list, tuple)):
+            for block in blocks:
+                if block.kind == 'image':
+                    self.submit(block.path)
+            yield from blocks
+            return
+        ahead = deque()
+        for block in blocks:
+            if block.kind == 'image':
+                self.submit(block.path)
+            ahead.append(block)
+            if len(ahead) > window:
+                yield ahead.popleft()
+        yield from ahead
+
+    def reset(self):
+        """开始新文档：图片文件可能已修改，按路径提交的记录作废（内容缓存保留）"""
+        self._pending = {}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _load(self, path: str) -> ProcessedImage:
+        with open(path, 'rb') as f:
+            data = f.read()
+        key = hashlib.sha256(self._option_key + b'\0' + data).hexdigest()
+
+        # 相同内容只处理一次：其他线程正在处理时等待其结果
+        with self._lock:
+            future = self._by_content.get(key)
+            owner = future is None
+            if owner:
+                future = self._by_content[key] = Future()
+                while len(self._by_content) > MEMORY_CACHE_SIZE:
+                    self._by_content.pop(next(iter(self._by_content)))
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._load_cached(key) or self._process(key, data)
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                if self._by_content.get(key) is future:
+                    del self._by_content[key]
+            raise
+        future.set_result(result)
+        return result
+
+    def _load_cached(self, key: str) -> Optional[ProcessedImage]:
+        cache_dir = self.options.cache_dir
+        if cache_dir is None:
+            return None
+        try:
+            return measure((cache_dir / key).read_bytes())
+        except Exception:
+            return None  # 不存在或已损坏，重新处理
+
+    def _process(self, key: str, data: bytes) -> ProcessedImage:
+        result = process_image(data, self.max_width, self.options)
+        with self._lock:
+            self.processed += 1
+        cache_dir = self.options.cache_dir
+        # 只缓存缩小后的结果：原样嵌入的图片只需读取文件头，重新测量比读取缓存更快
+        if cache_dir is not None and result.data is not data:
+            # 多个工作进程可能同时写入同一图片：先写临时文件再替换
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+                tmp_path.write_bytes(result.data)
+                os.replace(tmp_path, cache_dir / key)
+            except OSError as e:
+                self.logger.debug(f"  图片缓存写入失败: {e}")
+        return result
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+运行日志 - 批量转换的只追加日志，进程崩溃或被终止后用 --resume 继续
+
+每处理一个文件追加一行JSON：开始时写 start，完成时写 done（含输出文件和内容哈希）或 failed。
+缓存清单只在运行结束时保存，运行日志则逐行写入，因此即使进程被强制终止（内存不足、重启），
+已完成的文件也有记录。最后一行可能写了一半，读取时忽略无法解析的行。运行正常结束后删除日志。
+
+日志格式::
+
+    {"event": "start", "file": "a/b.md"}
+    {"event": "done", "file": "a/b.md", "hash": "...", "fingerprint": "...", "outputs": ["a/标题.docx"], ...}
+    {"event": "failed", "file": "c.md"}
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .save import file_hash
+
+JOURNAL_NAME = '.md2doc-journal.jsonl'
+
+
+def journal_name(shard: Optional[Tuple[int, int]] = None) -> str:
+    """运行日志文件名（分片时带编号）"""
+    return f".md2doc-journal-{shard[0]}-of-{shard[1]}.jsonl" if shard else JOURNAL_NAME
+
+
+def outputs_intact(output_dir: Path, record: dict) -> bool:
+    """完成记录中的输出是否都完好：记录了内容哈希的输出（docx）须哈希一致，其余（如PDF）须存在且非空"""
+    hashes = record.get('output_hashes') or {}
+    for name in record.get('outputs') or []:
+        path = output_dir / name
+        try:
+            if name in hashes:
+                if file_hash(path) != hashes[name]:
+                    return False
+            elif not path.stat().st_size:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+class JournalState(NamedTuple):
+    """从运行日志恢复的状态"""
+    completed: Dict[str, dict]  # 已完成的文件 -> done 记录
+    in_flight: List[str]  # 已开始但未完成的文件（上次运行中断时正在转换）
+    failed: List[str]  # 上次转换失败的文件
+
+
+class BuildJournal:
+    """输出目录中的只追加运行日志
+
+    Args:
+        output_dir: 输出目录（日志文件所在位置）
+        name: 日志文件名
+        logger: 日志记录器
+    """
+
+    def __init__(self, output_dir: Path, name: str = JOURNAL_NAME, logger: Optional[logging.Logger] = None):
+        self.path = output_dir / name
+        self.logger = logger or logging.getLogger(__name__)
+        self._file = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> JournalState:
+        """读取日志，每个文件以最后一条记录为准"""
+        last: Dict[str, dict] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 崩溃时写了一半的行
+                    if isinstance(record, dict) and 'file' in record:
+                        last[record['file']] = record
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"运行日志无法读取: {e}")
+
+        completed = {key: r for key, r in last.items() if r.get('event') == 'done'}
+        in_flight = [key for key, r in last.items() if r.get('event') == 'start']
+        failed = [key for key, r in last.items() if r.get('event') == 'failed']
+        return JournalState(completed, in_flight, failed)
+
+    def open(self, resume: bool = False):
+        """开始记录；resume 为 False 时清空以前的日志"""
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _append(self, record: dict, sync: bool = False):
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def start(self, key: str):
+        """记录开始转换（只刷新到操作系统，进程终止后仍在；断电丢失时该文件同样会重新转换）"""
+        self._append({'event': 'start', 'file': key})
+
+    def done(self, key: str, digest: str, fingerprint: str, outputs: List[str],
+             output_hashes: Optional[Dict[str, str]] = None, images: Optional[List[str]] = None):
+        """记录转换完成（同步到磁盘；输出文件此时已同步到磁盘并原子替换，见 save.durable_replace）"""
+        record = {'event': 'done', 'file': key, 'hash': digest, 'fingerprint': fingerprint,
+                  'outputs': list(outputs)}
+        if output_hashes:
+            record['output_hashes'] = dict(output_hashes)
+        if images:
+            record['images'] = list(images)
+        self._append(record, sync=True)
+
+    def failed(self, key: str):
+        self._append({'event': 'failed', 'file': key})
+
+    def close(self, remove: bool = False):
+        """结束记录；remove 为 True（运行正常结束、缓存清单已保存）时删除日志"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+合并输出 - 把多个Markdown文件依次渲染到同一个Word文档中
+
+所有源文件的块连成一个块流，源文件之间插入分页符或分节符，一次渲染、一次保存：
+页面设置和样式只应用一次，不为单个源文件创建中间文档。流式模式下按块写入，
+内存占用与合并的文件数无关。
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .images import resolve_images
+from .parser import Block, Break, iter_blocks
+from .source import read_lines
+
+MERGE_BREAKS = ('page', 'section')
+
+
+class MergeResult(NamedTuple):
+    """合并结果"""
+    sources: List[Path]  # 已合并的源文件
+    failed: List[Path]  # 无法读取、已跳过的源文件
+    digest: Optional[str]  # 输出的内容哈希
+
+
+def merged_blocks(md_files: Iterable[Path], section: bool = False, logger: Optional[logging.Logger] = None,
+                  sources: Optional[List[Path]] = None, failed: Optional[List[Path]] = None,
+                  counts: Optional[Dict[str, int]] = None, fallback: Optional[str] = None) -> Iterator[Block]:
+    """
+    依次产出各源文件的块，源文件之间插入分隔
+
+    每个源文件整体解码后再解析，读取失败（如编码错误）的文件记录错误后跳过，不会只合并一半。
+    图片路径相对各自源文件所在的目录。
+
+    Args:
+        md_files: 源文件（可以是惰性迭代器）
+        section: True 插入分节符，False 插入分页符
+        logger: 日志记录器
+        sources: 可选，追加已合并的源文件
+        failed: 可选，追加跳过的源文件
+        counts: 可选，按类型累计块数
+        fallback: 可选，UTF-8 解码失败时使用的后备编码（见 source.SourceFile）
+    """
+    logger = logger or logging.getLogger(__name__)
+    first = True
+    for md_file in md_files:
+        try:
+            lines = read_lines(md_file, fallback)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"✗ 跳过: {md_file.name} - {e}")
+            if failed is not None:
+                failed.append(md_file)
+            continue
+
+        if not first:
+            yield Break(section)
+        first = False
+        logger.debug(f"  合并: {md_file.name}")
+        for block in resolve_images(iter_blocks(lines), md_file.parent):
+            if counts is not None:
+                counts[block.kind] = counts.get(block.kind, 0) + 1
+            yield block
+        if sources is not None:
+            sources.append(md_file)
+
+
+def merge_convert(md_files: Iterable[Path], target: Path, converter, section: bool = False,
+                  logger: Optional[logging.Logger] = None, metrics: Optional[dict] = None) -> MergeResult:
+    """
+    把多个Markdown文件合并转换为一个Word文档
+
+    Args:
+        md_files: 源文件，按合并顺序排列
+        target: 输出的docx路径
+        converter: 转换器实例（沿用其模板、流式写入和保存选项）
+        section: 源文件之间插入分节符（默认插入分页符）
+        logger: 日志记录器
+        metrics: 可选，记录耗时和块数
+
+    Returns:
+        MergeResult: 合并结果
+    """
+    sources: List[Path] = []
+    failed: List[Path] = []
+    counts: Dict[str, int] = {}
+    blocks = merged_blocks(md_files, section, logger, sources, failed, counts, converter.encoding_fallback)
+    digest = converter.write_blocks(blocks, target, metrics)
+    if metrics is not None:
+        metrics['blocks'] = counts
+    return MergeResult(sources, failed, digest)
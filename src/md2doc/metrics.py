@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+转换指标 - 记录每个文件各阶段耗时、块数、输出大小和内存峰值，并汇总为JSON报告
+
+单个文件的指标是一个普通字典（可以跨进程传递）::
+
+    {
+        'file': 'a.md',
+        'success': True,
+        'stages': {'read': 0.001, 'parse': 0.004, 'render': 0.03, 'save': 0.02},
+        'total': 0.055,
+        'blocks': {'title': 1, 'paragraph': 12},
+        'output_bytes': 38211,
+        'peak_rss': 81264640,
+        'peak_traced': 7663205,  # 仅 --trace-memory：本文件转换期间 tracemalloc 记录的峰值
+    }
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+# 汇总时计算的百分位
+PERCENTILES = (('p50', 50), ('p95', 95))
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def count_blocks(blocks: Iterable) -> Dict[str, int]:
+    """按类型统计块数"""
+    counts: Dict[str, int] = {}
+    for block in blocks:
+        counts[block.kind] = counts.get(block.kind, 0) + 1
+    return counts
+
+
+@contextmanager
+def stage_timer(metrics: Optional[dict], stage: str):
+    """把代码块的耗时累加到 metrics['stages'][stage]（metrics 为None时不计时）"""
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = metrics.setdefault('stages', {})
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+
+
+def move_stage_time(metrics: Optional[dict], source: str, target: str, seconds: float):
+    """把已计入 source 阶段的一段耗时改记到 target 阶段（metrics 为None时不处理）"""
+    if metrics is None:
+        return
+    stages = metrics.setdefault('stages', {})
+    seconds = min(seconds, stages.get(source, 0.0))
+    stages[source] = stages.get(source, 0.0) - seconds
+    stages[target] = stages.get(target, 0.0) + seconds
+
+
+def _win_memory_counters():
+    """Windows 进程内存计数器（GetProcessMemoryInfo），失败时返回None"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters
+
+
+def peak_rss() -> Optional[int]:
+    """当前进程的内存占用峰值（字节），无法获取时返回None"""
+    try:
+        if sys.platform == 'win32':
+            counters = _win_memory_counters()
+            return int(counters.PeakWorkingSetSize) if counters else None
+
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以KB为单位，macOS 以字节为单位
+        return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+    except (ImportError, OSError, AttributeError):
+        return None
+
+
+def current_rss() -> Optional[int]:
+    """当前进程的内存占用（字节），无法获取时（如 macOS）返回None"""
+    try:
+        if sys.platform == 'win32':
+            counters = _win_memory_counters()
+            return int(counters.WorkingSetSize) if counters else None
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (ImportError, OSError, AttributeError, ValueError, IndexError):
+        return None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """线性插值百分位（与 numpy.percentile 默认方式一致）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def _distribution(values: List[float]) -> dict:
+    result = {name: percentile(values, q) for name, q in PERCENTILES}
+    result['max'] = max(values) if values else None
+    result['sum'] = sum(values)
+    return result
+
+
+class MetricsCollector:
+    """收集单个文件的指标，转发给回调，并生成汇总报告
+
+    回调在每个文件完成后以指标字典调用，可用于把数据转发到外部监控系统；
+    回调抛出的异常只记录警告，不影响转换。
+
+    Args:
+        callbacks: 初始回调列表
+        logger: 日志记录器
+    """
+
+    def __init__(self, callbacks: Optional[Iterable[Callable[[dict], None]]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.records: List[dict] = []
+        self.callbacks: List[Callable[[dict], None]] = list(callbacks or [])
+        self.logger = logger or logging.getLogger(__name__)
+        self._start = time.perf_counter()
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """注册回调"""
+        self.callbacks.append(callback)
+
+    def add(self, record: dict):
+        """记录一个文件的指标"""
+        self.records.append(record)
+        for callback in self.callbacks:
+            try:
+                callback(record)
+            except Exception as e:
+                self.logger.warning(f"指标回调出错: {e}")
+
+    def summary(self) -> dict:
+        """汇总：各阶段与总耗时、输出大小、内存峰值的 p50/p95/max，以及块数合计"""
+        stage_names = []
+        for record in self.records:
+            for stage in record.get('stages', {}):
+                if stage not in stage_names:
+                    stage_names.append(stage)
+
+        blocks: Dict[str, int] = {}
+        for record in self.records:
+            for kind, n in record.get('blocks', {}).items():
+                blocks[kind] = blocks.get(kind, 0) + n
+
+        def values(getter):
+            return [v for v in map(getter, self.records) if v is not None]
+
+        peaks = values(lambda r: r.get('peak_rss'))
+        traced = values(lambda r: r.get('peak_traced'))
+        return {
+            'files': len(self.records),
+            'failed': sum(1 for r in self.records if not r.get('success')),
+            'elapsed': time.perf_counter() - self._start,
+            'stages': {stage: _distribution(values(lambda r, s=stage: r.get('stages', {}).get(s)))
+                       for stage in stage_names},
+            'total': _distribution(values(lambda r: r.get('total'))),
+            'output_bytes': _distribution(values(lambda r: r.get('output_bytes'))),
+            'peak_rss': max(peaks) if peaks else None,
+            'peak_traced': _distribution(traced) if traced else None,
+            'blocks': blocks,
+        }
+
+    def report(self) -> dict:
+        return {'summary': self.summary(), 'files': self.records}
+
+    def write(self, path: Path):
+        """写出JSON报告"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+OOXML片段 - 直接生成段落、运行、表格和图片的 WordprocessingML
+
+结构与 python-docx 生成的XML逐字节一致，供流式写入器和批量建表共用。
+"""
+
+import re
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from docx.shared import Emu, Inches
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+WP_NAMESPACE = 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+A_NAMESPACE = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+PIC_NAMESPACE = 'http://schemas.openxmlformats.org/drawingml/2006/picture'
+R_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# XML 1.0 不允许的控制字符（与 lxml 的校验保持一致）
+_INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def _t_xml(text: str) -> str:
+    if len(text.strip()) < len(text):
+        return f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+    return f'<w:t>{escape(text)}</w:t>'
+
+
+def run_xml(text: str) -> str:
+    """生成运行XML：制表符为 w:tab，换行为 w:br（与 python-docx 的 run.text 相同）"""
+    if not text:
+        return '<w:r/>'
+    if _INVALID_XML_RE.search(text):
+        raise ValueError('All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters')
+
+    parts = ['<w:r>']
+    buffer = []
+    for char in text:
+        if char == '\t' or char in '\r\n':
+            if buffer:
+                parts.append(_t_xml(''.join(buffer)))
+                buffer = []
+            parts.append('<w:tab/>' if char == '\t' else '<w:br/>')
+        else:
+            buffer.append(char)
+    if buffer:
+        parts.append(_t_xml(''.join(buffer)))
+    parts.append('</w:r>')
+    return ''.join(parts)
+
+
+def paragraph_xml(text: str, style_id: Optional[str]) -> str:
+    """生成引用指定样式的段落XML（空文本不生成运行）"""
+    ppr = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ''
+    body = run_xml(text) if text else ''
+    if not ppr and not body:
+        return '<w:p/>'
+    return f'<w:p>{ppr}{body}</w:p>'
+
+
+def page_break_xml(declare_namespace: bool = False) -> str:
+    """生成只含分页符的段落XML"""
+    ns = f' xmlns:w="{W_NAMESPACE}"' if declare_namespace else ''
+    return f'<w:p{ns}><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def section_break_xml(sect_pr: str, declare_namespace: bool = False) -> str:
+    """生成以 sect_pr（节属性XML，见 sect_pr_xml）结束一节的段落XML，下一节从新页开始"""
+    ns = f' xmlns:w="{W_NAMESPACE}"' if declare_namespace else ''
+    return f'<w:p{ns}><w:pPr>{sect_pr}</w:pPr></w:p>'
+
+
+def image_xml(rid: str, shape_id: int, cx: int, cy: int, name: str, alt: str = '',
+              declare_namespace: bool = False) -> str:
+    """生成只含一张嵌入式图片的段落XML（居中，单倍行距、无首行缩进，避免固定行距裁切图片）
+
+    图片结构与 python-docx 的 add_picture() 相同；绘图相关的命名空间在 wp:inline 上声明，
+    自定义模板的 document.xml 未声明这些命名空间时也能直接写入。
+
+    Args:
+        rid: 文档部件到图片部件的关系ID
+        shape_id: 文档内唯一的图形ID
+        cx, cy: 显示尺寸（EMU）
+        name: 图片名称（通常为文件名）
+        alt: 替代文字
+    """
+    ns = f' xmlns:w="{W_NAMESPACE}"' if declare_namespace else ''
+    entities = {'"': '&quot;'}
+    name = escape(name, entities)
+    descr = f' descr="{escape(alt, entities)}"' if alt else ''
+    return (
+        f'<w:p{ns}><w:pPr><w:spacing w:line="240" w:lineRule="auto"/>'
+        '<w:ind w:firstLine="0" w:firstLineChars="0"/><w:jc w:val="center"/></w:pPr>'
+        '<w:r><w:drawing>'
+        f'<wp:inline distT="0" distB="0" distL="0" distR="0" xmlns:wp="{WP_NAMESPACE}"'
+        f' xmlns:a="{A_NAMESPACE}" xmlns:pic="{PIC_NAMESPACE}" xmlns:r="{R_NAMESPACE}">'
+        f'<wp:extent cx="{cx}" cy="{cy}"/>'
+        f'<wp:docPr id="{shape_id}" name="{name}"{descr}/>'
+        '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+        f'<a:graphic><a:graphicData uri="{PIC_NAMESPACE}"><pic:pic>'
+        f'<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+        '</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>'
+    )
+
+
+def sect_pr_xml(doc) -> str:
+    """文档最后一节的节属性XML（页面设置、页眉页脚引用），用于插入分节符"""
+    from lxml import etree
+
+    sect_pr = doc.element.body.sectPr
+    return etree.tostring(sect_pr, encoding='unicode') if sect_pr is not None else '<w:sectPr/>'
+
+
+def table_xml(rows, block_width: int, table_style_id: Optional[str], cell_style_id: Optional[str],
+              declare_namespace: bool = False) -> str:
+    """一次生成整个表格的XML
+
+    列数取第一行的单元格数，宽度在列间平均分配；较短的行补空单元格，较长的行截断。
+    所有单元格共用同一份单元格属性和段落样式引用。
+
+    Args:
+        declare_namespace: 是否在 w:tbl 上声明命名空间（单独解析为元素时需要）
+    """
+    if not rows:
+        return ''
+    cols = len(rows[0])
+    col_twips = Emu(block_width // cols).twips if cols > 0 else 0
+    tc_pr = f'<w:tcPr><w:tcW w:type="dxa" w:w="{col_twips}"/></w:tcPr>'
+    empty_cell = f'<w:tc>{tc_pr}<w:p/></w:tc>'
+
+    style = f'<w:tblStyle w:val="{table_style_id}"/>' if table_style_id else ''
+    parts = [
+        f'<w:tbl xmlns:w="{W_NAMESPACE}"><w:tblPr>' if declare_namespace else '<w:tbl><w:tblPr>', style,
+        '<w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+        ' w:noHBand="0" w:noVBand="1" w:val="04A0"/>'
+        '</w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{col_twips}"/>' * cols,
+        '</w:tblGrid>',
+    ]
+    cell_ppr = f'<w:pPr><w:pStyle w:val="{cell_style_id}"/></w:pPr>' if cell_style_id else ''
+    for row in rows:
+        parts.append('<w:tr>')
+        for j in range(cols):
+            if j < len(row):
+                parts.append(f'<w:tc>{tc_pr}<w:p>{cell_ppr}{run_xml(row[j])}</w:p></w:tc>')
+            else:
+                parts.append(empty_cell)
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def block_width(doc) -> int:
+    """正文区域宽度（EMU）：最后一节的页宽减去左右页边距"""
+    section = doc.sections[-1]
+    page_width = section.page_width or Inches(8.5)
+    left_margin = section.left_margin or Inches(1)
+    right_margin = section.right_margin or Inches(1)
+    return int(page_width - left_margin - right_margin)
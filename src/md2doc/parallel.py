@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+并行转换模块 - 使用多进程批量转换Markdown文件
+
+每个工作进程持有一个常驻的 MarkdownConverter，主进程按提交顺序汇总结果，
+并负责单文件超时控制和 Ctrl-C 时的进程清理。
+"""
+
+import os
+import time
+import signal
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class TaskResult(NamedTuple):
+    """单个文件的转换结果"""
+    index: int
+    md_file: Path
+    success: bool
+    records: List[Tuple[int, str]]  # 工作进程中产生的日志 (级别, 消息)
+    report: dict  # convert_single_file 回传的信息（输出文件等）
+
+
+def default_jobs() -> int:
+    """默认并行数：CPU核心数"""
+    return os.cpu_count() or 1
+
+
+class _BufferHandler(logging.Handler):
+    """在工作进程中缓存日志，随结果一并返回主进程按顺序输出"""
+
+    def __init__(self):
+        super().__init__()
+        self.records: List[Tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append((record.levelno, record.getMessage()))
+
+    def drain(self) -> List[Tuple[int, str]]:
+        records, self.records = self.records, []
+        return records
+
+
+def _worker_main(conn, output_dir: Path, export_pdf: bool, log_level: int, converter_options: dict,
+                 input_dir: Optional[Path] = None):
+    """工作进程入口：循环接收任务直到收到None"""
+    # Ctrl-C 由主进程统一处理，工作进程忽略SIGINT
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    handler = _BufferHandler()
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(log_level)
+
+    from .converter import MarkdownConverter
+    from .cli import convert_single_file, convert_source
+
+    converter = MarkdownConverter(**converter_options)
+    logger = logging.getLogger('md2doc.cli')
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        index, md_file = task
+        report = {}
+        try:
+            if input_dir is not None:
+                success = convert_source(md_file, input_dir, output_dir, converter, logger, export_pdf, report)
+            else:
+                success = convert_single_file(md_file, output_dir, converter, logger, export_pdf, report)
+        except Exception as e:
+            logger.error(f"✗ 失败: {md_file.name} - {e}")
+            success = False
+        conn.send((index, success, handler.drain(), report))
+
+    conn.close()
+
+
+class _Worker:
+    """主进程中对单个工作进程的记录"""
+
+    def __init__(self, ctx, output_dir: Path, export_pdf: bool, log_level: int, converter_options: dict,
+                 input_dir: Optional[Path] = None):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, output_dir, export_pdf, log_level, converter_options, input_dir),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.task: Optional[Tuple[int, Path]] = None
+        self.deadline: Optional[float] = None
+
+    def submit(self, index: int, md_file: Path, timeout: Optional[float]):
+        self.task = (index, md_file)
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send(self.task)
+
+    def stop(self):
+        """正常退出：发送结束信号"""
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+
+    def kill(self):
+        """强制终止（超时或中断）"""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class WorkerPool:
+    """多进程转换池
+
+    Args:
+        output_dir: 输出目录
+        jobs: 工作进程数
+        export_pdf: 是否同时导出PDF
+        timeout: 单个文件的超时时间（秒），None表示不限制
+        log_level: 工作进程日志级别
+        converter_options: 传给工作进程中 MarkdownConverter 的参数（如 template）
+        input_dir: 可选，输入目录；指定时输出按源文件的相对位置写入输出目录的对应子目录
+    """
+
+    def __init__(self, output_dir: Path, jobs: int, export_pdf: bool = False,
+                 timeout: Optional[float] = None, log_level: int = logging.INFO,
+                 converter_options: Optional[dict] = None, input_dir: Optional[Path] = None):
+        self.output_dir = output_dir
+        self.input_dir = input_dir
+        self.jobs = max(1, jobs)
+        self.export_pdf = export_pdf
+        self.timeout = timeout
+        self.log_level = log_level
+        self.converter_options = converter_options or {}
+        self._ctx = multiprocessing.get_context()
+        self._workers: List[_Worker] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(force=exc_type is not None)
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.output_dir, self.export_pdf, self.log_level, self.converter_options,
+                         self.input_dir)
+        self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        self._workers.remove(worker)
+
+    def close(self, force: bool = False):
+        """关闭所有工作进程"""
+        for worker in self._workers:
+            if force:
+                worker.kill()
+            else:
+                worker.stop()
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.kill()
+        self._workers = []
+
+    def imap(self, md_files: Iterable[Path]) -> Iterator[TaskResult]:
+        """并行转换文件，按提交顺序逐个产出结果
+
+        输入可以是惰性迭代器，任务在有空闲进程时才被取出。
+        """
+        tasks = enumerate(md_files)
+        exhausted = False
+        pending = {}  # index -> TaskResult（乱序完成的结果）
+        next_index = 0
+
+        try:
+            while True:
+                # 为空闲进程分配任务（按需启动新进程）
+                while not exhausted:
+                    idle = next((w for w in self._workers if w.task is None), None)
+                    if idle is None and len(self._workers) >= self.jobs:
+                        break
+                    task = next(tasks, None)
+                    if task is None:
+                        exhausted = True
+                        break
+                    if idle is None:
+                        idle = self._spawn()
+                    idle.submit(task[0], task[1], self.timeout)
+
+                busy = [w for w in self._workers if w.task is not None]
+                if not busy:
+                    break
+
+                # 等待结果、进程退出或超时
+                deadlines = [w.deadline for w in busy if w.deadline is not None]
+                wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                handles = [w.conn for w in busy] + [w.process.sentinel for w in busy]
+                ready = set(wait(handles, timeout=wait_timeout))
+
+                now = time.monotonic()
+                for worker in busy:
+                    index, md_file = worker.task
+                    if worker.conn in ready:
+                        try:
+                            _, success, records, report = worker.conn.recv()
+                        except (EOFError, OSError):
+                            pending[index] = self._failure(index, md_file, '工作进程异常退出')
+                            self._replace(worker)
+                            continue
+                        pending[index] = TaskResult(index, md_file, success, records, report)
+                        worker.task = None
+                        worker.deadline = None
+                    elif worker.process.sentinel in ready:
+                        pending[index] = self._failure(index, md_file, '工作进程异常退出')
+                        self._replace(worker)
+                    elif worker.deadline is not None and now >= worker.deadline:
+                        pending[index] = self._failure(index, md_file, f'超时（{self.timeout:g} 秒）')
+                        self._replace(worker)
+
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+        except BaseException:
+            self.close(force=True)
+            raise
+
+    @staticmethod
+    def _failure(index: int, md_file: Path, reason: str) -> TaskResult:
+        return TaskResult(index, md_file, False, [(logging.ERROR, f"✗ 失败: {md_file.name} - {reason}")], {})
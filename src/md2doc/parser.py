@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+"""
+Markdown解析模块 - 行内格式解析与块级中间表示
+
+parse() 把Markdown文本解析为紧凑的块列表（不依赖python-docx），
+由 MarkdownConverter 负责把块渲染为Word文档。
+"""
+
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+# ==================== 解析工具函数 ====================
+
+
+# 行内标记词法：转义字符、粗体、斜体、代码（按顺序尝试，** 优先于 *）
+_INLINE_TOKEN_RE = re.compile(r'\\[*`_]|\*\*|\*|`')
+
+# 段首空格（包括全角和半角空格）
+_LEADING_SPACE_RE = re.compile(r'^[\s\u3000]+')
+
+# 题序后的多余空格：一、二、三、 或 （一）、（二） 或 1.、2. 或 （1）、（2）等
+_ORDINAL_SPACE_RE = re.compile(r'([一二三四五六七八九十]+、|（[一二三四五六七八九十]+）|\d+[\.\)、\uff09])([\s\u3000]+)')
+
+# 标记种类对应的片段类型
+_MARKER_KINDS = {'**': 'bold', '*': 'italic', '`': 'code'}
+
+
+def parse_inline_formatting(text: str) -> List[Tuple[str, str]]:
+    r"""解析行内Markdown格式，返回格式片段列表
+
+    单遍、线性时间的词法分析：先把文本切分为文本和标记，再为每种标记预先计算
+    “下一个同类标记”的位置，配对时直接查表，不再反复切片重建字符串。
+
+    处理规则:
+    - **text** → ('bold', 'text')
+    - *text* → ('italic', 'text')
+    - `code` → ('code', 'code')，代码内的标记按原样保留
+    - 没有结束标记的 **、*、` 被移除
+    - \*、\`、\_ 转义为普通字符
+    - 嵌套格式取外层类型，相邻同类片段合并，空片段丢弃
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        List[Tuple[str, str]]: (类型, 文本) 片段列表，类型为 text/bold/italic/code
+    """
+    # 词法分析：文本片段保存为 (None, 文本)，标记保存为 (标记, 原文)
+    tokens = []
+    pos = 0
+    for match in _INLINE_TOKEN_RE.finditer(text):
+        start = match.start()
+        if start > pos:
+            tokens.append((None, text[pos:start]))
+        marker = match.group()
+        if marker[0] == '\\':
+            tokens.append((None, marker[1]))
+        else:
+            tokens.append((marker, marker))
+        pos = match.end()
+    if pos < len(text):
+        tokens.append((None, text[pos:]))
+
+    # 从后向前计算每个位置之后（含）最近的同类标记
+    count = len(tokens)
+    markers = [token[0] for token in tokens]
+    next_marker = {}
+    for candidate in _MARKER_KINDS:
+        positions = [count] * (count + 1)
+        nearest = count
+        for k in range(count - 1, -1, -1):
+            if markers[k] == candidate:
+                nearest = k
+            positions[k] = nearest
+        next_marker[candidate] = positions
+
+    spans: List[list] = []
+
+    def emit(kind: str, value: str):
+        if not value:
+            return
+        if spans and spans[-1][0] == kind:
+            spans[-1][1].append(value)
+        else:
+            spans.append([kind, [value]])
+
+    # 配对：栈中每一项为 (当前位置, 结束位置, 片段类型)，嵌套层数至多三层
+    stack = [(0, count, 'text')]
+    while stack:
+        k, end, kind = stack.pop()
+        while k < end:
+            marker, value = tokens[k]
+            if marker is None:
+                emit(kind, value)
+                k += 1
+                continue
+
+            close = next_marker[marker][k + 1]
+            if close >= end:
+                k += 1  # 没有结束标记，移除该标记
+                continue
+
+            if marker == '`':
+                emit('code', ''.join(token[1] for token in tokens[k + 1:close]))
+                k = close + 1
+                continue
+
+            inner_kind = _MARKER_KINDS[marker] if kind == 'text' else kind
+            stack.append((close + 1, end, kind))
+            stack.append((k + 1, close, inner_kind))
+            break
+
+    return [(kind, ''.join(values)) for kind, values in spans]
+
+
+def flatten_inline_spans(spans: List[Tuple[str, str]]) -> str:
+    """将格式片段合并为纯文本（不保留任何格式）
+
+    - 移除段首空格（包括全角和半角空格）
+    - 压缩题序和标题之间的多余空格
+
+    Args:
+        spans: parse_inline_formatting 返回的片段列表
+
+    Returns:
+        str: 纯文本
+    """
+    result = ''.join(value for _, value in spans)
+    result = _LEADING_SPACE_RE.sub('', result)
+    return _ORDINAL_SPACE_RE.sub(r'\1', result)
+
+
+def strip_inline_formatting(text: str) -> str:
+    r"""清理Markdown格式标记，但保留转义字符
+
+    处理规则:
+    - 移除 **text** → text (不应用加粗格式)
+    - 移除 *text* → text (不应用斜体格式)
+    - 移除 `code` → code (不应用代码格式)
+    - 保留 \* → *
+    - 保留其他转义字符
+    - 移除段首空格（包括全角和半角空格）
+    - 压缩题序和标题之间的多余空格
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 清理格式标记后的文本
+    """
+    return flatten_inline_spans(parse_inline_formatting(text))
+
+
+def title_from_line(line: str) -> Optional[str]:
+    """标题行（以 # 开头）的标题文本（已移除文件名非法字符），其他行返回None"""
+    line = line.strip()
+    if not line.startswith('#'):
+        return None
+    title = line.lstrip('#').strip()
+    title = re.sub(r'[<>:"/\\|?*]', '', title)
+    return title if title else '未命名文档'
+
+
+def extract_title(lines: Iterable[str]) -> str:
+    """从Markdown文本行中提取第一个标题（已移除文件名非法字符）"""
+    for line in lines:
+        title = title_from_line(line)
+        if title is not None:
+            return title
+    return '未命名文档'
+
+
+def extract_title_from_md(md_file_path: str, fallback: Optional[str] = None) -> str:
+    """从Markdown文件中提取第一个标题（读到标题行即停止）"""
+    from .source import SourceFile
+
+    try:
+        return extract_title(SourceFile(md_file_path, fallback))
+    except Exception:
+        pass
+
+    return '未命名文档'
+
+
+def sanitize_filename(filename: str) -> str:
+    """清理文件名，移除非法字符"""
+    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = filename.strip()
+    if len(filename) > 200:
+        filename = filename[:200]
+    return filename if filename else '未命名文档'
+
+
+def normalize_list_symbol(text: str) -> str:
+    """移除列表符号前缀
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 处理后的文本（移除-、+、*、•等列表符号）
+    """
+    # 移除常见的列表符号前缀（包括空格）
+    if text.startswith(('- ', '+ ', '* ')):
+        return text[2:]  # 移除符号和空格
+    elif text.startswith('• '):
+        return text[2:]  # 移除bullet和空格（•是1个字符，加上空格共2个）
+    return text
+
+
+def is_signature_line(text: str) -> bool:
+    """判断是否是落款或日期行"""
+    text_stripped = text.strip()
+    return '辅导员：' in text_stripped or '日期：' in text_stripped
+
+
+# ==================== 块级中间表示 ====================
+
+class Block:
+    """块的基类：子类通过 __slots__ 声明字段，kind 标识块类型"""
+
+    __slots__ = ()
+    kind = 'block'
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash((self.kind,) + self._fields())
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Title(Block):
+    """文档主标题 (#)"""
+    __slots__ = ('text',)
+    kind = 'title'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class Heading(Block):
+    """标题：level 1/2/3 分别对应 ## / ### / ####"""
+    __slots__ = ('level', 'text')
+    kind = 'heading'
+
+    def __init__(self, level: int, text: str):
+        self.level = level
+        self.text = text
+
+
+class Paragraph(Block):
+    """普通段落"""
+    __slots__ = ('text',)
+    kind = 'paragraph'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class Signature(Block):
+    """落款或日期行"""
+    __slots__ = ('text',)
+    kind = 'signature'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class Quote(Block):
+    """引用 (>)"""
+    __slots__ = ('text',)
+    kind = 'quote'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ListItem(Block):
+    """列表项（已移除列表符号）"""
+    __slots__ = ('text',)
+    kind = 'list_item'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class Table(Block):
+    """表格：rows 为单元格文本的二维元组（不含分隔行）"""
+    __slots__ = ('rows',)
+    kind = 'table'
+
+    def __init__(self, rows: Tuple[Tuple[str, ...], ...]):
+        self.rows = rows
+
+
+class Separator(Block):
+    """分隔线"""
+    __slots__ = ()
+    kind = 'separator'
+
+
+class CodeBlock(Block):
+    """代码块（渲染时跳过）"""
+    __slots__ = ('info', 'lines')
+    kind = 'code'
+
+    def __init__(self, info: str, lines: Tuple[str, ...]):
+        self.info = info
+        self.lines = lines
+
+
+class Image(Block):
+    """独占一行的图片 ![alt](path)：path 为Markdown中的原样路径，渲染前相对源文件所在目录解析"""
+    __slots__ = ('alt', 'path')
+    kind = 'image'
+
+    def __init__(self, alt: str, path: str):
+        self.alt = alt
+        self.path = path
+
+
+class Break(Block):
+    """分页或分节（合并多个源文件时插入，不对应Markdown语法）"""
+    __slots__ = ('section',)
+    kind = 'break'
+
+    def __init__(self, section: bool = False):
+        self.section = section
+
+
+# ==================== 块级解析 ====================
+
+_LIST_ITEM_RE = re.compile(r'^\s*\d+[\.\)]\s')
+_CELL_SEPARATOR_RE = re.compile(r'(?<!\\)\|')
+_ALIGNMENT_CELL_RE = re.compile(r'^\s*:?-+:?\s*$')
+# ![alt](path) 或 ![alt](<带空格的路径> "标题")
+_IMAGE_RE = re.compile(r'^!\[([^\]]*)\]\(\s*(?:<([^>]*)>|([^)\s]+))(?:\s+(?:"[^"]*"|\'[^\']*\'))?\s*\)$')
+
+
+def is_table_line(line: str) -> bool:
+    """判断是否是表格行"""
+    return '|' in line and line.lstrip().startswith('|')
+
+
+def is_list_item(line: str) -> bool:
+    """判断是否是列表项"""
+    return bool(line.strip().startswith(('* ', '- ', '• ', '+ ')) or _LIST_ITEM_RE.match(line))
+
+
+def split_table_row(line: str) -> List[str]:
+    """按未转义的|分割表格行，移除首尾的|，并把 \\| 还原为|"""
+    line = line.strip()
+    cells = _CELL_SEPARATOR_RE.split(line)
+    if line.startswith('|'):
+        cells = cells[1:]
+    if cells and line.endswith('|') and not line.endswith('\\|'):
+        cells = cells[:-1]
+    return [cell.replace('\\|', '|') for cell in cells]
+
+
+def is_alignment_row(cells: List[str]) -> bool:
+    """判断是否是表头与表体之间的分隔行（如 |---|:-:|--:|）"""
+    return bool(cells) and all(_ALIGNMENT_CELL_RE.match(cell) for cell in cells)
+
+
+def parse_table_rows(table_lines: List[str]) -> Tuple[Tuple[str, ...], ...]:
+    """解析表格行：按未转义的|分割，过滤分隔行，并清理格式标记"""
+    rows = []
+    for line in table_lines:
+        cells = split_table_row(line)
+        if not cells or is_alignment_row(cells):
+            continue
+        rows.append(tuple(strip_inline_formatting(cell.strip()) for cell in cells))
+    return tuple(rows)
+
+
+def parse_line(line: str) -> Optional[Block]:
+    """解析单个非空、非表格、非代码块的行"""
+    stripped = line.strip()
+    if line.startswith('# '):
+        return Title(strip_inline_formatting(line[1:].strip()))
+    if line.startswith('## '):
+        return Heading(1, strip_inline_formatting(line[2:].strip()))
+    if line.startswith('### '):
+        return Heading(2, strip_inline_formatting(line[3:].strip()))
+    if line.startswith('#### '):
+        return Heading(3, strip_inline_formatting(line[4:].strip()))
+    if stripped.startswith('>'):
+        return Quote(strip_inline_formatting(stripped[1:].strip()))
+    if stripped.startswith(('---', '***')):
+        return Separator()
+    if is_list_item(line):
+        return ListItem(strip_inline_formatting(normalize_list_symbol(stripped)))
+    if stripped.startswith('!['):
+        match = _IMAGE_RE.match(stripped)
+        if match:
+            return Image(match.group(1), match.group(2) if match.group(2) is not None else match.group(3))
+
+    text = strip_inline_formatting(stripped)
+    if is_signature_line(text):
+        return Signature(text)
+    return Paragraph(text)
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """逐行解析Markdown，惰性产出块
+
+    Args:
+        lines: 文本行（可带或不带换行符），可以是惰性迭代器
+
+    Yields:
+        Block: 解析得到的块
+    """
+    code_info = None
+    code_lines: List[str] = []
+    table_lines: List[str] = []
+
+    for raw in lines:
+        line = raw.rstrip()
+
+        # 表格在遇到第一个非表格行时结束
+        if table_lines:
+            if is_table_line(line):
+                table_lines.append(line)
+                continue
+            rows = parse_table_rows(table_lines)
+            table_lines = []
+            if rows:
+                yield Table(rows)
+
+        # 代码块
+        if line.strip().startswith('```'):
+            if code_info is None:
+                code_info = line.strip()[3:].strip()
+            else:
+                yield CodeBlock(code_info, tuple(code_lines))
+                code_info = None
+                code_lines = []
+            continue
+        if code_info is not None:
+            code_lines.append(line)
+            continue
+
+        # 跳过空行
+        if not line:
+            continue
+
+        if is_table_line(line):
+            table_lines.append(line)
+            continue
+
+        yield parse_line(line)
+
+    if table_lines:
+        rows = parse_table_rows(table_lines)
+        if rows:
+            yield Table(rows)
+    if code_info is not None:
+        yield CodeBlock(code_info, tuple(code_lines))
+
+
+def parse(text: str) -> List[Block]:
+    """把Markdown文本解析为块列表
+
+    Args:
+        text: Markdown文本
+
+    Returns:
+        List[Block]: 块列表
+    """
+    return list(iter_blocks(text.split('\n')))
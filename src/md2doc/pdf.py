@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+PDF导出 - 可替换的导出后端，以及与docx生成并行运行的后台导出流水线
+
+后端一次会话转换一批docx（docx2pdf 后端在一批文件之间保持 Word 常驻，不再每个文件
+启动一次）。PdfPipeline 在后台线程中运行后端，由有界队列供给：主流程生成docx后提交，
+队列满时提交会阻塞，避免PDF导出跟不上时待导出任务无限堆积。
+
+stub 后端不依赖任何办公软件，写出最小的合法PDF，用于在 Linux 上测试整个流水线。
+"""
+
+import sys
+import time
+import queue
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+# 每次会话最多转换的文档数
+DEFAULT_BATCH_SIZE = 8
+# 等待导出的任务（源文件）上限
+DEFAULT_QUEUE_SIZE = 16
+
+
+def pdf_path_for(docx_path: Path) -> Path:
+    """docx 对应的PDF路径（同目录同名）"""
+    return docx_path.with_suffix('.pdf')
+
+
+class PdfBackend:
+    """PDF导出后端
+
+    convert_batch() 是一次会话：把一批docx分别转换为同目录同名的PDF，
+    返回与输入一一对应的错误信息（成功为None）。单个文件失败不影响同批其他文件。
+    """
+
+    name = ''
+
+    def convert_batch(self, docx_paths: Sequence[Path]) -> List[Optional[str]]:
+        raise NotImplementedError
+
+
+class Docx2PdfBackend(PdfBackend):
+    """通过 docx2pdf 调用 Microsoft Word（Windows/macOS）
+
+    同一批文件之间保持 Word 常驻（keep_active），最后一个文件转换后退出。
+    """
+
+    name = 'docx2pdf'
+
+    def convert_batch(self, docx_paths: Sequence[Path]) -> List[Optional[str]]:
+        from docx2pdf import convert
+
+        if sys.platform == 'win32':
+            # 在后台线程中使用 COM 需要先初始化
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+            except ImportError:
+                pass
+
+        errors: List[Optional[str]] = []
+        last = len(docx_paths) - 1
+        for i, docx_path in enumerate(docx_paths):
+            try:
+                convert(str(docx_path), str(pdf_path_for(docx_path)), keep_active=i < last)
+                errors.append(None)
+            except (Exception, SystemExit) as e:  # docx2pdf 在 macOS 上出错时调用 sys.exit
+                errors.append(str(e) or type(e).__name__)
+        return errors
+
+
+class StubPdfBackend(PdfBackend):
+    """不依赖办公软件的本地后端：为每个docx写出一页空白的最小PDF
+
+    Args:
+        delay: 每个文件模拟的转换耗时（秒）
+    """
+
+    name = 'stub'
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sessions: List[int] = []  # 每次会话转换的文件数
+
+    def convert_batch(self, docx_paths: Sequence[Path]) -> List[Optional[str]]:
+        import zipfile
+
+        self.sessions.append(len(docx_paths))
+        errors: List[Optional[str]] = []
+        for docx_path in docx_paths:
+            if self.delay:
+                time.sleep(self.delay)
+            if not zipfile.is_zipfile(docx_path):
+                errors.append(f'不是有效的docx文件: {docx_path.name}')
+                continue
+            pdf_path_for(docx_path).write_bytes(self.render(docx_path.name))
+            errors.append(None)
+        return errors
+
+    @staticmethod
+    def render(source: str) -> bytes:
+        """生成带正确交叉引用表的单页PDF（A4），源文件名写在注释中"""
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>',
+        ]
+        out = bytearray(b'%PDF-1.4\n% md2doc stub: ' + source.encode('utf-8') + b'\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            out += b'%010d 00000 n \n' % offset
+        out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(out)
+
+
+PDF_BACKENDS: Dict[str, Type[PdfBackend]] = {
+    Docx2PdfBackend.name: Docx2PdfBackend,
+    StubPdfBackend.name: StubPdfBackend,
+}
+
+DEFAULT_BACKEND = Docx2PdfBackend.name
+
+
+def create_backend(name: str = DEFAULT_BACKEND) -> PdfBackend:
+    """按名称创建后端
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    try:
+        return PDF_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"未知的PDF后端: {name}（可选: {', '.join(PDF_BACKENDS)}）") from None
+
+
+class PdfJob(NamedTuple):
+    """一个源文件的PDF导出结果"""
+    tag: object  # 提交时附带的标识，原样返回
+    pdf_paths: List[Path]  # 成功生成的PDF
+    errors: List[Tuple[Path, str]]  # 失败的docx及原因
+    elapsed: float  # 分摊到该任务的转换耗时（秒）
+
+
+class PdfPipeline:
+    """后台PDF导出流水线
+
+    submit() 把一个源文件生成的docx放入有界队列；后台线程每次取出当前排队的任务，
+    合并为一批（最多 batch_size 个文档）交给后端在一次会话中转换。
+    完成的任务通过 completed()（不阻塞）或 close()（等待全部完成）取回，由调用方所在线程处理。
+
+    Args:
+        backend: 导出后端
+        batch_size: 每次会话最多转换的文档数
+        queue_size: 等待导出的任务上限（队列满时 submit 阻塞）
+        logger: 日志记录器
+    """
+
+    def __init__(self, backend: PdfBackend, batch_size: int = DEFAULT_BATCH_SIZE,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, logger: Optional[logging.Logger] = None):
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.logger = logger or logging.getLogger(__name__)
+        self._queue: 'queue.Queue' = queue.Queue(max(1, queue_size))
+        self._done: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._cancelled = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='md2doc-pdf', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+
+    def submit(self, tag, docx_paths: Sequence[Path]):
+        """提交一个源文件的docx（队列满时阻塞）"""
+        if self._closed:
+            raise RuntimeError('PDF流水线已关闭')
+        self._queue.put((tag, list(docx_paths)))
+
+    def completed(self) -> List[PdfJob]:
+        """取回已完成的任务（不阻塞）"""
+        jobs = []
+        while True:
+            try:
+                jobs.append(self._done.get_nowait())
+            except queue.Empty:
+                return jobs
+
+    def close(self, cancel: bool = False) -> List[PdfJob]:
+        """停止接收任务并等待后台线程结束，返回尚未取回的已完成任务
+
+        Args:
+            cancel: 放弃队列中尚未开始的任务（正在转换的一批仍会完成）
+        """
+        if not self._closed:
+            self._closed = True
+            if cancel:
+                self._cancelled.set()
+            self._queue.put(None)
+            self._thread.join()
+        return self.completed()
+
+    def _next_batch(self) -> Tuple[List[Tuple[object, List[Path]]], bool]:
+        """阻塞取出一个任务，再合并已在排队的任务；返回 (任务列表, 是否收到结束信号)"""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        count = len(item[1])
+        while count < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            count += len(item[1])
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if self._cancelled.is_set():
+                continue
+            if batch:
+                self._convert(batch)
+
+    def _convert(self, batch: List[Tuple[object, List[Path]]]):
+        paths = [path for _, docx_paths in batch for path in docx_paths]
+        start = time.perf_counter()
+        try:
+            errors = self.backend.convert_batch(paths) if paths else []
+        except (Exception, SystemExit) as e:
+            errors = [str(e) or type(e).__name__] * len(paths)
+        elapsed = time.perf_counter() - start
+        self.logger.debug(f"PDF会话: {len(paths)} 个文档，耗时 {elapsed:.2f} 秒")
+
+        results = iter(errors)
+        for tag, docx_paths in batch:
+            pdf_paths, failures = [], []
+            for path in docx_paths:
+                error = next(results, '后端未返回结果')
+                if error is None:
+                    pdf_paths.append(pdf_path_for(path))
+                else:
+                    failures.append((path, error))
+            share = elapsed * len(docx_paths) / len(paths) if paths else 0.0
+            self._done.put(PdfJob(tag, pdf_paths, failures, share))
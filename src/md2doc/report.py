@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+运行报告 - 批量转换的机器可读结果，以及合并多个分片报告的 merge-reports 子命令
+
+报告格式::
+
+    {
+        'version': 1,
+        'shard': {'index': 1, 'count': 4},  # 未分片时为 null
+        'output': '/data/output',
+        'elapsed': 12.5,
+        'summary': {'found': 120, 'total': 480, 'success': 118, 'skipped': 0, 'failed': 2},
+        'files': [
+            {'file': 'a/b.md', 'status': 'success', 'outputs': ['a/标题.docx'], 'time': 0.21},
+            ...
+        ],
+    }
+
+summary.found 为本次处理的文件数，summary.total 为分片前发现的全部文件数。
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+REPORT_VERSION = 1
+
+# merge-reports 在目录中查找的报告文件名
+REPORT_GLOB = '.md2doc-report*.json'
+
+SUMMARY_KEYS = ('found', 'total', 'success', 'skipped', 'failed')
+
+
+def report_name(shard: Optional[Tuple[int, int]] = None) -> str:
+    """默认报告文件名（分片时带编号，多台机器共用输出目录时互不覆盖）"""
+    return f".md2doc-report-{shard[0]}-of-{shard[1]}.json" if shard else '.md2doc-report.json'
+
+
+class RunReport:
+    """记录一次批量转换的结果
+
+    Args:
+        output_dir: 输出目录
+        shard: 可选，(分片编号, 分片数)
+    """
+
+    def __init__(self, output_dir: Path, shard: Optional[Tuple[int, int]] = None):
+        self.output_dir = output_dir
+        self.shard = shard
+        self.files: List[dict] = []
+        self.total: Optional[int] = None
+        self._start = time.perf_counter()
+
+    def add(self, key: str, status: str, outputs: Iterable[str] = (), elapsed: Optional[float] = None):
+        """记录一个文件（status 为 success、failed 或 skipped）"""
+        self.files.append({'file': key, 'status': status, 'outputs': list(outputs), 'time': elapsed})
+
+    def summary(self) -> dict:
+        counts = {status: 0 for status in ('success', 'skipped', 'failed')}
+        for entry in self.files:
+            counts[entry['status']] += 1
+        found = len(self.files)
+        return {'found': found, 'total': self.total if self.total is not None else found, **counts}
+
+    def to_dict(self) -> dict:
+        return {
+            'version': REPORT_VERSION,
+            'shard': {'index': self.shard[0], 'count': self.shard[1]} if self.shard else None,
+            'output': str(self.output_dir.absolute()),
+            'elapsed': time.perf_counter() - self._start,
+            'summary': self.summary(),
+            'files': self.files,
+        }
+
+    def write(self, path: Path):
+        """写出报告（先写临时文件再替换）"""
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+
+def load_reports(paths: Iterable[Path]) -> List[dict]:
+    """读取报告；目录中查找 .md2doc-report*.json
+
+    Raises:
+        ValueError: 文件不是本工具生成的报告
+    """
+    reports = []
+    for path in paths:
+        files = sorted(path.glob(REPORT_GLOB)) if path.is_dir() else [path]
+        for file in files:
+            with open(file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get('version') != REPORT_VERSION:
+                raise ValueError(f"不是有效的运行报告: {file}")
+            data['path'] = str(file)
+            reports.append(data)
+    return reports
+
+
+def merge_reports(reports: List[dict]) -> Tuple[dict, List[str]]:
+    """
+    合并多个分片的报告
+
+    Returns:
+        Tuple[dict, List[str]]: (合并后的报告, 问题列表：缺少的分片、分片数不一致、重复的文件)
+    """
+    problems = []
+    counts = {r['shard']['count'] for r in reports if r.get('shard')}
+    if len(counts) > 1:
+        problems.append(f"分片数不一致: {sorted(counts)}")
+    elif counts:
+        count = counts.pop()
+        present = [r['shard']['index'] for r in reports if r.get('shard')]
+        missing = sorted(set(range(1, count + 1)) - set(present))
+        if missing:
+            problems.append(f"缺少分片: {', '.join(f'{i}/{count}' for i in missing)}")
+        duplicated = sorted({i for i in present if present.count(i) > 1})
+        if duplicated:
+            problems.append(f"重复的分片: {', '.join(f'{i}/{count}' for i in duplicated)}")
+
+    files = sorted((entry for r in reports for entry in r.get('files', [])), key=lambda e: e['file'])
+    seen = set()
+    for entry in files:
+        if entry['file'] in seen:
+            problems.append(f"文件出现在多个分片中: {entry['file']}")
+        seen.add(entry['file'])
+
+    summary = {key: sum(r['summary'].get(key, 0) for r in reports) for key in SUMMARY_KEYS}
+    # 各分片的 total 都是全部文件数
+    summary['total'] = max((r['summary'].get('total', 0) for r in reports), default=0)
+    outputs = sorted({r.get('output') for r in reports if r.get('output')})
+    merged = {
+        'version': REPORT_VERSION,
+        'shard': None,
+        'shards': [r['shard'] for r in reports if r.get('shard')],
+        'output': outputs[0] if len(outputs) == 1 else outputs,
+        'elapsed': max((r.get('elapsed', 0.0) for r in reports), default=0.0),  # 各分片并行运行
+        'summary': summary,
+        'files': files,
+    }
+    return merged, problems
+
+
+def summary_lines(summary: dict, elapsed: float, output) -> List[str]:
+    """批量转换结束时打印的汇总"""
+    lines = ['=' * 60, '转换完成！', f"  找到: {summary['found']}"]
+    if summary.get('total', summary['found']) != summary['found']:
+        lines[-1] += f"（共 {summary['total']} 个文件）"
+    lines += [
+        f"  成功: {summary['success']}",
+        f"  跳过: {summary['skipped']}",
+        f"  失败: {summary['failed']}",
+    ]
+    if 'resumed' in summary:
+        lines.append(f"  恢复: {summary['resumed']}（重试中断的文件 {summary.get('retried', 0)} 个）")
+    lines += [
+        f"  耗时: {elapsed:.2f} 秒",
+        f"  输出: {output}",
+        '=' * 60,
+    ]
+    return lines
+
+
+def main(argv=None) -> int:
+    """md2doc merge-reports 子命令：合并分片报告并打印汇总"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='md2doc merge-reports', description='合并各分片的运行报告（--shard 生成）')
+    parser.add_argument('reports', nargs='+', help='报告文件，或包含 .md2doc-report-*.json 的目录')
+    parser.add_argument('-o', '--output', type=str, metavar='FILE', help='把合并后的报告写入JSON文件')
+    args = parser.parse_args(argv)
+
+    try:
+        reports = load_reports(Path(p) for p in args.reports)
+    except (OSError, ValueError) as e:
+        print(f'✗ {e}', file=sys.stderr)
+        return 1
+    if not reports:
+        print('✗ 未找到运行报告', file=sys.stderr)
+        return 1
+
+    merged, problems = merge_reports(reports)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=1)
+
+    output = merged['output'] if isinstance(merged['output'], str) else ', '.join(merged['output'])
+    print(f"已合并 {len(reports)} 个报告")
+    for line in summary_lines(merged['summary'], merged['elapsed'], output):
+        print(line)
+    for entry in merged['files']:
+        if entry['status'] == 'failed':
+            print(f"  ✗ {entry['file']}")
+    for problem in problems:
+        print(f"⚠ {problem}")
+    return 1 if problems else 0
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+保存 - 把文档写为docx压缩包，并返回内容哈希
+
+保存选项控制压缩方式：默认 DEFLATE（级别6，与 python-docx 相同）；级别1速度最快，
+级别9体积最小（适合归档）；存储模式（store）不压缩，写入最快，适合只作为中间结果的输出。
+写入路径时先写同目录下的临时文件再重命名，输出目录中不会出现写了一半的文件。
+重命名前后各同步一次磁盘（临时文件和所在目录），断电后也不会留下不完整的输出；
+每个文件因此多两次 fsync，只作为中间结果的输出可以关闭（SaveOptions.sync）。
+
+python-docx 的 doc.save() 以当前时间作为压缩包条目的时间戳，同一内容每次保存得到的字节都不同。
+可重现模式（SaveOptions.deterministic）下：
+
+- 条目按固定顺序写入（[Content_Types].xml、_rels/.rels，其余按名称排序）
+- 条目时间戳固定为 SOURCE_DATE_EPOCH（未设置时为 1980-01-01），权限和创建系统固定
+- 核心属性（创建/修改时间、修改者、修订号）固定
+- 每个XML元素的属性按名称排序
+
+相同的输入和配置因此得到逐字节相同的文件，内容哈希可以直接用于去重和缓存。
+"""
+
+import io
+import os
+import time
+import uuid
+import hashlib
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+CONTENT_TYPES_PART = '[Content_Types].xml'
+PACKAGE_RELS_PART = '_rels/.rels'
+
+# 压缩包格式能表示的最早时间
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+COMPRESSION_METHODS = {
+    'deflate': zipfile.ZIP_DEFLATED,
+    'store': zipfile.ZIP_STORED,
+}
+
+
+class SaveOptions(NamedTuple):
+    """保存选项"""
+    deterministic: bool = False  # 可重现输出
+    compression: str = 'deflate'  # 'deflate' 或 'store'（不压缩）
+    level: Optional[int] = None  # DEFLATE 压缩级别 0-9（默认6；0 为不压缩）
+    atomic: bool = True  # 写入路径时先写临时文件再重命名
+    sync: bool = True  # 重命名前后同步到磁盘（见 durable_replace）
+
+    def validate(self) -> 'SaveOptions':
+        """检查选项
+
+        Raises:
+            ValueError: 未知的压缩方式或压缩级别超出范围
+        """
+        if self.compression not in COMPRESSION_METHODS:
+            raise ValueError(f"未知的压缩方式: {self.compression}（可选: {', '.join(COMPRESSION_METHODS)}）")
+        if self.level is not None and not 0 <= self.level <= 9:
+            raise ValueError(f"压缩级别应为 0-9: {self.level}")
+        return self
+
+
+def content_hash(data: bytes) -> str:
+    """内容哈希（SHA-256十六进制）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    """文件的内容哈希（分块读取）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fixed_datetime() -> datetime:
+    """可重现模式使用的时间：环境变量 SOURCE_DATE_EPOCH，未设置时为 1980-01-01（UTC）"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch and epoch.strip().isdigit():
+        return max(datetime.fromtimestamp(int(epoch), timezone.utc), datetime(*ZIP_EPOCH, tzinfo=timezone.utc))
+    return datetime(*ZIP_EPOCH, tzinfo=timezone.utc)
+
+
+def entry_order(name: str) -> Tuple[int, str]:
+    """条目排序键：内容类型和包关系在前，其余按名称"""
+    if name == CONTENT_TYPES_PART:
+        return 0, name
+    if name == PACKAGE_RELS_PART:
+        return 1, name
+    return 2, name
+
+
+def normalize_document(doc):
+    """固定核心属性，并把所有XML部件中元素的属性按名称排序（就地修改）"""
+    moment = fixed_datetime().replace(tzinfo=None)
+    props = doc.core_properties
+    props.created = moment
+    props.modified = moment
+    props.last_modified_by = ''
+    props.revision = 1
+
+    for part in doc.part.package.iter_parts():
+        element = getattr(part, '_element', None)
+        if element is None:
+            continue
+        for node in element.iter():
+            attrib = node.attrib
+            if len(attrib) > 1:
+                items = sorted(attrib.items())
+                attrib.clear()
+                for key, value in items:
+                    attrib[key] = value
+
+
+class _PartCollector:
+    """代替 python-docx 的压缩包写入器，收集未压缩的部件内容"""
+
+    def __init__(self):
+        self.items: List[Tuple[str, bytes]] = []
+
+    def write(self, pack_uri, blob: bytes):
+        self.items.append((pack_uri.membername, blob))
+
+    def close(self):
+        pass
+
+
+def package_items(doc) -> List[Tuple[str, bytes]]:
+    """文档各部件的 (条目名, 内容)，顺序与 doc.save() 相同"""
+    from docx.opc.pkgwriter import PackageWriter as OpcPackageWriter
+
+    package = doc.part.package
+    for part in package.parts:
+        part.before_marshal()
+    collector = _PartCollector()
+    try:
+        OpcPackageWriter._write_content_types_stream(collector, package.parts)
+        OpcPackageWriter._write_pkg_rels(collector, package.rels)
+        OpcPackageWriter._write_parts(collector, package.parts)
+    except AttributeError:
+        # python-docx 内部接口变化时退回到完整保存后再读出
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        with zipfile.ZipFile(buffer) as zf:
+            return [(info.filename, zf.read(info)) for info in zf.infolist()]
+    return collector.items
+
+
+def temp_path(path: Path) -> Path:
+    """同目录下的隐藏临时文件路径（以 . 开头，不会被当作输出文件）"""
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def durable_replace(tmp_path: Path, path: Path, sync: bool = True):
+    """把已写完的临时文件同步到磁盘后替换目标文件，再同步所在目录
+
+    只有 os.replace 而不同步时，断电或系统崩溃后目标文件可能为空或不完整，
+    而运行日志中同步写入的完成记录却已指向它。sync 为False时只做替换。
+    """
+    if not sync:
+        os.replace(tmp_path, path)
+        return
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    try:
+        fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return  # Windows 不能打开目录，替换本身已由文件系统记录
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_target(target: Union[str, Path, BinaryIO], atomic: bool = True,
+                  sync: bool = True) -> Iterator[Union[Path, BinaryIO]]:
+    """
+    原子写入：产出同目录下的临时路径，正常结束后同步到磁盘（sync 为False时不同步）并重命名为目标路径，
+    出错时删除临时文件
+
+    target 为文件对象或 atomic 为False时原样产出。临时文件名以 . 开头，不会被当作输出文件。
+    """
+    if not atomic or not isinstance(target, (str, Path)):
+        yield target
+        return
+    path = Path(target)
+    tmp_path = temp_path(path)
+    try:
+        yield tmp_path
+        durable_replace(tmp_path, path, sync)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class PackageWriter:
+    """docx压缩包写入器
+
+    Args:
+        target: 输出路径或可写的二进制文件对象（写入路径时不做原子替换，见 atomic_target）
+        options: 保存选项
+    """
+
+    def __init__(self, target: Union[str, Path, BinaryIO], options: SaveOptions = SaveOptions()):
+        self.options = options.validate()
+        self._method = COMPRESSION_METHODS[options.compression]
+        self._zip = zipfile.ZipFile(target, 'w', self._method)
+        self._date_time = (fixed_datetime().timetuple()[:6] if options.deterministic
+                           else time.localtime(time.time())[:6])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _info(self, name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, self._date_time)
+        info.compress_type = self._method
+        if self.options.level is not None and self._method == zipfile.ZIP_DEFLATED:
+            # ZipInfo 的压缩级别没有公开属性（Python 3.13 起为 compress_level）
+            setattr(info, 'compress_level' if hasattr(info, 'compress_level') else '_compresslevel',
+                    self.options.level)
+        info.external_attr = 0o600 << 16
+        if self.options.deterministic:
+            info.create_system = 3  # 与运行平台无关
+        return info
+
+    def write(self, name: str, data: bytes):
+        """写入一个条目"""
+        self._zip.writestr(self._info(name), data)
+
+    def open(self, name: str):
+        """以流的方式写入一个条目（用于流式生成的大部件）"""
+        return self._zip.open(self._info(name), 'w')
+
+    def write_all(self, items: Iterable[Tuple[str, bytes]]):
+        """写入全部条目（可重现模式下按固定顺序）"""
+        if self.options.deterministic:
+            items = sorted(items, key=lambda item: entry_order(item[0]))
+        for name, data in items:
+            self.write(name, data)
+
+    def close(self):
+        self._zip.close()
+
+
+def save_document(doc, target: Union[str, Path, BinaryIO], options: SaveOptions = SaveOptions()) -> str:
+    """
+    保存文档
+
+    Args:
+        doc: python-docx 文档对象（可重现模式下会固定其核心属性）
+        target: 输出路径（按 options.atomic 原子写入）或可写的二进制文件对象
+        options: 保存选项
+
+    Returns:
+        str: 写入内容的哈希（SHA-256十六进制）
+    """
+    if options.deterministic:
+        normalize_document(doc)
+    buffer = io.BytesIO()
+    with PackageWriter(buffer, options) as writer:
+        writer.write_all(package_items(doc))
+    data = buffer.getvalue()
+
+    with atomic_target(target, options.atomic, options.sync) as output:
+        if isinstance(output, Path):
+            with open(output, 'wb') as f:
+                f.write(data)
+        else:
+            output.write(data)
+    return content_hash(data)
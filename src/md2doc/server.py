@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+转换服务 - 常驻进程，避免每次请求都重新启动解释器、导入依赖和解析模板
+
+支持两种接入方式：
+- 本地HTTP：POST /convert（请求体为UTF-8 Markdown，返回docx），GET /health，GET /metrics
+- 标准输入输出：每行一个 JSON-RPC 2.0 请求，每行一个响应（docx以base64返回）
+
+转换器放在池中复用，每个并发请求独占一个 MarkdownConverter。
+"""
+
+import sys
+import json
+import time
+import base64
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from .converter import MarkdownConverter
+from .metrics import percentile
+
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+
+class RequestTooLarge(ValueError):
+    """请求超过大小限制"""
+
+
+class ServiceBusy(RuntimeError):
+    """在等待时间内没有空闲的转换器"""
+
+
+class ConverterPool:
+    """MarkdownConverter 实例池（实例在创建时预先构建模板）
+
+    Args:
+        size: 实例数量（即最大并发转换数）
+        converter_options: 传给 MarkdownConverter 的参数
+    """
+
+    def __init__(self, size: int, converter_options: Optional[dict] = None):
+        self.size = max(1, size)
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(self.size):
+            converter = MarkdownConverter(**(converter_options or {}))
+            converter.new_document()  # 预热：加载并构建基础模板
+            self._idle.put(converter)
+
+    @property
+    def available(self) -> int:
+        return self._idle.qsize()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """借出一个转换器，用完自动归还"""
+        try:
+            converter = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise ServiceBusy('没有空闲的转换器') from None
+        try:
+            yield converter
+        finally:
+            self._idle.put(converter)
+
+
+class ConversionService:
+    """转换服务核心：大小限制、转换和统计，与传输方式无关
+
+    Args:
+        workers: 转换器池大小
+        max_bytes: 单个请求的Markdown最大字节数
+        acquire_timeout: 等待空闲转换器的最长时间（秒）
+        converter_options: 传给 MarkdownConverter 的参数
+        logger: 日志记录器
+    """
+
+    def __init__(self, workers: int = 2, max_bytes: int = DEFAULT_MAX_BYTES, acquire_timeout: float = 30.0,
+                 converter_options: Optional[dict] = None, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self.acquire_timeout = acquire_timeout
+        self.pool = ConverterPool(workers, converter_options)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._counters = {'requests': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0,
+                          'bytes_in': 0, 'bytes_out': 0, 'in_flight': 0}
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counters[name] += delta
+
+    def reject(self):
+        """记录一个未进入转换就被拒绝的请求"""
+        self._count(requests=1, rejected=1)
+
+    def convert(self, data: bytes) -> Tuple[str, bytes]:
+        """
+        转换Markdown
+
+        Args:
+            data: UTF-8编码的Markdown
+
+        Returns:
+            Tuple[str, bytes]: (标题, docx内容)
+
+        Raises:
+            RequestTooLarge: 超过大小限制
+            ServiceBusy: 没有空闲的转换器
+            ValueError: 内容不是有效的UTF-8
+        """
+        self._count(requests=1)
+        if len(data) > self.max_bytes:
+            self._count(rejected=1)
+            raise RequestTooLarge(f'请求大小 {len(data)} 字节超过限制 {self.max_bytes} 字节')
+        try:
+            text = data.decode('utf-8-sig')
+        except UnicodeDecodeError as e:
+            self._count(rejected=1)
+            raise ValueError(f'内容不是有效的UTF-8: {e}') from None
+
+        start = time.perf_counter()
+        self._count(in_flight=1)
+        try:
+            with self.pool.acquire(self.acquire_timeout) as converter:
+                output, title = converter.convert_text(text)
+        except ServiceBusy:
+            self._count(rejected=1)
+            raise
+        except Exception:
+            self._count(failed=1)
+            raise
+        finally:
+            self._count(in_flight=-1)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._counters['succeeded'] += 1
+            self._counters['bytes_in'] += len(data)
+            self._counters['bytes_out'] += len(output)
+        self.logger.info(f"✓ 转换: {title}（{len(data)} → {len(output)} 字节，{elapsed * 1000:.0f} ms）")
+        return title, output
+
+    def health(self) -> dict:
+        return {
+            'status': 'ok',
+            'workers': self.pool.size,
+            'available': self.pool.available,
+            'uptime': round(time.time() - self.started, 3),
+        }
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = list(self._latencies)
+        counters['latency'] = {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'max': max(latencies) if latencies else None,
+        }
+        counters.update(self.health())
+        return counters
+
+
+# ==================== HTTP ====================
+
+class _Handler(BaseHTTPRequestHandler):
+    service: ConversionService = None  # 由 make_http_server() 设置
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        self.service.logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/health':
+            self._send_json(200, self.service.health())
+        elif path == '/metrics':
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {'error': f'未知路径: {path}'})
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path != '/convert':
+            self.close_connection = True
+            self._send_json(404, {'error': f'未知路径: {path}'})
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            self._send_json(411, {'error': '缺少 Content-Length'})
+            return
+        if int(length) > self.service.max_bytes:
+            # 不读取过大的请求体，直接关闭连接
+            self.close_connection = True
+            self.service.reject()
+            self._send_json(413, {'error': f'请求大小超过限制 {self.service.max_bytes} 字节'})
+            return
+
+        data = self.rfile.read(int(length))
+        try:
+            title, output = self.service.convert(data)
+        except RequestTooLarge as e:
+            self._send_json(413, {'error': str(e)})
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)})
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.service.logger.error(f"✗ 转换失败: {e}")
+            self._send_json(500, {'error': str(e)})
+        else:
+            filename = quote(f'{title}.docx')
+            self._send(200, output, DOCX_MIME, {
+                'Content-Disposition': f"attachment; filename*=UTF-8''{filename}",
+                'X-Md2doc-Title': quote(title),
+            })
+
+
+def make_http_server(service: ConversionService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """创建HTTP服务（调用 serve_forever() 开始处理请求）"""
+    handler = type('Handler', (_Handler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# ==================== JSON-RPC（标准输入输出） ====================
+
+# JSON-RPC 错误码
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+CONVERSION_FAILED = -32000
+REQUEST_TOO_LARGE = -32001
+SERVER_BUSY = -32002
+
+
+def _rpc_error(request_id, code: int, message: str) -> dict:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def handle_rpc(service: ConversionService, request) -> dict:
+    """处理单个 JSON-RPC 请求
+
+    方法：
+    - convert：params 为 {"markdown": "..."}，返回 {"title": ..., "docx": base64}
+    - health / metrics：无参数
+    """
+    if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' or 'method' not in request:
+        return _rpc_error(request.get('id') if isinstance(request, dict) else None, INVALID_REQUEST, '无效的请求')
+
+    request_id = request.get('id')
+    method = request['method']
+    params = request.get('params') or {}
+
+    if method == 'health':
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': service.health()}
+    if method == 'metrics':
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': service.metrics()}
+    if method != 'convert':
+        return _rpc_error(request_id, METHOD_NOT_FOUND, f'未知方法: {method}')
+
+    markdown = params.get('markdown') if isinstance(params, dict) else None
+    if not isinstance(markdown, str):
+        return _rpc_error(request_id, INVALID_PARAMS, '缺少参数 markdown')
+    try:
+        title, output = service.convert(markdown.encode('utf-8'))
+    except RequestTooLarge as e:
+        return _rpc_error(request_id, REQUEST_TOO_LARGE, str(e))
+    except ServiceBusy as e:
+        return _rpc_error(request_id, SERVER_BUSY, str(e))
+    except Exception as e:
+        service.logger.error(f"✗ 转换失败: {e}")
+        return _rpc_error(request_id, CONVERSION_FAILED, str(e))
+    return {'jsonrpc': '2.0', 'id': request_id,
+            'result': {'title': title, 'docx': base64.b64encode(output).decode('ascii')}}
+
+
+def _discard_line(stdin, line: str, chunk: int = 1 << 16):
+    """分块跳过超长行的剩余部分（直到换行或输入结束）"""
+    while line and not line.endswith('\n'):
+        line = stdin.readline(chunk)
+
+
+def serve_stdio(service: ConversionService, stdin=None, stdout=None):
+    """从标准输入逐行读取 JSON-RPC 请求，并发处理，按完成顺序逐行输出响应（以 id 对应）"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+    # 单行长度上限：base64 之外的JSON转义可能使文本膨胀，留出余量
+    max_line = service.max_bytes * 6 + 4096
+
+    def respond(response: dict):
+        line = json.dumps(response, ensure_ascii=False)
+        with write_lock:
+            stdout.write(line + '\n')
+            stdout.flush()
+
+    # 处理中的请求数不超过转换器数量：名额用完时先不读取下一行，已解析的请求不会在内存中无限堆积
+    slots = threading.Semaphore(service.pool.size)
+
+    def process(request):
+        try:
+            respond(handle_rpc(service, request))
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=service.pool.size) as executor:
+        while True:
+            slots.acquire()
+            submitted = False
+            try:
+                # 每次最多读取上限加一个字符，超长的行不会整行读入内存
+                line = stdin.readline(max_line + 1)
+                if not line:
+                    break
+                if len(line) > max_line:
+                    _discard_line(stdin, line)
+                    service.reject()
+                    respond(_rpc_error(None, REQUEST_TOO_LARGE, '请求行超过大小限制'))
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    respond(_rpc_error(None, PARSE_ERROR, f'JSON解析失败: {e}'))
+                    continue
+                executor.submit(process, request)
+                submitted = True
+            finally:
+                if not submitted:
+                    slots.release()
+
+
+def serve_main(argv=None):
+    """md2doc serve 子命令入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='md2doc serve',
+        description='常驻转换服务（本地HTTP或标准输入输出 JSON-RPC）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 在 127.0.0.1:8765 上提供HTTP服务
+  md2doc serve
+  curl --data-binary @文档.md http://127.0.0.1:8765/convert -o 文档.docx
+
+  # 通过标准输入输出通信（每行一个 JSON-RPC 请求）
+  echo '{"jsonrpc": "2.0", "id": 1, "method": "convert", "params": {"markdown": "# 标题"}}' | md2doc serve --stdio
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    parser.add_argument('--stdio', action='store_true', help='使用标准输入输出的 JSON-RPC 协议代替HTTP')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='转换器池大小/最大并发数 (默认: 2)')
+    parser.add_argument('--max-size', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help='单个请求的最大大小（MB，默认: 10）')
+    parser.add_argument('-t', '--template', type=str, help='Word模板文件 (.dotx/.docx)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示详细日志')
+    args = parser.parse_args(argv)
+
+    # 标准输出用于协议数据时，日志只能写到标准错误
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S',
+                        handlers=[logging.StreamHandler(sys.stderr)])
+    logger = logging.getLogger('md2doc.server')
+
+    converter_options = {}
+    if args.template:
+        if not Path(args.template).exists():
+            logger.error(f"模板文件不存在: {args.template}")
+            sys.exit(1)
+        converter_options['template'] = Path(args.template)
+
+    service = ConversionService(args.workers, int(args.max_size * 1024 * 1024),
+                                converter_options=converter_options, logger=logger)
+    try:
+        if args.stdio:
+            logger.info(f"转换服务已就绪（stdio，{service.pool.size} 个转换器）")
+            serve_stdio(service)
+        else:
+            server = make_http_server(service, args.host, args.port)
+            logger.info(f"转换服务已就绪: http://{args.host}:{server.server_address[1]}（{service.pool.size} 个转换器）")
+            try:
+                server.serve_forever()
+            finally:
+                server.server_close()
+    except KeyboardInterrupt:
+        logger.info('服务已停止')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+分片 - 把批量转换的文件确定性地分配到多台机器上
+
+各机器对同一目录树得到相同的文件列表（相对路径）和大小，按“最长处理时间优先”分配：
+文件按大小从大到小（大小相同按路径）依次分给当前总大小最小的分片（相同时取编号小的）。
+因此无需协调，每台机器都能独立算出相同的划分，且各分片的总大小大致均衡。
+"""
+
+import heapq
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    解析分片参数 'i/N'（i 从1开始）
+
+    Raises:
+        ValueError: 格式错误或 i 不在 1..N 范围内
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"分片格式应为 i/N（如 2/4）: {spec}") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"分片编号应在 1 到 {count} 之间: {spec}")
+    return index, count
+
+
+def assign_shards(sizes: Dict[str, int], count: int) -> Dict[str, int]:
+    """
+    把文件分配到分片
+
+    Args:
+        sizes: 相对路径 -> 文件大小
+        count: 分片数
+
+    Returns:
+        Dict[str, int]: 相对路径 -> 分片编号（从1开始）
+    """
+    loads = [(0, index) for index in range(1, count + 1)]
+    assignment = {}
+    for key in sorted(sizes, key=lambda k: (-sizes[k], k)):
+        load, index = heapq.heappop(loads)
+        assignment[key] = index
+        heapq.heappush(loads, (load + sizes[key], index))
+    return assignment
+
+
+def select_shard(md_files: Iterable[Path], root: Path, index: int, count: int) -> Tuple[List[Path], int]:
+    """
+    选出属于指定分片的文件（需要先完成整个目录的遍历）
+
+    Args:
+        md_files: 发现的全部源文件
+        root: 输入目录（分配按相对路径进行，与各机器上的挂载位置无关）
+        index: 分片编号（从1开始）
+        count: 分片数
+
+    Returns:
+        Tuple[List[Path], int]: (本分片的文件（保持发现顺序）, 全部文件数)
+    """
+    files: List[Path] = []
+    sizes: Dict[str, int] = {}
+    for md_file in md_files:
+        key = md_file.relative_to(root).as_posix()
+        try:
+            sizes[key] = md_file.stat().st_size
+        except OSError:
+            continue
+        files.append(md_file)
+    assignment = assign_shards(sizes, count)
+    return [f for f in files if assignment[f.relative_to(root).as_posix()] == index], len(files)
+
+
+def shard_loads(sizes: Dict[str, int], assignment: Dict[str, int], count: int) -> Sequence[int]:
+    """各分片的总大小（用于检查均衡程度）"""
+    loads = [0] * count
+    for key, index in assignment.items():
+        loads[index - 1] += sizes[key]
+    return loads
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+源文件读取 - 内存映射源文件，增量解码并惰性产出文本行
+
+源文件通过 mmap 映射，按块交给增量解码器，解码得到的文本按行切分后逐行产出，
+任何时候只有一个块的文本驻留内存，不需要同时保存整个文件的原始内容和全部行。
+文档主标题在同一次遍历中记录，不必为取标题再读一遍文件。
+
+编码：默认UTF-8（有BOM时去除）。可以指定后备编码（如 GB18030）：UTF-8 解码失败时，
+如果此前读到的内容都是ASCII（与后备编码一致），就从出错的位置起改用后备编码继续解码；
+此前已出现非ASCII的UTF-8文本则说明文件本身有误，照常抛出 UnicodeDecodeError。
+换行与文本模式读取一致：\\r\\n 和单独的 \\r 都视为换行。
+"""
+
+import mmap
+import time
+import codecs
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from .parser import title_from_line
+
+# 每次交给解码器的字节数
+CHUNK_SIZE = 1 << 20
+
+
+class SourceFile:
+    """Markdown源文件（可迭代，产出不带换行符的文本行）
+
+    Args:
+        path: 源文件路径
+        fallback: 可选，UTF-8 解码失败时使用的后备编码（如 'gb18030'）
+        chunk_size: 每次解码的字节数
+
+    Attributes:
+        encoding: 实际使用的编码（遍历结束后有效）
+        read_time: 读取和解码累计耗时（秒）；行是惰性产出的，这部分耗时发生在调用方的遍历过程中
+    """
+
+    def __init__(self, path: Union[str, Path], fallback: Optional[str] = None, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(path)
+        self.fallback = fallback
+        self.chunk_size = chunk_size
+        self.encoding = 'utf-8'
+        self.read_time = 0.0
+        self._title: Optional[str] = None
+
+    @property
+    def title(self) -> str:
+        """文档主标题（第一个以 # 开头的行）；遍历到该行之前或文件中没有标题时为 '未命名文档'"""
+        return self._title or '未命名文档'
+
+    @property
+    def has_title(self) -> bool:
+        """是否已读到标题行"""
+        return self._title is not None
+
+    def contains(self, needle: bytes) -> bool:
+        """源文件中是否出现某个ASCII字节串（直接在映射上查找，不解码；UTF-8 与后备编码中ASCII字节含义相同）"""
+        with open(self.path, 'rb') as f:
+            if not f.seek(0, 2):
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(needle) != -1
+
+    def __iter__(self) -> Iterator[str]:
+        lines = self._lines()
+        if self._title is None:
+            for line in lines:
+                self._title = title_from_line(line)
+                yield line
+                if self._title is not None:
+                    break
+        # 读到标题后不再逐行检查
+        yield from lines
+
+    def _lines(self) -> Iterator[str]:
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, 2)
+            if not size:
+                return  # 空文件不能映射
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                yield from self._decode(view, size)
+
+    def _decode(self, view: memoryview, size: int) -> Iterator[str]:
+        pos = 0
+        if view[:3] == codecs.BOM_UTF8:
+            self.encoding = 'utf-8-sig'
+            pos = 3
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        ascii_only = pos == 0  # BOM 表明文件是UTF-8，不再尝试后备编码
+        pending = ''
+
+        while True:
+            start = time.perf_counter()
+            end = min(pos + self.chunk_size, size)
+            final = end == size
+            buffered = decoder.getstate()[0]
+            try:
+                with view[pos:end] as chunk:
+                    text = decoder.decode(chunk, final)
+            except UnicodeDecodeError as e:
+                # 出错位置之前在本块中解码成功的部分也须是ASCII
+                if not (self.fallback and ascii_only and self.encoding == 'utf-8' and e.object[:e.start].isascii()):
+                    raise
+                # 此前全是ASCII：从本块起（含解码器中缓存的不完整字节）改用后备编码
+                pos -= len(buffered)
+                self.encoding = self.fallback
+                decoder = codecs.getincrementaldecoder(self.fallback)()
+                continue
+            if ascii_only and not text.isascii():
+                ascii_only = False
+            pos = end
+
+            lines, pending = self._split(pending + text, final)
+            self.read_time += time.perf_counter() - start
+            yield from lines
+            if final:
+                break
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _split(text: str, final: bool):
+        """按行切分，返回 (完整的行, 末尾不完整的部分)"""
+        hold = ''
+        if '\r' in text:
+            if not final and text.endswith('\r'):
+                text, hold = text[:-1], '\r'  # 可能与下一块开头的 \n 组成 \r\n
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        lines: List[str] = text.split('\n')
+        return lines, lines.pop() + hold
+
+
+def read_lines(path: Union[str, Path], fallback: Optional[str] = None) -> List[str]:
+    """读取源文件的全部行（整个文件解码成功后才返回，适合需要先确认可读的场合）"""
+    return list(SourceFile(path, fallback))
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+拆分输出 - 把超大的Markdown按一级标题（##）或块数/字节预算拆成多个Word文档
+
+源文件逐行解析、逐块分组，任何时候只有正在渲染的几个分块驻留内存。各分块使用同一
+ConverterConfig 渲染（页面设置和样式一致），并重复文档主标题；可在多个进程中并发渲染。
+输出目录中另写一个JSON索引，列出各部分的文件名、起始标题和块数。
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .parser import Block, Title, extract_title_from_md
+from .save import atomic_target
+
+
+class SplitOptions(NamedTuple):
+    """拆分规则（满足任一条件即开始新的部分）"""
+    by_heading: bool = True  # 在每个一级标题（##）处拆分
+    max_blocks: Optional[int] = None  # 每部分最多块数
+    max_bytes: Optional[int] = None  # 每部分最多文本字节数（UTF-8）
+    jobs: Optional[int] = None  # 并发渲染的进程数（默认: CPU核心数）
+
+
+def block_size(block: Block) -> int:
+    """块的文本字节数（用于字节预算）"""
+    if block.kind == 'table':
+        return sum(len(cell.encode('utf-8')) for row in block.rows for cell in row)
+    if block.kind == 'code':
+        return sum(len(line.encode('utf-8')) for line in block.lines)
+    return len(getattr(block, 'text', '').encode('utf-8'))
+
+
+def iter_chunks(blocks: Iterable[Block], options: SplitOptions) -> Iterator[List[Block]]:
+    """把块流分组为各部分
+
+    按标题拆分时，只有主标题等前言内容的部分会与第一章合并；单个块超过预算时单独成为一部分。
+    """
+    chunk: List[Block] = []
+    size = 0
+    has_content = False
+    for block in blocks:
+        bsize = block_size(block)
+        boundary = (
+            (options.by_heading and block.kind == 'heading' and block.level == 1 and has_content)
+            or (options.max_blocks and len(chunk) >= options.max_blocks)
+            or (options.max_bytes and chunk and size + bsize > options.max_bytes)
+        )
+        if boundary and chunk:
+            yield chunk
+            chunk, size, has_content = [], 0, False
+        chunk.append(block)
+        size += bsize
+        has_content = has_content or block.kind != 'title'
+    if chunk:
+        yield chunk
+
+
+def chunk_heading(chunk: List[Block]) -> Optional[str]:
+    """部分的起始标题（第一个一级标题）"""
+    for block in chunk:
+        if block.kind == 'heading' and block.level == 1:
+            return block.text
+    return None
+
+
+# ==================== 并发渲染 ====================
+
+_worker_converter = None
+
+
+def _init_worker(converter_options: dict):
+    import signal
+    global _worker_converter
+    # Ctrl-C 由主进程统一处理
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from .converter import MarkdownConverter
+    _worker_converter = MarkdownConverter(**converter_options)
+
+
+def _render_chunk(blocks: List[Block], path: Path) -> Tuple[int, str]:
+    digest = _worker_converter.write_blocks(blocks, path)
+    return path.stat().st_size, digest
+
+
+def split_convert(md_file: Path, output_dir: Path, converter, options: SplitOptions,
+                  logger: Optional[logging.Logger] = None, digests: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    拆分转换单个Markdown文件
+
+    Args:
+        md_file: Markdown文件路径
+        output_dir: 输出目录
+        converter: 转换器实例（串行渲染时直接使用，并发时以其配置创建工作进程中的转换器）
+        options: 拆分规则
+        logger: 日志记录器
+        digests: 可选，填入各部分docx的内容哈希（文件名 -> SHA-256）
+
+    Returns:
+        List[str]: 生成的文件名（各部分的docx，最后一项为索引文件）
+    """
+    import multiprocessing
+    from .parallel import default_jobs
+
+    logger = logger or logging.getLogger(__name__)
+    source = converter.open_source(md_file)
+    title = None
+    parts = []
+
+    def chunks():
+        nonlocal title
+        title_block = None
+        for index, chunk in enumerate(iter_chunks(converter.source_blocks(source), options), 1):
+            if title is None:
+                # 标题行通常在第一部分中，与解析在同一次遍历中读到；否则才另外查找
+                title = source.title if source.has_title else extract_title_from_md(md_file,
+                                                                                   converter.encoding_fallback)
+            if title_block is None and isinstance(chunk[0], Title):
+                title_block = chunk[0]
+            elif title_block is not None and not isinstance(chunk[0], Title):
+                chunk.insert(0, title_block)  # 每部分都带文档主标题
+            path = output_dir / f"{title}_{index:03d}.docx"
+            parts.append({'index': index, 'file': path.name, 'heading': chunk_heading(chunk),
+                          'blocks': len(chunk), 'bytes': sum(map(block_size, chunk))})
+            yield index, chunk, path
+
+    # 工作进程（守护进程）不能再创建子进程，此时退回到串行渲染
+    jobs = (options.jobs or default_jobs()) if not multiprocessing.current_process().daemon else 1
+    def done(index, size, digest):
+        parts[index - 1]['output_bytes'] = size
+        parts[index - 1]['sha256'] = digest
+
+    if jobs <= 1:
+        for index, chunk, path in chunks():
+            digest = converter.write_blocks(chunk, path)
+            done(index, path.stat().st_size, digest)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+        converter_options = {'config': converter.config, 'template': converter.template_path,
+                             'stream': converter.stream, 'save_options': converter.save_options,
+                             'memory': converter.memory, 'images': converter.image_options}
+        with ProcessPoolExecutor(jobs, multiprocessing.get_context(), _init_worker, (converter_options,)) as pool:
+            running = {}
+            for index, chunk, path in chunks():
+                # 限制同时在途的分块数，避免整个文件的块都堆积在内存中
+                while len(running) >= jobs * 2:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done(running.pop(future), *future.result())
+                running[pool.submit(_render_chunk, chunk, path)] = index
+            for future, index in running.items():
+                done(index, *future.result())
+
+    title = title or source.title
+    manifest = output_dir / f"{title}_index.json"
+    with atomic_target(manifest, converter.save_options.atomic,
+                       converter.save_options.sync) as path, open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'source': md_file.name,
+            'title': title,
+            'split': {'by_heading': options.by_heading, 'max_blocks': options.max_blocks,
+                      'max_bytes': options.max_bytes},
+            'parts': parts,
+        }, f, ensure_ascii=False, indent=2)
+
+    if digests is not None:
+        digests.update((part['file'], part['sha256']) for part in parts)
+    logger.info(f"  拆分为 {len(parts)} 个部分，索引: {manifest.name}")
+    return [part['file'] for part in parts] + [manifest.name]
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时 - 基于 python -X importtime 统计模块导入耗时，并检查启动预算
+
+命令行工具的 --help、参数错误、--check 和空目录等路径不应加载 python-docx 或 docx2pdf，
+这些依赖只在真正生成文档时才导入。
+"""
+
+import sys
+import subprocess
+from typing import List, NamedTuple, Optional
+
+# import md2doc.cli 的累计导入耗时预算（毫秒，不含解释器本身的启动）
+STARTUP_BUDGET_MS = 150
+
+# 启动时不应加载的重量级依赖
+HEAVY_MODULES = ('docx', 'docx2pdf', 'lxml')
+
+
+class ImportTiming(NamedTuple):
+    """单个模块的导入耗时（微秒）"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure_import(module: str = 'md2doc.cli', src_path: Optional[str] = None) -> List[ImportTiming]:
+    """
+    在新的解释器中导入模块，解析 -X importtime 的输出
+
+    Args:
+        module: 要导入的模块
+        src_path: 可选，加入 sys.path 的源码目录
+
+    Returns:
+        List[ImportTiming]: 按导入完成顺序排列的耗时记录（最后一项为 module 本身）
+    """
+    code = f'import {module}'
+    if src_path:
+        code = f'import sys; sys.path.insert(0, {src_path!r}); ' + code
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        raise RuntimeError(f'导入 {module} 失败: {result.stderr.strip().splitlines()[-1:]}')
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        timings.append(ImportTiming(stripped, int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+def total_ms(timings: List[ImportTiming], module: str) -> float:
+    """指定模块（含其依赖）的累计导入耗时（毫秒）"""
+    for timing in reversed(timings):
+        if timing.name == module:
+            return timing.cumulative_us / 1000
+    return 0.0
+
+
+def heavy_imports(timings: List[ImportTiming]) -> List[str]:
+    """被加载的重量级依赖"""
+    return sorted({t.name for t in timings if t.name.split('.')[0] in HEAVY_MODULES})
+
+
+def main(argv=None) -> int:
+    """md2doc importtime 子命令：打印导入耗时排行并检查预算"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='md2doc importtime', description='统计模块导入耗时（python -X importtime）')
+    parser.add_argument('module', nargs='?', default='md2doc.cli', help='要统计的模块 (默认: md2doc.cli)')
+    parser.add_argument('-n', '--top', type=int, default=15, help='显示耗时最多的模块数 (默认: 15)')
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_MS,
+                        help=f'累计耗时预算（毫秒，默认: {STARTUP_BUDGET_MS}）')
+    args = parser.parse_args(argv)
+
+    if getattr(sys, 'frozen', False):
+        print('打包后的可执行文件不支持 -X importtime，请使用 Python 源码运行')
+        return 1
+
+    from pathlib import Path
+    timings = measure_import(args.module, str(Path(__file__).parent.parent))
+
+    print(f"{'自身(ms)':>10}{'累计(ms)':>10}  模块")
+    for timing in sorted(timings, key=lambda t: t.self_us, reverse=True)[:args.top]:
+        print(f"{timing.self_us / 1000:>10.1f}{timing.cumulative_us / 1000:>10.1f}  {'  ' * timing.depth}{timing.name}")
+
+    total = total_ms(timings, args.module)
+    heavy = heavy_imports(timings)
+    print()
+    print(f"{args.module} 累计导入耗时: {total:.1f} ms（预算 {args.budget:g} ms）")
+    if heavy:
+        print(f"✗ 启动时加载了重量级依赖: {', '.join(heavy)}")
+    if total > args.budget:
+        print('✗ 超出预算')
+    return 1 if heavy or total > args.budget else 0
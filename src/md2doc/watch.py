@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+目录监视 - 检测输入目录中Markdown文件的新建、修改和删除
+
+Linux 上通过 ctypes 直接使用 inotify，其他平台（或 inotify 不可用时）退回到定时扫描。
+编辑器保存文件时往往连续触发多个事件，debounced() 会把它们合并为一批。
+
+监视的文件与批量转换相同（见 discover）：递归时监视整个目录树（隐藏目录、被排除的目录和输出目录除外），
+并按包含/排除模式筛选。报告的是相对输入目录的路径（posix格式），与增量缓存的键一致。
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple
+
+from .discover import (  # noqa: F401  MARKDOWN_SUFFIXES、is_markdown_name 仍可从本模块导入
+    MARKDOWN_SUFFIXES, is_markdown_name, accepts, enters_directory, iter_directories, iter_sources, skip_set,
+)
+
+
+class PollingWatcher:
+    """定时扫描目录，比较文件的大小和修改时间
+
+    Args:
+        directory: 监视的目录
+        interval: 扫描间隔（秒）
+        recursive: 是否监视子目录
+        include: 包含模式
+        exclude: 排除模式（文件或目录）
+        skip_dirs: 不监视的目录（如位于输入目录中的输出目录）
+    """
+
+    def __init__(self, directory: Path, interval: float = 0.5, recursive: bool = False,
+                 include: Sequence[str] = (), exclude: Sequence[str] = (), skip_dirs: Iterable[Path] = ()):
+        self.directory = directory
+        self.interval = interval
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.skip_dirs = list(skip_dirs)
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            for path in iter_sources(self.directory, self.recursive, self.include, self.exclude, self.skip_dirs):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                snapshot[path.relative_to(self.directory).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """等待变化，返回发生变化的文件（相对路径，超时返回空集合）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            old, self._snapshot = self._snapshot, snapshot
+            changed = {name for name in old.keys() | snapshot.keys() if old.get(name) != snapshot.get(name)}
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """基于 Linux inotify 的目录监视（通过 ctypes 调用 libc，无需第三方依赖）
+
+    inotify 只监视单个目录：递归时为每个子目录各添加一个监视，新建或移入的子目录随即加入监视。
+    事件队列溢出或子目录新建、移入、删除、移出时 wait() 返回 None，调用方应重新扫描整个目录
+    （子目录移入时其中已有文件，不会再产生文件事件）。
+
+    Args:
+        directory: 监视的目录
+        recursive, include, exclude, skip_dirs: 同 PollingWatcher
+
+    Raises:
+        OSError: 当前系统不支持 inotify
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, directory: Path, recursive: bool = False, include: Sequence[str] = (),
+                 exclude: Sequence[str] = (), skip_dirs: Iterable[Path] = ()):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, '仅 Linux 支持 inotify')
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'libc 不提供 inotify')
+
+        self.directory = directory
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.skip_dirs = list(skip_dirs)
+        self._skip = skip_set(self.skip_dirs)
+        self._libc = libc
+        self._get_errno = ctypes.get_errno
+        self._prefixes: Dict[int, str] = {}  # 监视描述符 -> 目录相对输入目录的前缀
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        try:
+            self._add_watch(directory, '')
+            if recursive:
+                self._add_tree(directory, '')
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self, path: Path, prefix: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), self.MASK)
+        if wd < 0:
+            err = self._get_errno()
+            raise OSError(err, os.strerror(err))
+        self._prefixes[wd] = prefix
+
+    def _add_tree(self, path: Path, prefix: str):
+        """监视 path 下递归会进入的全部子目录（path 本身已监视）"""
+        for directory, sub_prefix in iter_directories(path, self.exclude, self.skip_dirs, prefix):
+            if directory == path:
+                continue
+            try:
+                self._add_watch(directory, sub_prefix)
+            except OSError:
+                pass  # 目录已被删除或无权访问
+
+    def _remove_tree(self, prefix: str):
+        """移出的子目录的监视仍指向原目录：连同其下的子目录一起移除"""
+        for wd, value in list(self._prefixes.items()):
+            if value.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._prefixes[wd]
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """等待事件，返回涉及的文件（相对路径；超时返回空集合，需要重新扫描时返回None）"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        rescan = False
+        offset = 0
+        size = self._EVENT.size
+        while offset + size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += size
+            name = data[offset:offset + length].rstrip(b'\0').decode(sys.getfilesystemencoding(), 'surrogateescape')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            if mask & self.IN_IGNORED:
+                self._prefixes.pop(wd, None)  # 目录已删除
+                continue
+            prefix = self._prefixes.get(wd)
+            if prefix is None:
+                continue
+            rel_path = prefix + name
+            if mask & self.IN_ISDIR:
+                if not self.recursive:
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    path = self.directory / rel_path
+                    if enters_directory(rel_path, path, self.exclude, self._skip):
+                        try:
+                            self._add_watch(path, rel_path + '/')
+                            self._add_tree(path, rel_path + '/')
+                        except OSError:
+                            continue
+                        rescan = True
+                elif mask & self.IN_MOVED_FROM:
+                    self._remove_tree(rel_path + '/')
+                    rescan = True
+                elif mask & self.IN_DELETE:
+                    rescan = True
+                continue
+            if accepts(rel_path, self.include, self.exclude):
+                names.add(rel_path)
+        return None if rescan else names
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(directory: Path, interval: float = 0.5, logger: Optional[logging.Logger] = None,
+                   recursive: bool = False, include: Sequence[str] = (), exclude: Sequence[str] = (),
+                   skip_dirs: Iterable[Path] = ()):
+    """优先使用 inotify，不可用时退回到定时扫描（筛选参数同 discover.iter_sources）"""
+    logger = logger or logging.getLogger(__name__)
+    try:
+        watcher = InotifyWatcher(directory, recursive, include, exclude, skip_dirs)
+        logger.debug("目录监视: inotify")
+        return watcher
+    except OSError as e:
+        logger.debug(f"目录监视: 定时扫描（inotify 不可用: {e}）")
+        return PollingWatcher(directory, interval, recursive, include, exclude, skip_dirs)
+
+
+def debounced(watcher, delay: float = 0.3, idle: float = 1.0) -> Iterator[Optional[Set[str]]]:
+    """把连续的事件合并为一批：最后一个事件之后静默 delay 秒才产出
+
+    Args:
+        watcher: create_watcher() 返回的监视器
+        delay: 合并窗口（秒）
+        idle: 无事件时的等待粒度（秒），用于及时响应 Ctrl-C
+
+    Yields:
+        Set[str]: 发生变化的文件（相对路径）；None 表示需要全量重新扫描
+    """
+    pending: Set[str] = set()
+    rescan = False
+    while True:
+        names = watcher.wait(delay if (pending or rescan) else idle)
+        if names is None:
+            rescan = True
+        elif names:
+            pending |= names
+        elif rescan:
+            rescan = False
+            pending = set()
+            yield None
+        elif pending:
+            batch, pending = pending, set()
+            yield batch
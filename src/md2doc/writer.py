@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+流式OOXML写入 - 边解析边把 word/document.xml 写入docx压缩包
+
+不构建python-docx对象模型，内存占用与文档大小无关。段落和表格的XML结构、
+样式引用与 MarkdownConverter 的渲染结果一致，其余部件直接复制自基础模板。
+
+嵌入图片时，图片部件、图片关系和图片格式的内容类型要等正文写完才能确定：
+这几个部件推迟到 document.xml 之后按条目顺序写入。可重现模式要求固定的条目顺序
+（内容类型和文档关系排在正文之前，与非流式保存相同），正文因此先写入临时文件，再按顺序写出全部条目。
+"""
+
+import copy
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+from docx.oxml.ns import qn
+from lxml import etree
+
+from .converter import DocumentTemplate, block_style_key, SEPARATOR_TEXT
+from .ooxml import run_xml, paragraph_xml, table_xml, block_width  # noqa: F401  仍可从本模块导入
+from .ooxml import page_break_xml, section_break_xml, sect_pr_xml, image_xml
+from .images import ImageProcessor, ProcessedImage, placeholder
+from .parser import Block
+from .save import SaveOptions, PackageWriter, atomic_target, package_items, normalize_document, entry_order
+from .save import CONTENT_TYPES_PART
+
+DOCUMENT_PART = 'word/document.xml'
+DOCUMENT_RELS_PART = 'word/_rels/document.xml.rels'
+
+_RELS_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_CONTENT_TYPES_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/content-types'
+_IMAGE_RELATIONSHIP = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+
+# 分段写入压缩包的缓冲大小
+_FLUSH_SIZE = 1 << 16
+
+# 可重现模式下嵌入图片时，正文暂存在内存中的上限（超过后转存到临时文件）
+_SPOOL_SIZE = 1 << 23
+
+_STREAM_MARKER = 'md2doc-stream'
+
+
+# ==================== 流式写入器 ====================
+
+class StreamingDocxWriter:
+    """流式docx写入器
+
+    基础模板只序列化一次：document.xml 被拆成正文之前和 sectPr 开始之后两段，
+    写入时在两段之间逐块追加段落和表格XML；其余部件原样复制。
+
+    Args:
+        template: 基础文档模板
+        options: 保存选项（可重现模式下模板的核心属性会被固定）
+    """
+
+    def __init__(self, template: DocumentTemplate, options: SaveOptions = SaveOptions()):
+        self.template = template
+        self.options = options
+        if options.deterministic:
+            normalize_document(template.document)
+        self.style_ids = template.style_ids
+        self.table_style_id = template.table_style_id
+        self.block_width = block_width(template.document)
+        self._sect_pr = sect_pr_xml(template.document)
+        self._head, self._tail = self._split_document_xml(template.document)
+        self._items = package_items(template.document)
+        if options.deterministic:
+            self._items.sort(key=lambda item: entry_order(item[0]))
+        self._first_shape_id = template.document.part.next_id
+        self._images: Optional[ImageProcessor] = None
+        self._media: Dict[str, Tuple[str, str, ProcessedImage]] = {}  # 内容哈希 -> (关系ID, 条目名, 图片)
+        self._shape_id = 0
+
+    @staticmethod
+    def _split_document_xml(doc):
+        """把模板的 document.xml 按正文插入点拆为前后两段"""
+        element = copy.deepcopy(doc.element)
+        body = element.find(qn('w:body'))
+        marker = etree.Comment(_STREAM_MARKER)
+        sect_pr = body.find(qn('w:sectPr'))
+        if sect_pr is not None:
+            sect_pr.addprevious(marker)
+        else:
+            body.append(marker)
+        xml = etree.tostring(element, encoding='UTF-8', standalone=True)
+        head, tail = xml.split(f'<!--{_STREAM_MARKER}-->'.encode('utf-8'))
+        return head, tail
+
+    def block_xml(self, block: Block) -> str:
+        """生成单个块的XML"""
+        if block.kind == 'table':
+            return table_xml(block.rows, self.block_width, self.table_style_id, self.style_ids['table'])
+        if block.kind == 'code':
+            return ''  # 代码块不输出到公文中
+        if block.kind == 'break':
+            return section_break_xml(self._sect_pr) if block.section else page_break_xml()
+        if block.kind == 'image':
+            return self._image_xml(block)
+        text = SEPARATOR_TEXT if block.kind == 'separator' else block.text
+        return paragraph_xml(text, self.style_ids[block_style_key(block)])
+
+    def _image_xml(self, block) -> str:
+        image = self._images.get(block.path) if self._images is not None else None
+        if image is None:
+            return self.block_xml(placeholder(block))
+        entry = self._media.get(image.digest)
+        if entry is None:
+            # 同一文档中相同内容的图片只写入一份
+            rid = f'rIdImage{len(self._media) + 1}'
+            entry = self._media[image.digest] = (rid, f'word/media/image-{image.digest[:16]}.{image.ext}', image)
+        cx, cy = image.fit(self.block_width)
+        self._shape_id += 1
+        return image_xml(entry[0], self._shape_id, cx, cy, Path(block.path).name, block.alt)
+
+    def write(self, blocks: Iterable[Block], target: Union[str, Path, BinaryIO],
+              images: Optional[ImageProcessor] = None):
+        """把块流式写入docx
+
+        Args:
+            blocks: 块（通常为 iter_blocks() 产生的惰性迭代器）
+            target: 输出路径（按保存选项原子写入）或可写的二进制文件对象
+            images: 可选，嵌入图片使用的图片处理器；未提供时图片输出为替代文字，
+                    压缩包的条目顺序与不含图片的文档相同
+        """
+        self._images = images
+        self._media = {}
+        self._shape_id = self._first_shape_id - 1
+        try:
+            with atomic_target(target, self.options.atomic, self.options.sync) as output, \
+                    PackageWriter(output, self.options) as package:
+                if images is not None and self.options.deterministic:
+                    self._write_ordered(package, blocks)
+                else:
+                    deferred = []
+                    for name, data in self._items:
+                        if name == DOCUMENT_PART:
+                            self._write_document(package, blocks)
+                        elif images is not None and name in (CONTENT_TYPES_PART, DOCUMENT_RELS_PART):
+                            deferred.append((name, data))
+                        else:
+                            package.write(name, data)
+                    for name, data in self._with_images(deferred):
+                        package.write(name, data)
+        finally:
+            self._images = None
+            self._media = {}
+
+    def _write_ordered(self, package: PackageWriter, blocks: Iterable[Block]):
+        """可重现模式下嵌入图片：文档关系和内容类型按固定顺序排在正文之前，
+        正文先写入临时文件（超过 _SPOOL_SIZE 时落盘），确定用到的图片后再按顺序写出全部条目"""
+        with tempfile.SpooledTemporaryFile(_SPOOL_SIZE) as body:
+            self._write_body(body, blocks)
+            for name, data in self._with_images(self._items):
+                if name == DOCUMENT_PART:
+                    body.seek(0)
+                    with package.open(DOCUMENT_PART) as stream:
+                        shutil.copyfileobj(body, stream, _FLUSH_SIZE)
+                else:
+                    package.write(name, data)
+
+    def _with_images(self, items: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+        """在内容类型和文档关系部件中补上图片，追加图片部件，并按条目顺序排列"""
+        entries = []
+        for name, data in items:
+            if name == CONTENT_TYPES_PART:
+                data = self._content_types(data)
+            elif name == DOCUMENT_RELS_PART:
+                data = self._document_rels(data)
+            entries.append((name, data))
+        entries.extend((media_name, image.data) for _, media_name, image in self._media.values())
+        entries.sort(key=lambda item: entry_order(item[0]))
+        return entries
+
+    def _document_rels(self, data: bytes) -> bytes:
+        """在文档关系部件中追加图片关系"""
+        if not self._media:
+            return data
+        root = etree.fromstring(data)
+        for rid, name, _ in self._media.values():
+            etree.SubElement(root, f'{{{_RELS_NAMESPACE}}}Relationship', Id=rid, Type=_IMAGE_RELATIONSHIP,
+                             Target=name[len('word/'):])
+        return etree.tostring(root, encoding='UTF-8', standalone=True)
+
+    def _content_types(self, data: bytes) -> bytes:
+        """为用到的图片格式补充默认内容类型"""
+        root = etree.fromstring(data)
+        known = {node.get('Extension').lower() for node in root.iter(f'{{{_CONTENT_TYPES_NAMESPACE}}}Default')}
+        added = False
+        for _, _, image in self._media.values():
+            if image.ext.lower() not in known:
+                known.add(image.ext.lower())
+                node = etree.Element(f'{{{_CONTENT_TYPES_NAMESPACE}}}Default', Extension=image.ext,
+                                     ContentType=image.content_type)
+                root.insert(0, node)
+                added = True
+        return etree.tostring(root, encoding='UTF-8', standalone=True) if added else data
+
+    def _write_document(self, package: PackageWriter, blocks: Iterable[Block]):
+        with package.open(DOCUMENT_PART) as stream:
+            self._write_body(stream, blocks)
+
+    def _write_body(self, stream: BinaryIO, blocks: Iterable[Block]):
+        """写出 document.xml 的完整内容"""
+        stream.write(self._head)
+        pending: List[str] = []
+        size = 0
+        for block in blocks:
+            xml = self.block_xml(block)
+            pending.append(xml)
+            size += len(xml)
+            if size >= _FLUSH_SIZE:
+                stream.write(''.join(pending).encode('utf-8'))
+                pending = []
+                size = 0
+        if pending:
+            stream.write(''.join(pending).encode('utf-8'))
+        stream.write(self._tail)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 基准测试工具
+"""
+
+import copy
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+from corpus import generate_corpus
+from bench import STAGES, compare, convert_stages, run
+from md2doc import MarkdownConverter
+from md2doc.source import SourceFile
+
+
+class TestBenchmarks(unittest.TestCase):
+    """测试语料生成与基线比较"""
+
+    def test_corpus_is_deterministic(self):
+        """相同种子生成相同语料"""
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            first = generate_corpus('tables', Path(a), seed=3)
+            second = generate_corpus('tables', Path(b), seed=3)
+            self.assertEqual([f.read_bytes() for f in first], [f.read_bytes() for f in second])
+
+    def test_compare_reports_regressions(self):
+        """超过阈值的阶段被判定为退化"""
+        baseline = run(['inline'], repeat=1)
+        current = copy.deepcopy(baseline)
+        self.assertEqual(compare(current, baseline, 0.2), [])
+
+        current['corpora']['inline']['stages']['render'] = baseline['corpora']['inline']['stages']['render'] * 2 + 1
+        regressions = compare(current, baseline, 0.2)
+        self.assertTrue(any(r.startswith('inline.render') for r in regressions))
+
+    def test_convert_stages_times_reading(self):
+        """读取阶段包含源文件的解码耗时（与 convert() 的指标一致）"""
+        split = SourceFile._split
+
+        def slow_split(text, final):
+            time.sleep(0.2)
+            return split(text, final)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            md_file = generate_corpus('small', Path(tmp), seed=1)[0]
+            timings = dict.fromkeys(STAGES, 0.0)
+            with mock.patch.object(SourceFile, '_split', staticmethod(slow_split)):
+                blocks = convert_stages(MarkdownConverter(), md_file, timings)
+        self.assertGreater(blocks, 0)
+        self.assertGreaterEqual(timings['read'], 0.2)
+        self.assertLess(timings['parse'], timings['read'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 命令行与批量转换功能测试
+"""
+
+import time
+import logging
+import tempfile
+import unittest
+import multiprocessing
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.parallel import WorkerPool
+from md2doc.cache import BuildCache
+
+
+def _slow_convert(md_file, output_dir, converter, logger, export_pdf=False, report=None):
+    """模拟卡死的转换"""
+    if md_file.stem == 'slow':
+        time.sleep(30)
+    return True
+
+
+class TestWorkerPool(unittest.TestCase):
+    """测试多进程转换池"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.input_dir = self.root / 'input'
+        self.output_dir = self.root / 'output'
+        self.input_dir.mkdir()
+        self.output_dir.mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, title):
+        path = self.input_dir / f'{name}.md'
+        path.write_text(f'# {title}\n\n正文内容。\n', encoding='utf-8')
+        return path
+
+    def test_results_in_submission_order(self):
+        """结果按提交顺序返回"""
+        files = [self._write(f'f{i}', f'文档{i}') for i in range(6)]
+        with WorkerPool(self.output_dir, jobs=3) as pool:
+            results = list(pool.imap(iter(files)))
+
+        self.assertEqual([r.md_file for r in results], files)
+        self.assertTrue(all(r.success for r in results))
+        for i in range(6):
+            self.assertTrue((self.output_dir / f'文档{i}.docx').exists())
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', '需要fork启动方式')
+    def test_timeout_does_not_stall_batch(self):
+        """超时文件被判定失败，其余文件继续转换"""
+        files = [self._write('slow', '慢'), self._write('fast', '快')]
+        with mock.patch.object(cli, 'convert_single_file', _slow_convert):
+            start = time.monotonic()
+            with WorkerPool(self.output_dir, jobs=2, timeout=1) as pool:
+                results = list(pool.imap(files))
+
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertFalse(results[0].success)
+        self.assertIn('超时', results[0].records[0][1])
+        self.assertEqual(results[0].records[0][0], logging.ERROR)
+        self.assertTrue(results[1].success)
+
+
+class TestBuildCache(unittest.TestCase):
+    """测试增量构建缓存"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.md_file = self.root / 'a.md'
+        self.md_file.write_text('# 标题\n\n正文\n', encoding='utf-8')
+        self.output = self.root / '标题.docx'
+        self.output.write_bytes(b'docx')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _recorded_cache(self, fingerprint='f1'):
+        cache = BuildCache(self.root, fingerprint)
+        fresh, digest = cache.check('a.md', self.md_file)
+        self.assertFalse(fresh)
+        cache.record('a.md', self.md_file, digest, ['标题.docx'])
+        cache.save()
+        return cache
+
+    def test_unchanged_file_is_skipped(self):
+        """源文件和配置未变化时跳过"""
+        self._recorded_cache()
+        fresh, _ = BuildCache(self.root, 'f1').check('a.md', self.md_file)
+        self.assertTrue(fresh)
+
+    def test_changed_content_or_config_is_rebuilt(self):
+        """内容、配置变化或输出丢失时重新转换"""
+        self._recorded_cache()
+        self.assertFalse(BuildCache(self.root, 'f2').check('a.md', self.md_file)[0])
+
+        self.md_file.write_text('# 标题\n\n新的正文\n', encoding='utf-8')
+        self.assertFalse(BuildCache(self.root, 'f1').check('a.md', self.md_file)[0])
+
+    def test_missing_output_is_rebuilt(self):
+        """输出文件被删除后重新转换"""
+        self._recorded_cache()
+        self.output.unlink()
+        self.assertFalse(BuildCache(self.root, 'f1').check('a.md', self.md_file)[0])
+
+    def test_prune_removes_outputs_of_deleted_sources(self):
+        """源文件删除后清理对应输出"""
+        self._recorded_cache()
+        cache = BuildCache(self.root, 'f1')
+        self.assertEqual(cache.prune([]), ['标题.docx'])
+        self.assertFalse(self.output.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,16 +3,27 @@
 单元测试 - 转换器功能测试
 """
 
+import io
+import time
+import zipfile
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 from docx import Document
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from md2doc import MarkdownConverter, ConverterConfig
+from md2doc import MarkdownConverter, ConverterConfig, parse
+from md2doc.parser import (
+    Title, Heading, Paragraph, Signature, Quote, ListItem, Table, Separator, CodeBlock
+)
 from md2doc.converter import (
+    STYLE_NAMES,
+    DocumentTemplate,
     parse_inline_formatting,
+    strip_inline_formatting,
     extract_title_from_md,
     sanitize_filename,
     normalize_list_symbol,
@@ -38,6 +49,22 @@ class TestParser(unittest.TestCase):
         result = parse_inline_formatting("**加粗**和*斜体*")
         self.assertEqual(result, [('bold', '加粗'), ('text', '和'), ('italic', '斜体')])
 
+    def test_parse_inline_formatting_code_and_escape(self):
+        """测试代码和转义字符解析"""
+        result = parse_inline_formatting("`a*b*`和\\*星号\\*")
+        self.assertEqual(result, [('code', 'a*b*'), ('text', '和*星号*')])
+
+    def test_parse_inline_formatting_unmatched(self):
+        """测试未闭合的标记被移除"""
+        self.assertEqual(parse_inline_formatting("**未闭合"), [('text', '未闭合')])
+        self.assertEqual(parse_inline_formatting("a*b"), [('text', 'ab')])
+
+    def test_strip_inline_formatting(self):
+        """测试清理为纯文本"""
+        self.assertEqual(strip_inline_formatting("**加粗**和*斜体*和`代码`"), '加粗和斜体和代码')
+        self.assertEqual(strip_inline_formatting("　 一、  **标题**"), '一、标题')
+        self.assertEqual(strip_inline_formatting("（一）\u3000内容"), '（一）内容')
+
     def test_sanitize_filename(self):
         """测试文件名清理"""
         result = sanitize_filename('测试<>:"/\\|?*文档')
@@ -55,6 +82,105 @@ class TestParser(unittest.TestCase):
         self.assertEqual(normalize_list_symbol('normal text'), 'normal text')
 
 
+class TestBlockParser(unittest.TestCase):
+    """测试块级解析"""
+
+    def test_parse_blocks(self):
+        """各类块的识别"""
+        blocks = parse("""# **标题**
+
+## 一级
+### 二级
+#### 三级
+
+正文*内容*
+> 引用
+- 列表项
+---
+| a | b |
+|---|---|
+| 1 | 2 |
+```python
+print('代码')
+```
+日期：2026年1月4日
+""")
+        self.assertEqual(blocks, [
+            Title('标题'),
+            Heading(1, '一级'),
+            Heading(2, '二级'),
+            Heading(3, '三级'),
+            Paragraph('正文内容'),
+            Quote('引用'),
+            ListItem('列表项'),
+            Separator(),
+            Table((('a', 'b'), ('1', '2'))),
+            CodeBlock('python', ("print('代码')",)),
+            Signature('日期：2026年1月4日'),
+        ])
+
+    def test_blocks_are_compact(self):
+        """块使用__slots__，不携带实例字典"""
+        self.assertFalse(hasattr(Paragraph('x'), '__dict__'))
+
+    def test_render_blocks(self):
+        """渲染器消费块列表"""
+        doc = MarkdownConverter().render([Title('标题'), Paragraph('正文'), Table((('a', 'b'),))])
+        self.assertEqual([p.text for p in doc.paragraphs], ['标题', '正文'])
+        self.assertEqual(doc.tables[0].cell(0, 1).text, 'b')
+
+
+class TestTables(unittest.TestCase):
+    """测试表格解析与批量建表"""
+
+    def test_alignment_rows_and_escaped_pipes(self):
+        """分隔行（含对齐标记）被过滤，转义的|保留为文本，内容中的---不影响解析"""
+        blocks = parse('| a | b \\| c |\n|:--|--:|\n| x --- y | `1\\|2` |\n')
+        self.assertEqual(blocks, [Table((('a', 'b | c'), ('x --- y', '1|2')))])
+
+    def test_ragged_rows(self):
+        """较短的行补空单元格，较长的行截断"""
+        doc = MarkdownConverter().render([Table((('a', 'b', 'c'), ('1',), ('x', 'y', 'z', 'w')))])
+        table = doc.tables[0]
+        self.assertEqual([[c.text for c in row.cells] for row in table.rows],
+                         [['a', 'b', 'c'], ['1', '', ''], ['x', 'y', 'z']])
+
+    def test_large_table_is_linear(self):
+        """5000行表格在可接受的时间内完成"""
+        rows = tuple((str(i), f'名称{i}', '**粗体**', 'a & b') for i in range(5000))
+        start = time.perf_counter()
+        doc = MarkdownConverter().render([Table(rows)])
+        self.assertLess(time.perf_counter() - start, 5.0)
+        self.assertEqual(len(doc.tables[0].rows), 5000)
+
+
+class TestInlineComplexity(unittest.TestCase):
+    """测试行内解析在对抗性输入上的线性复杂度"""
+
+    def assertFast(self, text, limit=2.0):
+        start = time.perf_counter()
+        result = parse_inline_formatting(text)
+        self.assertLess(time.perf_counter() - start, limit)
+        return result
+
+    def test_unmatched_stars(self):
+        """10万个星号"""
+        self.assertEqual(self.assertFast('*' * 100000), [])
+        self.assertEqual(self.assertFast('*' * 100001), [])
+
+    def test_alternating_markers(self):
+        """大量交替出现的标记"""
+        self.assertEqual(strip_inline_formatting('*a' * 50000), 'a' * 50000)
+        self.assertFast('`*' * 50000 + '**')
+        self.assertFast('**a*' * 50000)
+
+    def test_long_table_line(self):
+        """含大量标记的超长表格行"""
+        line = '| **粗** | *斜* | `码` ' * 10000 + '|'
+        spans = self.assertFast(line)
+        self.assertEqual(sum(1 for kind, _ in spans if kind == 'bold'), 10000)
+
+
 class TestFormatter(unittest.TestCase):
     """测试格式化功能"""
 
@@ -83,6 +209,71 @@ class TestConverterConfig(unittest.TestCase):
         self.assertFalse(body_font.bold)
 
 
+class TestDocumentStyles(unittest.TestCase):
+    """测试文档样式"""
+
+    def setUp(self):
+        self.converter = MarkdownConverter()
+        self.doc = Document()
+        self.converter._setup_page_layout(self.doc)
+        self.converter._parse_content(self.doc, "# 标题\n\n## 一级\n\n正文\n\n> 引用\n\n日期：2026年1月4日\n")
+
+    def test_styles_defined_from_config(self):
+        """样式按配置定义在styles.xml中"""
+        title = self.doc.styles[STYLE_NAMES['title']]
+        self.assertEqual(title.font.name, '方正小标宋简体')
+        self.assertEqual(title.font.size.pt, 22)
+        self.assertTrue(title.font.bold)
+        self.assertTrue(self.doc.styles[STYLE_NAMES['quote']].font.italic)
+        self.assertEqual(self.doc.styles[STYLE_NAMES['body']].paragraph_format.line_spacing.pt, 30.5)
+
+    def test_paragraphs_reference_styles(self):
+        """段落引用样式，运行不再携带格式"""
+        names = [p.style.name for p in self.doc.paragraphs]
+        self.assertEqual(names, [STYLE_NAMES[k] for k in ('title', 'heading1', 'body', 'quote', 'signature')])
+        for paragraph in self.doc.paragraphs:
+            for run in paragraph.runs:
+                self.assertIsNone(run._element.rPr)
+
+
+class TestDocumentTemplate(unittest.TestCase):
+    """测试基础文档模板"""
+
+    def test_clones_are_independent(self):
+        """克隆的文档互不影响，且保留页面设置"""
+        template = DocumentTemplate()
+        first = template.new_document()
+        first.add_paragraph('第一份')
+        second = template.new_document()
+
+        self.assertEqual(len(second.paragraphs), 0)
+        self.assertEqual(len(template.document.paragraphs), 0)
+        self.assertAlmostEqual(second.sections[0].top_margin.cm, 3.7, places=1)
+        self.assertEqual(second.styles[STYLE_NAMES['body']].font.name, '仿宋_GB2312')
+
+    def test_dotx_template(self):
+        """从 .dotx 模板创建文档，保留模板中的样式"""
+        base = Document()
+        base.styles.add_style('模板样式', 1)
+        buffer = io.BytesIO()
+        base.save(buffer)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dotx = Path(tmp) / '模板.dotx'
+            with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as zin, zipfile.ZipFile(dotx, 'w') as zout:
+                for item in zin.infolist():
+                    data = zin.read(item.filename)
+                    if item.filename == '[Content_Types].xml':
+                        data = data.replace(b'document.main+xml', b'template.main+xml')
+                    zout.writestr(item, data)
+
+            converter = MarkdownConverter(template=dotx)
+            doc = converter.render(parse('# 标题\n\n正文\n'))
+
+        self.assertIsNotNone(doc.styles['模板样式'])
+        self.assertEqual([p.style.name for p in doc.paragraphs], [STYLE_NAMES['title'], STYLE_NAMES['body']])
+
+
 class TestIntegration(unittest.TestCase):
     """集成测试"""
 
@@ -90,8 +281,11 @@ class TestIntegration(unittest.TestCase):
         """设置测试环境"""
         self.converter = MarkdownConverter()
         self.test_input_dir = Path(__file__).parent.parent / 'input'
-        self.test_output_dir = Path(__file__).parent.parent / 'output' / 'tests'
-        self.test_output_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.test_output_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
 
     def test_convert_simple_md(self):
         """测试转换简单Markdown文件"""
@@ -129,5 +323,65 @@ class TestIntegration(unittest.TestCase):
         self.assertTrue(output_path.exists())
 
 
+class TestInMemoryConversion(unittest.TestCase):
+    """测试内存转换接口"""
+
+    SAMPLE = '# 内存标题\n\n## 小标题\n\n正文内容。\n'
+
+    def setUp(self):
+        self.converter = MarkdownConverter()
+
+    @staticmethod
+    def _document_xml(data):
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            return z.read('word/document.xml')
+
+    def test_convert_text_matches_file_conversion(self):
+        """文本转换结果与文件转换一致，且文件只读取一次"""
+        with tempfile.TemporaryDirectory() as tmp:
+            md_file = Path(tmp) / 'a.md'
+            md_file.write_text(self.SAMPLE, encoding='utf-8')
+            self.converter.new_document()  # 模板加载会读取 python-docx 自带的默认模板
+            with mock.patch('builtins.open', wraps=open) as opened:
+                doc, title = self.converter.convert(md_file)
+            self.assertEqual(opened.call_count, 1)
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        data, text_title = self.converter.convert_text(self.SAMPLE)
+        self.assertEqual(text_title, title)
+        self.assertEqual(self._document_xml(data), self._document_xml(buffer.getvalue()))
+
+    def test_convert_bytes_to_buffer(self):
+        """字节或文件对象输入，直接写入调用方提供的缓冲区"""
+        output = io.BytesIO()
+        data, title = self.converter.convert_bytes(io.BytesIO(b'\xef\xbb\xbf' + self.SAMPLE.encode('utf-8')),
+                                                   output=output)
+        self.assertIsNone(data)
+        self.assertEqual(title, '内存标题')
+        self.assertTrue(zipfile.is_zipfile(output))
+
+    def test_convert_text_streaming(self):
+        """流式模式的文本转换与普通模式输出一致"""
+        data, _ = self.converter.convert_text(self.SAMPLE)
+        streamed, title = MarkdownConverter(stream=True).convert_text(io.StringIO(self.SAMPLE))
+        self.assertEqual(title, '内存标题')
+        self.assertEqual(self._document_xml(streamed), self._document_xml(data))
+
+    def test_convert_many(self):
+        """逐个产出结果，失败不影响后续文档"""
+        sources = iter([self.SAMPLE, b'\xff\xfe', '# 第二篇\n'])
+        results = self.converter.convert_many(sources, metrics=True)
+
+        first = next(results)
+        self.assertEqual(first.title, '内存标题')
+        self.assertIn('render', first.metrics['stages'])
+        second, third = list(results)
+        self.assertIsInstance(second.error, UnicodeDecodeError)
+        self.assertIsNone(second.data)
+        self.assertEqual(third.title, '第二篇')
+        self.assertTrue(zipfile.is_zipfile(io.BytesIO(third.data)))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 输入发现（递归遍历、包含/排除模式、镜像输出目录）
+"""
+
+import os
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.discover import iter_sources, matches
+
+
+class TestIterSources(unittest.TestCase):
+    """测试目录遍历"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for rel in ('b.md', 'a.markdown', 'notes.txt', '.hidden.md', '~lock.md',
+                    'sub/c.md', 'sub/deep/d.md', 'drafts/e.md', '.git/f.md', 'output/g.md'):
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text('# 标题\n', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _rel(self, paths):
+        return [p.relative_to(self.root).as_posix() for p in paths]
+
+    def test_top_level_only_by_default(self):
+        self.assertEqual(self._rel(iter_sources(self.root)), ['a.markdown', 'b.md'])
+
+    def test_recursive_order(self):
+        """同一目录先产出文件再进入子目录，均按名称排序；隐藏目录不进入"""
+        found = self._rel(iter_sources(self.root, recursive=True))
+        self.assertEqual(found, ['a.markdown', 'b.md', 'drafts/e.md', 'output/g.md', 'sub/c.md', 'sub/deep/d.md'])
+
+    def test_include_exclude_and_skip_dirs(self):
+        found = self._rel(iter_sources(self.root, recursive=True, exclude=['drafts', 'sub/deep/*'],
+                                       skip_dirs=[self.root / 'output']))
+        self.assertEqual(found, ['a.markdown', 'b.md', 'sub/c.md'])
+
+        found = self._rel(iter_sources(self.root, recursive=True, include=['*.md'], exclude=['sub/*']))
+        self.assertEqual(found, ['b.md', 'drafts/e.md', 'output/g.md'])
+
+    def test_matches(self):
+        self.assertTrue(matches('a/b/c.md', ['c.*']))
+        self.assertTrue(matches('a/b/c.md', ['a/*.md']))
+        self.assertFalse(matches('a/b/c.md', ['b/*.md']))
+
+    def test_lazy_walk(self):
+        """第一个文件在遍历其余目录之前产出"""
+        scanned = []
+        real_scandir = os.scandir
+
+        def scandir(path):
+            scanned.append(Path(path))
+            return real_scandir(path)
+
+        with mock.patch('os.scandir', scandir):
+            sources = iter_sources(self.root, recursive=True)
+            next(sources)
+            self.assertEqual(scanned, [self.root])
+            list(sources)
+        self.assertIn(self.root / 'sub' / 'deep', scanned)
+
+
+class TestRecursiveBatch(unittest.TestCase):
+    """测试命令行递归批量转换"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.input_dir = self.root / 'input'
+        self.output_dir = self.root / 'output'
+        for rel, title in (('top.md', '顶层'), ('年度/一月.md', '一月报告'), ('年度/草稿/x.md', '草稿')):
+            path = self.input_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f'# {title}\n\n正文内容。\n', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _main(self, *extra):
+        argv = ['md2doc', '-i', str(self.input_dir), '-o', str(self.output_dir), '-r', *extra]
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'):
+            cli.main()
+
+    def test_output_mirrors_source_tree(self):
+        self._main('-j', '1', '--exclude', '草稿')
+
+        self.assertTrue((self.output_dir / '顶层.docx').exists())
+        self.assertTrue((self.output_dir / '年度' / '一月报告.docx').exists())
+        self.assertFalse((self.output_dir / '年度' / '草稿').exists())
+
+        cache = json.loads((self.output_dir / '.md2doc-cache.json').read_text(encoding='utf-8'))
+        self.assertEqual(cache['files']['年度/一月.md']['outputs'], ['年度/一月报告.docx'])
+
+    def test_parallel_workers_mirror_tree(self):
+        self._main('-j', '2')
+        self.assertTrue((self.output_dir / '年度' / '草稿' / '草稿.docx').exists())
+
+    def test_prune_nested_output(self):
+        self._main('-j', '1')
+        (self.input_dir / '年度' / '一月.md').unlink()
+        self._main('-j', '1', '--prune')
+        self.assertFalse((self.output_dir / '年度' / '一月报告.docx').exists())
+        self.assertTrue((self.output_dir / '顶层.docx').exists())
+
+    def test_prune_keeps_filtered_sources(self):
+        """被新的筛选条件排除、但仍存在的源文件，其输出不会被删除"""
+        self._main('-j', '1')
+        self._main('-j', '1', '--exclude', '草稿', '--prune')
+        self.assertTrue((self.output_dir / '年度' / '草稿' / '草稿.docx').exists())
+
+        argv = ['md2doc', '-i', str(self.input_dir), '-o', str(self.output_dir), '-j', '1', '--prune']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'):
+            cli.main()  # 不递归
+        self.assertTrue((self.output_dir / '年度' / '一月报告.docx').exists())
+        cache = json.loads((self.output_dir / '.md2doc-cache.json').read_text(encoding='utf-8'))
+        self.assertIn('年度/草稿/x.md', cache['files'])
+
+
+if __name__ == '__main__':
+    unittest.main()
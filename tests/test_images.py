@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 图片嵌入与处理缓存
+"""
+
+import io
+import struct
+import tempfile
+import unittest
+import zipfile
+import zlib
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from docx import Document
+
+from md2doc import cli
+from md2doc.cache import BuildCache
+from md2doc.converter import MarkdownConverter
+from md2doc.images import ImageOptions, ImageProcessor
+from md2doc.ooxml import block_width
+from md2doc.parser import Image, Paragraph, parse_line
+from md2doc.save import SaveOptions
+
+try:
+    import PIL  # noqa: F401
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+def make_png(width: int, height: int, color: int = 0) -> bytes:
+    """生成灰度PNG（72 DPI，不依赖 Pillow）"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    row = b'\x00' + bytes((color + x) % 256 for x in range(width))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * height))
+            + chunk(b'IEND', b''))
+
+
+class TestParseImage(unittest.TestCase):
+    """测试图片语法"""
+
+    def test_standalone_image_line(self):
+        block = parse_line('![示意图](img/chart.png)')
+        self.assertIsInstance(block, Image)
+        self.assertEqual((block.alt, block.path), ('示意图', 'img/chart.png'))
+
+        block = parse_line('![](<my chart.png> "标题")')
+        self.assertEqual((block.alt, block.path), ('', 'my chart.png'))
+
+    def test_inline_image_is_text(self):
+        self.assertIsInstance(parse_line('见下图 ![图](a.png)'), Paragraph)
+
+
+class TestEmbedImages(unittest.TestCase):
+    """测试图片嵌入"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / 'img').mkdir()
+        (self.root / 'img' / 'wide.png').write_bytes(make_png(1200, 300))
+        (self.root / 'img' / 'copy.png').write_bytes(make_png(1200, 300))
+        self.md_file = self.root / 'report.md'
+        self.md_file.write_text('# 图片报告\n\n![宽图](img/wide.png)\n\n正文。\n\n![副本](img/copy.png)\n\n'
+                                '![缺失的图](img/missing.png)\n', encoding='utf-8')
+        self.out = self.root / 'out'
+        self.out.mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_object_model_and_stream(self):
+        for stream in (False, True):
+            converter = MarkdownConverter(stream=stream)
+            report = {}
+            self.assertTrue(cli.convert_single_file(self.md_file, self.out, converter, converter.logger,
+                                                    report=report))
+            self.assertEqual(len(report['images']), 3)
+
+            path = self.out / '图片报告.docx'
+            with zipfile.ZipFile(path) as zf:
+                media = [name for name in zf.namelist() if name.startswith('word/media/')]
+            self.assertEqual(len(media), 1, stream)  # 相同内容只存一份
+
+            doc = Document(path)
+            shapes = doc.inline_shapes
+            self.assertEqual(len(shapes), 2)
+            self.assertEqual(shapes[0].width, block_width(doc))
+            self.assertAlmostEqual(shapes[0].height / shapes[0].width, 0.25, places=3)
+            self.assertIn('缺失的图', [p.text for p in doc.paragraphs])
+            path.unlink()
+
+    def test_deterministic_stream(self):
+        """可重现模式下流式写入：图片关系和图片部件齐全，条目按固定顺序排列"""
+        outputs = []
+        for _ in range(2):
+            converter = MarkdownConverter(stream=True, save_options=SaveOptions(deterministic=True))
+            self.assertTrue(cli.convert_single_file(self.md_file, self.out, converter, converter.logger))
+            outputs.append((self.out / '图片报告.docx').read_bytes())
+        self.assertEqual(outputs[0], outputs[1])
+
+        with zipfile.ZipFile(io.BytesIO(outputs[0])) as zf:
+            names = zf.namelist()
+            rels = zf.read('word/_rels/document.xml.rels').decode('utf-8')
+            content_types = zf.read('[Content_Types].xml').decode('utf-8')
+        self.assertEqual(names[:2], ['[Content_Types].xml', '_rels/.rels'])
+        self.assertEqual(names[2:], sorted(names[2:]))
+        media = [name for name in names if name.startswith('word/media/')]
+        self.assertEqual(len(media), 1)
+        self.assertIn(f'Target="{media[0][len("word/"):]}"', rels)
+        self.assertIn('Extension="png"', content_types)
+        self.assertEqual(len(Document(io.BytesIO(outputs[0])).inline_shapes), 2)
+
+    def test_text_without_base_dir_reads_no_files(self):
+        converter = MarkdownConverter()
+        data, _ = converter.convert_text('# 标题\n\n![外部](/etc/hostname)\n')
+        doc = Document(io.BytesIO(data))
+        self.assertEqual(len(doc.inline_shapes), 0)
+        self.assertIn('外部', [p.text for p in doc.paragraphs])
+
+    def test_same_content_processed_once(self):
+        processor = ImageProcessor(block_width(Document()))
+        first = processor.get(str(self.root / 'img' / 'wide.png'))
+        second = processor.get(str(self.root / 'img' / 'copy.png'))
+        self.assertEqual(first.digest, second.digest)
+        self.assertEqual(processor.processed, 1)
+        self.assertIsNone(processor.get(str(self.root / 'img' / 'missing.png')))
+        processor.close()
+
+    def test_cache_invalidated_when_image_changes(self):
+        cache = BuildCache(self.out, 'fp')
+        converter = MarkdownConverter()
+        report = {}
+        cli.convert_single_file(self.md_file, self.out, converter, converter.logger, report=report)
+        fresh, digest = cache.check('report.md', self.md_file)
+        cache.record('report.md', self.md_file, digest, report['outputs'], None, report['images'])
+        self.assertTrue(cache.check('report.md', self.md_file)[0])
+
+        (self.root / 'img' / 'wide.png').write_bytes(make_png(600, 300))
+        self.assertFalse(cache.check('report.md', self.md_file)[0])
+
+        # 补上缺失的图片同样需要重新转换
+        cache.record('report.md', self.md_file, digest, report['outputs'], None, report['images'])
+        (self.root / 'img' / 'missing.png').write_bytes(make_png(10, 10))
+        self.assertFalse(cache.check('report.md', self.md_file)[0])
+
+
+@unittest.skipUnless(HAS_PIL, '需要 Pillow')
+class TestDownscale(unittest.TestCase):
+    """测试按DPI缩小和磁盘缓存"""
+
+    def test_downscale_and_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            path = root / 'big.png'
+            path.write_bytes(make_png(4000, 1000))
+            width = block_width(Document())
+            options = ImageOptions(dpi=96, cache_dir=root / 'cache')
+
+            processor = ImageProcessor(width, options)
+            image = processor.get(str(path))
+            processor.close()
+            self.assertEqual(processor.processed, 1)
+            self.assertLess(len(image.data), path.stat().st_size)
+            self.assertEqual(image.fit(width)[0], width)  # 显示宽度不变
+            self.assertEqual(len(list((root / 'cache').iterdir())), 1)
+
+            # 其他进程或下次运行直接读取磁盘缓存
+            processor = ImageProcessor(width, options)
+            self.assertEqual(processor.get(str(path)).digest, image.digest)
+            self.assertEqual(processor.processed, 0)
+            processor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 运行日志与断点续传
+"""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.journal import BuildJournal
+
+
+class TestBuildJournal(unittest.TestCase):
+    """测试日志读写"""
+
+    def test_last_record_wins_and_partial_line_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = BuildJournal(Path(tmp))
+            journal.open()
+            journal.start('a.md')
+            journal.done('a.md', 'h1', 'fp', ['甲.docx'])
+            journal.start('b.md')
+            journal.start('c.md')
+            journal.failed('c.md')
+            journal.close()
+            with open(journal.path, 'a', encoding='utf-8') as f:
+                f.write('{"event": "done", "file": "b.m')  # 崩溃时写了一半
+
+            state = journal.load()
+            self.assertEqual(list(state.completed), ['a.md'])
+            self.assertEqual(state.completed['a.md']['outputs'], ['甲.docx'])
+            self.assertEqual(state.in_flight, ['b.md'])
+            self.assertEqual(state.failed, ['c.md'])
+
+            journal.close(remove=True)
+            self.assertFalse(journal.exists())
+
+
+class TestResume(unittest.TestCase):
+    """测试中断后继续"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.input_dir = self.root / 'input'
+        self.output_dir = self.root / 'output'
+        self.input_dir.mkdir()
+        for i in range(4):
+            (self.input_dir / f'n{i}.md').write_text(f'# 通知{i}\n\n正文。\n', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, *extra):
+        argv = ['md2doc', '-i', str(self.input_dir), '-o', str(self.output_dir), '-j', '1', *extra]
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            cli.main()
+        return out.getvalue()
+
+    def _crash(self):
+        """第3个文件转换时进程被终止，缓存清单未保存"""
+        convert_source = cli.convert_source
+        calls = []
+
+        def dying(md_file, *args, **kwargs):
+            calls.append(md_file)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return convert_source(md_file, *args, **kwargs)
+
+        with mock.patch.object(cli, 'convert_source', side_effect=dying), \
+                mock.patch('md2doc.cache.BuildCache.save'), self.assertRaises(SystemExit):
+            self._run()
+        self.assertFalse((self.output_dir / '.md2doc-cache.json').exists())
+        self.assertTrue((self.output_dir / '.md2doc-journal.jsonl').exists())
+
+    def test_resume_skips_completed_and_retries_in_flight(self):
+        self._crash()
+        before = {p.name: p.stat().st_mtime_ns for p in self.output_dir.glob('*.docx')}
+        self.assertEqual(sorted(before), ['通知0.docx', '通知1.docx'])
+
+        out = self._run('--resume')
+        self.assertIn('成功: 2', out)
+        self.assertIn('恢复: 2（重试中断的文件 1 个）', out)
+        for name, mtime in before.items():
+            self.assertEqual((self.output_dir / name).stat().st_mtime_ns, mtime)
+        self.assertEqual(len(list(self.output_dir.glob('*.docx'))), 4)
+        self.assertFalse((self.output_dir / '.md2doc-journal.jsonl').exists())
+
+        # 恢复的文件已写入缓存清单
+        self.assertIn('跳过: 4', self._run())
+
+    def test_changed_source_is_not_resumed(self):
+        self._crash()
+        (self.input_dir / 'n0.md').write_text('# 通知0\n\n新正文。\n', encoding='utf-8')
+        out = self._run('--resume')
+        self.assertIn('成功: 3', out)
+        self.assertIn('恢复: 1', out)
+
+    def test_damaged_output_is_rebuilt(self):
+        self._crash()
+        (self.output_dir / '通知0.docx').write_bytes(b'')
+        out = self._run('--resume')
+        self.assertIn('成功: 3', out)
+        self.assertIn('恢复: 1', out)
+        self.assertGreater((self.output_dir / '通知0.docx').stat().st_size, 0)
+
+    def test_without_resume_starts_over(self):
+        self._crash()
+        out = self._run()
+        self.assertIn('成功: 4', out)
+        self.assertNotIn('恢复', out)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 内存预算与统计
+"""
+
+import logging
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from docx import Document
+
+from md2doc import cli
+from md2doc.converter import MarkdownConverter
+from md2doc.memory import MemoryBudgetError, MemoryGuard, MemoryOptions, MemoryTrace, estimate_memory
+
+MARKDOWN = '# 年度报告\n\n## 一、概述\n\n正文**内容**。\n\n| 项目 | 数量 |\n|---|---|\n| 甲 | 1 |\n' * 20
+
+
+class TestMemoryGuard(unittest.TestCase):
+    """测试内存检查"""
+
+    def test_guard_raises_over_budget(self):
+        trace = MemoryTrace(True)
+        try:
+            guard = MemoryGuard(1024)
+            data = [str(i) for i in range(20000)]
+            with self.assertRaises(MemoryBudgetError):
+                guard.check()
+            with self.assertRaises(MemoryBudgetError):
+                list(guard.wrap(iter(data)))
+        finally:
+            trace.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_no_limit_is_passthrough(self):
+        blocks = [1, 2, 3]
+        self.assertIs(MemoryGuard().wrap(blocks), blocks)
+        MemoryGuard().check()
+
+
+class TestConvertWithBudget(unittest.TestCase):
+    """测试按预算转换"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.md_file = self.root / 'report.md'
+        self.md_file.write_text(MARKDOWN, encoding='utf-8')
+        self.logger = logging.getLogger('test_memory')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_predicted_overflow_routes_to_stream(self):
+        limit = estimate_memory(self.md_file.stat().st_size) - 1
+        converter = MarkdownConverter(memory=MemoryOptions(limit=limit * 1000))
+        report = {}
+        self.assertTrue(cli.convert_single_file(self.md_file, self.root, converter, self.logger, report=report))
+        self.assertIn('render', report['metrics']['stages'])
+
+        converter = MarkdownConverter(memory=MemoryOptions(limit=limit))
+        report = {}
+        with self.assertLogs(self.logger, 'WARNING') as logs:
+            self.assertTrue(cli.convert_single_file(self.md_file, self.root, converter, self.logger, report=report))
+        self.assertIn('改用流式写入', logs.output[0])
+        self.assertIn('stream', report['metrics']['stages'])
+        self.assertEqual(Document(self.root / '年度报告.docx').paragraphs[0].text, '年度报告')
+
+    def test_observed_overflow_fails_cleanly(self):
+        converter = MarkdownConverter(stream=True, memory=MemoryOptions(limit=1, trace=True))
+        with self.assertLogs('md2doc.converter', 'ERROR'):
+            self.assertFalse(cli.convert_single_file(self.md_file, self.root, converter, self.logger))
+        self.assertEqual(list(self.root.glob('*.docx')), [])
+        self.assertFalse(tracemalloc.is_tracing())
+
+        # 同一个转换器仍可继续转换其他文件
+        converter.memory = MemoryOptions()
+        self.assertTrue(cli.convert_single_file(self.md_file, self.root, converter, self.logger))
+
+    def test_trace_reports_peak(self):
+        converter = MarkdownConverter(memory=MemoryOptions(trace=True))
+        report = {}
+        with self.assertLogs(self.logger, 'INFO') as logs:
+            cli.convert_single_file(self.md_file, self.root, converter, self.logger, report=report)
+        self.assertGreater(report['metrics']['peak_traced'], 0)
+        self.assertTrue(any('内存峰值' in line for line in logs.output))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_cli_rejects_invalid_budget(self):
+        argv = ['md2doc', '-i', str(self.root), '--max-memory', '0']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                cli.main()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 合并输出
+"""
+
+import zipfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from docx import Document
+
+from md2doc import cli
+from md2doc.converter import MarkdownConverter
+from md2doc.merge import merge_convert
+
+
+class TestMergeConvert(unittest.TestCase):
+    """测试多个文件合并为一个文档"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.files = []
+        for i in range(3):
+            path = self.root / f'n{i}.md'
+            path.write_text(f'# 通知{i}\n\n## 一、事项\n\n正文{i}。\n\n| 项 | 值 |\n|---|---|\n| 甲 | {i} |\n',
+                            encoding='utf-8')
+            self.files.append(path)
+        self.target = self.root / '合订本.docx'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _document_xml(self):
+        with zipfile.ZipFile(self.target) as zf:
+            return zf.read('word/document.xml').decode('utf-8')
+
+    def test_page_breaks_between_sources(self):
+        metrics = {}
+        result = merge_convert(self.files, self.target, MarkdownConverter(), metrics=metrics)
+
+        self.assertEqual(result.sources, self.files)
+        self.assertEqual(self._document_xml().count('<w:br w:type="page"/>'), 2)
+        doc = Document(self.target)
+        self.assertEqual([p.text for p in doc.paragraphs if p.text.startswith('通知')], ['通知0', '通知1', '通知2'])
+        self.assertEqual(len(doc.tables), 3)
+        self.assertEqual(metrics['blocks']['title'], 3)
+
+    def test_section_breaks_keep_page_setup(self):
+        for stream in (False, True):
+            merge_convert(self.files, self.target, MarkdownConverter(stream=stream), section=True)
+            doc = Document(self.target)
+            self.assertEqual(len(doc.sections), 3)
+            self.assertEqual({s.page_width for s in doc.sections}, {doc.sections[-1].page_width})
+            self.assertEqual({s.left_margin for s in doc.sections}, {doc.sections[-1].left_margin})
+
+    def test_stream_matches_object_model(self):
+        """流式合并与对象模型合并生成相同的正文"""
+        merge_convert(self.files, self.target, MarkdownConverter())
+        expected = self._document_xml()
+        merge_convert(self.files, self.target, MarkdownConverter(stream=True))
+        self.assertEqual(self._document_xml(), expected)
+
+    def test_unreadable_source_is_skipped_whole(self):
+        bad = self.root / 'bad.md'
+        bad.write_bytes(b'# \xff\xfe\n')
+        result = merge_convert([self.files[0], bad, self.files[1]], self.target, MarkdownConverter())
+
+        self.assertEqual(result.failed, [bad])
+        self.assertEqual(self._document_xml().count('<w:br w:type="page"/>'), 1)
+
+    def test_cli_merge(self):
+        input_dir = self.root
+        output_dir = self.root / 'output'
+        argv = ['md2doc', '-i', str(input_dir), '-o', str(output_dir), '--merge', '合订本', '--merge-break', 'section']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'):
+            cli.main()
+        self.assertEqual([p.name for p in output_dir.iterdir()], ['合订本.docx'])
+        self.assertEqual(len(Document(output_dir / '合订本.docx').sections), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 转换指标
+"""
+
+import time
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import MarkdownConverter
+from md2doc.cli import convert_single_file
+from md2doc.metrics import MetricsCollector, percentile
+from md2doc.source import SourceFile
+
+
+class TestMetrics(unittest.TestCase):
+    """测试指标收集与汇总"""
+
+    def test_percentile(self):
+        """线性插值百分位"""
+        values = [4.0, 1.0, 3.0, 2.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertAlmostEqual(percentile(values, 95), 4.8)
+        self.assertIsNone(percentile([], 50))
+
+    def test_convert_single_file_records_stages(self):
+        """单文件转换记录各阶段耗时、块数和输出大小，并回调"""
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            md_file = root / 'a.md'
+            md_file.write_text('# 标题\n\n## 小标题\n\n正文\n\n| a | b |\n|---|---|\n| 1 | 2 |\n', encoding='utf-8')
+
+            received = []
+            collector = MetricsCollector(callbacks=[received.append])
+            report = {}
+            self.assertTrue(convert_single_file(md_file, root, MarkdownConverter(), logging.getLogger('test'),
+                                                report=report))
+            collector.add(report['metrics'])
+
+            record = received[0]
+            self.assertTrue(record['success'])
+            self.assertEqual(set(record['stages']), {'read', 'parse', 'render', 'save'})
+            self.assertEqual(record['blocks'], {'title': 1, 'heading': 1, 'paragraph': 1, 'table': 1})
+            self.assertEqual(record['output_bytes'], (root / '标题.docx').stat().st_size)
+
+            summary = collector.summary()
+            self.assertEqual(summary['files'], 1)
+            self.assertEqual(summary['total']['max'], record['total'])
+            self.assertEqual(summary['blocks']['table'], 1)
+
+    def test_read_stage_includes_decoding(self):
+        """源文件惰性解码的耗时计入读取阶段，而不是解析阶段"""
+        split = SourceFile._split
+
+        def slow_split(text, final):
+            time.sleep(0.2)
+            return split(text, final)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            md_file = Path(tmp) / 'a.md'
+            md_file.write_text('# 标题\n\n' + '正文内容。\n\n' * 20, encoding='utf-8')
+            metrics = {}
+            with mock.patch.object(SourceFile, '_split', staticmethod(slow_split)):
+                doc, _ = MarkdownConverter().convert(md_file, metrics)
+        self.assertIsNotNone(doc)
+        self.assertGreaterEqual(metrics['stages']['read'], 0.2)
+        self.assertLess(metrics['stages']['parse'], metrics['stages']['read'])
+
+
+if __name__ == '__main__':
+    unittest.main()
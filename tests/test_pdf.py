@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - PDF导出后端与后台导出流水线（使用 stub 后端，无需办公软件）
+"""
+
+import json
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.pdf import PdfPipeline, StubPdfBackend, create_backend
+
+
+class TestStubBackend(unittest.TestCase):
+    """测试 stub 后端"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_valid_pdf(self):
+        """生成的PDF结构完整，交叉引用表偏移正确"""
+        docx = self.root / '报告.docx'
+        cli.create_converter({}).new_document().save(docx)
+
+        errors = StubPdfBackend().convert_batch([docx])
+
+        self.assertEqual(errors, [None])
+        data = (self.root / '报告.pdf').read_bytes()
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertTrue(data.rstrip().endswith(b'%%EOF'))
+        startxref = int(data.rsplit(b'startxref', 1)[1].split()[0])
+        self.assertTrue(data[startxref:].startswith(b'xref'))
+        first = int(data[startxref:].split(b'\n')[3].split()[0])
+        self.assertTrue(data[first:].startswith(b'1 0 obj'))
+
+    def test_invalid_docx_fails_alone(self):
+        """单个文件失败不影响同批其他文件"""
+        good = self.root / 'good.docx'
+        cli.create_converter({}).new_document().save(good)
+        bad = self.root / 'bad.docx'
+        bad.write_text('不是docx', encoding='utf-8')
+
+        errors = StubPdfBackend().convert_batch([bad, good])
+
+        self.assertIsNotNone(errors[0])
+        self.assertIsNone(errors[1])
+        self.assertFalse((self.root / 'bad.pdf').exists())
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_backend('libreoffice')
+
+
+class TestPdfPipeline(unittest.TestCase):
+    """测试后台导出流水线"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.docx = []
+        document = cli.create_converter({}).new_document()
+        for i in range(6):
+            path = self.root / f'f{i}.docx'
+            document.save(path)
+            self.docx.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_submit_does_not_wait_for_conversion(self):
+        """提交立即返回，PDF在后台生成"""
+        backend = StubPdfBackend(delay=0.05)
+        with PdfPipeline(backend, queue_size=16) as pipeline:
+            start = time.perf_counter()
+            for i, path in enumerate(self.docx):
+                pipeline.submit(i, [path])
+            submitted = time.perf_counter() - start
+            jobs = pipeline.close()
+
+        self.assertLess(submitted, 0.05 * len(self.docx))
+        self.assertEqual(sorted(job.tag for job in jobs), list(range(6)))
+        self.assertTrue(all(job.pdf_paths and not job.errors for job in jobs))
+        self.assertTrue(all(path.with_suffix('.pdf').exists() for path in self.docx))
+
+    def test_queued_jobs_share_a_session(self):
+        """排队中的任务合并为一次会话，且不超过 batch_size"""
+        backend = StubPdfBackend(delay=0.05)
+        pipeline = PdfPipeline(backend, batch_size=4)
+        pipeline.submit('a', self.docx[:1])
+        time.sleep(0.01)  # 第一个任务开始转换后，其余任务在队列中等待
+        pipeline.submit('b', self.docx[1:3])
+        pipeline.submit('c', self.docx[3:6])
+        jobs = pipeline.close()
+
+        self.assertEqual(sum(backend.sessions), 6)
+        self.assertLess(len(backend.sessions), 6)
+        self.assertTrue(all(n <= 5 for n in backend.sessions))
+        job = next(job for job in jobs if job.tag == 'c')
+        self.assertEqual(job.pdf_paths, [p.with_suffix('.pdf') for p in self.docx[3:6]])
+
+    def test_backend_exception_fails_batch(self):
+        """后端抛出异常时整批任务标记为失败，流水线继续运行"""
+        backend = StubPdfBackend()
+        with mock.patch.object(backend, 'convert_batch', side_effect=[RuntimeError('未安装Word'), [None]]):
+            pipeline = PdfPipeline(backend)
+            pipeline.submit('x', self.docx[:1])
+            time.sleep(0.05)
+            pipeline.submit('y', self.docx[1:2])
+            jobs = {job.tag: job for job in pipeline.close()}
+
+        self.assertEqual(jobs['x'].errors, [(self.docx[0], '未安装Word')])
+        self.assertEqual(jobs['y'].errors, [])
+
+    def test_cancel_skips_queued_jobs(self):
+        """取消时放弃尚未开始的任务"""
+        backend = StubPdfBackend(delay=0.1)
+        pipeline = PdfPipeline(backend, batch_size=1)
+        for i, path in enumerate(self.docx):
+            pipeline.submit(i, [path])
+        jobs = pipeline.close(cancel=True)
+
+        self.assertLess(len(jobs), len(self.docx))
+        with self.assertRaises(RuntimeError):
+            pipeline.submit('late', self.docx[:1])
+
+
+class TestCliPdfExport(unittest.TestCase):
+    """测试命令行批量转换中的PDF导出"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.input_dir = self.root / 'input'
+        self.output_dir = self.root / 'output'
+        self.input_dir.mkdir()
+        for i in range(3):
+            (self.input_dir / f'f{i}.md').write_text(f'# 文档{i}\n\n正文内容。\n', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _main(self, *extra):
+        argv = ['md2doc', '-i', str(self.input_dir), '-o', str(self.output_dir), '-p', '--pdf-backend', 'stub',
+                *extra]
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'):
+            cli.main()
+
+    def test_batch_exports_pdf_and_records_outputs(self):
+        """批量转换生成PDF，缓存记录和指标中包含PDF"""
+        metrics_path = self.root / 'metrics.json'
+        self._main('-j', '1', '--metrics', str(metrics_path))
+
+        for i in range(3):
+            self.assertTrue((self.output_dir / f'文档{i}.pdf').exists())
+        cache = json.loads((self.output_dir / '.md2doc-cache.json').read_text(encoding='utf-8'))
+        self.assertIn('文档0.pdf', json.dumps(cache, ensure_ascii=False))
+        records = json.loads(metrics_path.read_text(encoding='utf-8'))['files']
+        self.assertTrue(all('pdf' in record['stages'] for record in records))
+
+    def test_single_file_export(self):
+        """单文件模式同步导出"""
+        argv = ['md2doc', '-f', str(self.input_dir / 'f0.md'), '-o', str(self.output_dir), '-p',
+                '--pdf-backend', 'stub']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'):
+            cli.main()
+        self.assertTrue((self.output_dir / '文档0.pdf').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 保存与可重现输出
+"""
+
+import io
+import os
+import time
+import hashlib
+import zipfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc.converter import MarkdownConverter
+from md2doc.save import SaveOptions, ZIP_EPOCH, package_items
+
+MARKDOWN = '# 年度报告\n\n## 一、概述\n\n正文**内容**。\n\n| 项目 | 数量 |\n|---|---|\n| 甲 | 1 |\n'
+
+DETERMINISTIC = SaveOptions(deterministic=True)
+
+
+def _at(hour):
+    """把保存时刻固定为当天的指定小时"""
+    return mock.patch.object(time, 'localtime', return_value=time.struct_time((2024, 5, 1, hour, 0, 0, 2, 122, 0)))
+
+
+class TestDeterministicSave(unittest.TestCase):
+    """测试可重现输出"""
+
+    def _convert(self, save_options=None, stream=False, hour=8):
+        converter = MarkdownConverter(stream=stream, save_options=save_options)
+        with _at(hour):
+            data, _ = converter.convert_text(MARKDOWN)
+        return data
+
+    def test_identical_bytes_across_runs(self):
+        self.assertEqual(self._convert(DETERMINISTIC, hour=8), self._convert(DETERMINISTIC, hour=15))
+        self.assertNotEqual(self._convert(hour=8), self._convert(hour=15))
+
+    def test_streaming_identical_bytes(self):
+        self.assertEqual(self._convert(DETERMINISTIC, stream=True, hour=8),
+                         self._convert(DETERMINISTIC, stream=True, hour=15))
+
+    def test_package_layout(self):
+        """条目顺序、时间戳和创建系统固定"""
+        with zipfile.ZipFile(io.BytesIO(self._convert(DETERMINISTIC))) as zf:
+            infos = zf.infolist()
+            names = [info.filename for info in infos]
+            self.assertEqual(names[:2], ['[Content_Types].xml', '_rels/.rels'])
+            self.assertEqual(names[2:], sorted(names[2:]))
+            self.assertTrue(all(info.date_time == ZIP_EPOCH and info.create_system == 3 for info in infos))
+            core = zf.read('docProps/core.xml').decode('utf-8')
+        self.assertIn('1980-01-01T00:00:00Z', core)
+
+    def test_source_date_epoch(self):
+        with mock.patch.dict(os.environ, {'SOURCE_DATE_EPOCH': '1700000000'}):
+            data = self._convert(DETERMINISTIC)
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertEqual(zf.infolist()[0].date_time, (2023, 11, 14, 22, 13, 20))
+            self.assertIn('2023-11-14T22:13:20Z', zf.read('docProps/core.xml').decode('utf-8'))
+
+    def test_default_parts_match_python_docx(self):
+        """默认模式下各部件内容与 doc.save() 相同"""
+        converter = MarkdownConverter()
+        doc, _ = converter._build_document(MARKDOWN, None)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        with zipfile.ZipFile(buffer) as zf:
+            expected = [(info.filename, zf.read(info)) for info in zf.infolist()]
+        self.assertEqual(package_items(doc), expected)
+
+    def test_save_returns_content_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'out.docx'
+            converter = MarkdownConverter(save_options=DETERMINISTIC)
+            doc, _ = converter._build_document(MARKDOWN, None)
+            digest = converter.save(doc, path)
+            self.assertEqual(digest, hashlib.sha256(path.read_bytes()).hexdigest())
+
+
+class TestCompressionAndAtomicWrites(unittest.TestCase):
+    """测试压缩方式和原子写入"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _save(self, options, stream=False):
+        converter = MarkdownConverter(stream=stream, save_options=options)
+        data, _ = converter.convert_text(MARKDOWN * 20)
+        return data
+
+    def test_store_and_levels(self):
+        from docx import Document
+
+        stored = self._save(SaveOptions(compression='store'))
+        fast = self._save(SaveOptions(level=1))
+        small = self._save(SaveOptions(level=9))
+        with zipfile.ZipFile(io.BytesIO(stored)) as zf:
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist()))
+        self.assertGreater(len(stored), len(fast))
+        self.assertGreaterEqual(len(fast), len(small))
+        self.assertIn('年度报告', Document(io.BytesIO(stored)).paragraphs[0].text)
+
+        streamed = self._save(SaveOptions(compression='store'), stream=True)
+        with zipfile.ZipFile(io.BytesIO(streamed)) as zf:
+            self.assertEqual(zf.getinfo('word/document.xml').compress_type, zipfile.ZIP_STORED)
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            SaveOptions(compression='bzip2').validate()
+        with self.assertRaises(ValueError):
+            SaveOptions(level=12).validate()
+        SaveOptions(level=0).validate()  # DEFLATE 级别0（不压缩）是合法值
+
+    def test_failed_save_leaves_no_partial_file(self):
+        """写入失败时不留下临时文件，已有的输出保持不变"""
+        target = self.root / 'out.docx'
+        target.write_bytes(b'old')
+        converter = MarkdownConverter()
+        doc, _ = converter._build_document(MARKDOWN, None)
+        with mock.patch('md2doc.save.PackageWriter.write_all', side_effect=OSError('磁盘已满')):
+            with self.assertRaises(OSError):
+                converter.save(doc, target)
+        self.assertEqual(target.read_bytes(), b'old')
+        self.assertEqual(list(self.root.iterdir()), [target])
+
+    def test_failed_stream_leaves_no_partial_file(self):
+        from md2doc.parser import iter_blocks
+
+        def blocks():
+            yield from iter_blocks(io.StringIO(MARKDOWN))
+            raise RuntimeError('解析中断')
+
+        target = self.root / 'out.docx'
+        converter = MarkdownConverter(stream=True)
+        with self.assertRaises(RuntimeError):
+            converter.write_blocks(blocks(), target)
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_output_synced_before_replace(self):
+        """输出文件先同步到磁盘再替换（运行日志的完成记录不会指向不完整的文件）"""
+        md_file = self.root / 'a.md'
+        md_file.write_text(MARKDOWN, encoding='utf-8')
+        for stream in (False, True):
+            events = []
+            replace = os.replace
+            with mock.patch('md2doc.save.os.fsync', side_effect=lambda fd: events.append('fsync')), \
+                    mock.patch('md2doc.save.os.replace',
+                               side_effect=lambda *a: (events.append('replace'), replace(*a))):
+                converter = MarkdownConverter(stream=stream)
+                if stream:
+                    self.assertIsNotNone(converter.convert_streaming(md_file, self.root))
+                else:
+                    doc, _ = converter.convert(md_file)
+                    converter.save(doc, self.root / 'b.docx')
+            self.assertEqual(events, ['fsync', 'replace', 'fsync'], stream)
+
+    def test_sync_disabled(self):
+        """关闭同步时只做替换，不调用 fsync"""
+        md_file = self.root / 'a.md'
+        md_file.write_text(MARKDOWN, encoding='utf-8')
+        for stream in (False, True):
+            converter = MarkdownConverter(stream=stream, save_options=SaveOptions(sync=False))
+            with mock.patch('md2doc.save.os.fsync') as fsync:
+                if stream:
+                    self.assertIsNotNone(converter.convert_streaming(md_file, self.root))
+                else:
+                    doc, _ = converter.convert(md_file)
+                    converter.save(doc, self.root / 'b.docx')
+            fsync.assert_not_called()
+            self.assertEqual(sorted(p.name for p in self.root.iterdir() if p.name.startswith('.')), [])
+
+
+class TestCliDeterministic(unittest.TestCase):
+    """测试命令行可重现输出"""
+
+    def test_rebuild_is_byte_identical(self):
+        import json
+        from md2doc import cli
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / 'input').mkdir()
+            (root / 'input' / 'a.md').write_text(MARKDOWN, encoding='utf-8')
+            argv = ['md2doc', '-i', str(root / 'input'), '-o', str(root / 'output'), '-j', '1',
+                    '--deterministic', '--force']
+            outputs = []
+            for hour in (8, 15):
+                with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout'), _at(hour):
+                    cli.main()
+                outputs.append((root / 'output' / '年度报告.docx').read_bytes())
+
+            self.assertEqual(outputs[0], outputs[1])
+            cache = json.loads((root / 'output' / '.md2doc-cache.json').read_text(encoding='utf-8'))
+            self.assertEqual(cache['files']['a.md']['output_hashes'],
+                             {'年度报告.docx': hashlib.sha256(outputs[0]).hexdigest()})
+
+
+if __name__ == '__main__':
+    unittest.main()
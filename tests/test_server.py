@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 转换服务
+"""
+
+import io
+import json
+import base64
+import zipfile
+import threading
+import unittest
+import urllib.request
+import urllib.error
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc.server import ConversionService, RequestTooLarge, make_http_server, serve_stdio
+
+SAMPLE = '# 服务标题\n\n## 小标题\n\n正文内容。\n'
+
+
+class TestConversionService(unittest.TestCase):
+    """测试转换服务"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ConversionService(workers=2, max_bytes=1024)
+
+    def test_convert_returns_docx(self):
+        """返回标题和docx内容"""
+        title, output = self.service.convert(SAMPLE.encode('utf-8'))
+        self.assertEqual(title, '服务标题')
+        with zipfile.ZipFile(io.BytesIO(output)) as z:
+            self.assertIn('服务标题', z.read('word/document.xml').decode('utf-8'))
+
+    def test_size_limit(self):
+        """超过大小限制的请求被拒绝"""
+        with self.assertRaises(RequestTooLarge):
+            self.service.convert(b'x' * 2048)
+        self.assertGreaterEqual(self.service.metrics()['rejected'], 1)
+
+    def test_http(self):
+        """HTTP接口：转换、健康检查、大小限制"""
+        server = make_http_server(self.service, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        try:
+            with urllib.request.urlopen(base + '/convert', data=SAMPLE.encode('utf-8')) as response:
+                self.assertEqual(response.status, 200)
+                self.assertTrue(zipfile.is_zipfile(io.BytesIO(response.read())))
+
+            with urllib.request.urlopen(base + '/health') as response:
+                self.assertEqual(json.load(response)['status'], 'ok')
+
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(base + '/convert', data=b'x' * 2048)
+            self.assertEqual(ctx.exception.code, 413)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_stdio_json_rpc(self):
+        """标准输入输出 JSON-RPC：按 id 返回结果或错误"""
+        requests = [
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'convert', 'params': {'markdown': SAMPLE}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'unknown'},
+        ]
+        stdin = io.StringIO(''.join(json.dumps(r) + '\n' for r in requests) + 'not json\n')
+        stdout = io.StringIO()
+        serve_stdio(self.service, stdin, stdout)
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        by_id = {r['id']: r for r in responses}
+        self.assertEqual(by_id[1]['result']['title'], '服务标题')
+        self.assertTrue(zipfile.is_zipfile(io.BytesIO(base64.b64decode(by_id[1]['result']['docx']))))
+        self.assertEqual(by_id[2]['error']['code'], -32601)
+        self.assertEqual(by_id[None]['error']['code'], -32700)
+
+    def test_stdio_oversized_line(self):
+        """超长的请求行分块读取并丢弃，后续请求照常处理"""
+        request = {'jsonrpc': '2.0', 'id': 1, 'method': 'health'}
+        stdin = io.StringIO('x' * 100000 + '\n' + json.dumps(request) + '\n')
+        stdout = io.StringIO()
+        with mock.patch.object(stdin, 'readline', wraps=stdin.readline) as readline:
+            serve_stdio(self.service, stdin, stdout)
+        self.assertTrue(all(0 < call.args[0] <= 1 << 16 for call in readline.call_args_list))
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(responses[0]['error']['code'], -32001)
+        self.assertEqual(responses[1]['result']['status'], 'ok')
+
+    def test_stdio_bounded_in_flight(self):
+        """处理中的请求达到转换器数量时暂停读取"""
+        requests = ''.join(json.dumps({'jsonrpc': '2.0', 'id': i, 'method': 'health'}) + '\n' for i in range(6))
+        stdin = io.StringIO(requests)
+        finished = []
+        unfinished_at_read = []
+        readline = stdin.readline
+        proceed = threading.Event()
+
+        def reading(size):
+            unfinished_at_read.append(len(unfinished_at_read) - len(finished))
+            return readline(size)
+
+        def slow_rpc(service, request):
+            proceed.wait(5)
+            finished.append(request['id'])
+            return {'jsonrpc': '2.0', 'id': request['id'], 'result': {}}
+
+        timer = threading.Timer(0.3, proceed.set)
+        timer.start()
+        with mock.patch.object(stdin, 'readline', side_effect=reading), \
+                mock.patch('md2doc.server.handle_rpc', side_effect=slow_rpc):
+            serve_stdio(self.service, stdin, io.StringIO())
+        timer.cancel()
+        self.assertEqual(sorted(finished), list(range(6)))
+        self.assertLessEqual(max(unfinished_at_read), self.service.pool.size - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
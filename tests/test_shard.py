@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 分片与运行报告
+"""
+
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.report import RunReport, load_reports, merge_reports, main as merge_reports_main
+from md2doc.shard import assign_shards, parse_shard, select_shard, shard_loads
+
+
+class TestShardAssignment(unittest.TestCase):
+    """测试分片分配"""
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        for spec in ('0/4', '5/4', '1/0', '2', 'a/b', '1/2/3'):
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_balanced_and_deterministic(self):
+        sizes = {f'd{i % 3}/f{i}.md': (i * 7919) % 1000 + 10 for i in range(200)}
+        assignment = assign_shards(sizes, 4)
+        self.assertEqual(assignment, assign_shards(dict(reversed(list(sizes.items()))), 4))
+        self.assertEqual(set(assignment.values()), {1, 2, 3, 4})
+        loads = shard_loads(sizes, assignment, 4)
+        self.assertLessEqual(max(loads) - min(loads), max(sizes.values()))
+
+    def test_shards_cover_all_files_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            files = []
+            for i in range(9):
+                path = root / f'f{i}.md'
+                path.write_text('# 标题\n' + '正文。\n' * i, encoding='utf-8')
+                files.append(path)
+            selected = []
+            for index in (1, 2, 3):
+                part, total = select_shard(files, root, index, 3)
+                self.assertEqual(total, 9)
+                self.assertEqual(part, [f for f in files if f in part])  # 保持发现顺序
+                selected.extend(part)
+            self.assertEqual(sorted(selected), files)
+
+
+class TestRunReports(unittest.TestCase):
+    """测试分片运行和报告合并"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.input_dir = self.root / 'input'
+        self.output_dir = self.root / 'output'
+        (self.input_dir / 'sub').mkdir(parents=True)
+        for i in range(5):
+            folder = self.input_dir / 'sub' if i % 2 else self.input_dir
+            (folder / f'n{i}.md').write_text(f'# 通知{i}\n\n正文。\n' + '内容。\n' * i, encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, *extra):
+        argv = ['md2doc', '-i', str(self.input_dir), '-o', str(self.output_dir), '-r', '-j', '1', *extra]
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            cli.main()
+        return out.getvalue()
+
+    def test_shards_merge_to_full_run(self):
+        self._run('--shard', '1/2')
+        self._run('--shard', '2/2')
+
+        reports = load_reports([self.output_dir])
+        self.assertEqual([r['shard'] for r in reports], [{'index': 1, 'count': 2}, {'index': 2, 'count': 2}])
+        merged, problems = merge_reports(reports)
+        self.assertEqual(problems, [])
+        self.assertEqual(merged['summary'], {'found': 5, 'total': 5, 'success': 5, 'skipped': 0, 'failed': 0})
+        self.assertEqual([e['file'] for e in merged['files']],
+                         ['n0.md', 'n2.md', 'n4.md', 'sub/n1.md', 'sub/n3.md'])
+        self.assertEqual(len(list(self.output_dir.rglob('*.docx'))), 5)
+
+        # 再次运行时各分片使用自己的缓存，全部跳过
+        self._run('--shard', '1/2')
+        report = json.loads((self.output_dir / '.md2doc-report-1-of-2.json').read_text(encoding='utf-8'))
+        self.assertEqual(report['summary']['skipped'], report['summary']['found'])
+        self.assertTrue(all(e['outputs'] for e in report['files']))
+
+    def test_prune_keeps_other_shards(self):
+        self._run('--shard', '1/2')
+        self._run('--shard', '2/2')
+        self._run('--shard', '1/2', '--prune')
+        self.assertEqual(len(list(self.output_dir.rglob('*.docx'))), 5)
+
+    def test_merge_reports_reports_missing_shard(self):
+        self._run('--shard', '1/3')
+        self._run('--shard', '3/3')
+        merged_path = self.root / 'merged.json'
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            code = merge_reports_main([str(self.output_dir), '-o', str(merged_path)])
+        self.assertEqual(code, 1)
+        self.assertIn('缺少分片: 2/3', out.getvalue())
+        self.assertIn('（共 5 个文件）', out.getvalue())
+        self.assertEqual(json.loads(merged_path.read_text(encoding='utf-8'))['summary']['total'], 5)
+
+    def test_report_without_shard(self):
+        path = self.root / 'run.json'
+        self._run('--report', str(path))
+        report = json.loads(path.read_text(encoding='utf-8'))
+        self.assertIsNone(report['shard'])
+        self.assertEqual(report['summary']['success'], 5)
+
+    def test_duplicate_files_are_problems(self):
+        report = RunReport(self.output_dir, (1, 2))
+        report.add('a.md', 'success', ['a.docx'], 0.1)
+        other = RunReport(self.output_dir, (2, 2))
+        other.add('a.md', 'success', ['a.docx'], 0.1)
+        _, problems = merge_reports([report.to_dict(), other.to_dict()])
+        self.assertEqual(problems, ['文件出现在多个分片中: a.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 源文件读取
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.converter import MarkdownConverter
+from md2doc.source import SourceFile
+
+MARKDOWN = '# 年度报告\r\n\r\n## 一、概述\r正文**内容**。\n\n| 项目 | 数量 |\n|---|---|\n| 甲 | 1 |'
+
+
+class TestSourceFile(unittest.TestCase):
+    """测试映射读取与增量解码"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, data: bytes) -> Path:
+        path = self.root / 'a.md'
+        path.write_bytes(data)
+        return path
+
+    def test_lines_match_text_mode_across_chunk_boundaries(self):
+        path = self._write(MARKDOWN.encode('utf-8'))
+        with open(path, 'r', encoding='utf-8') as f:
+            expected = f.read().split('\n')
+        for chunk_size in (1, 2, 3, 7, 1 << 20):
+            source = SourceFile(path, chunk_size=chunk_size)
+            self.assertEqual(list(source), expected, chunk_size)
+            self.assertEqual(source.title, '年度报告')
+
+    def test_bom_is_stripped(self):
+        source = SourceFile(self._write(b'\xef\xbb\xbf# \xe6\xa0\x87\xe9\xa2\x98\n'))
+        self.assertEqual(list(source), ['# 标题'])
+        self.assertEqual(source.encoding, 'utf-8-sig')
+        self.assertEqual(source.title, '标题')
+
+    def test_title_captured_before_end(self):
+        source = SourceFile(self._write(('前言\n# 标题\n' + '正文\n' * 100).encode('utf-8')))
+        lines = iter(source)
+        self.assertFalse(source.has_title)
+        next(lines), next(lines)
+        self.assertEqual(source.title, '标题')
+        self.assertEqual(len(list(lines)), 100)
+
+    def test_gb18030_fallback(self):
+        data = ('# 旧文件\n' + 'ascii line\n' * 3 + '正文\n').encode('gb18030')
+        data = b'plain ascii preface\n' * 5 + data
+        path = self._write(data)
+        with self.assertRaises(UnicodeDecodeError):
+            list(SourceFile(path))
+        for chunk_size in (4, 64, 1 << 20):
+            source = SourceFile(path, fallback='gb18030', chunk_size=chunk_size)
+            self.assertEqual(list(source), data.decode('gb18030').split('\n')[:-1], chunk_size)
+            self.assertEqual(source.encoding, 'gb18030')
+            self.assertEqual(source.title, '旧文件')
+
+    def test_invalid_utf8_after_utf8_text_is_an_error(self):
+        path = self._write('# 标题\n'.encode('utf-8') + '正文\n'.encode('gb18030'))
+        with self.assertRaises(UnicodeDecodeError):
+            list(SourceFile(path, fallback='gb18030'))
+
+    def test_empty_file(self):
+        source = SourceFile(self._write(b''))
+        self.assertEqual(list(source), [])
+        self.assertEqual(source.title, '未命名文档')
+
+
+class TestConvertLegacyEncoding(unittest.TestCase):
+    """测试转换非UTF-8源文件"""
+
+    def test_converter_and_cli_fallback(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            md_file = root / 'old.md'
+            md_file.write_bytes('# 旧通知\n\n正文。\n'.encode('gb18030'))
+
+            for stream in (False, True):
+                converter = MarkdownConverter(stream=stream, encoding_fallback='gb18030')
+                self.assertTrue(cli.convert_single_file(md_file, root, converter, converter.logger))
+                self.assertTrue((root / '旧通知.docx').exists())
+                (root / '旧通知.docx').unlink()
+
+            with mock.patch.object(sys, 'argv', ['md2doc', '-i', tmp, '--encoding-fallback', 'nope']), \
+                    mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+                cli.main()
+
+    def test_convert_many_path_fallback(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            md_file = Path(tmp) / 'old.md'
+            md_file.write_bytes('# 旧通知\n\n正文。\n'.encode('gb18030'))
+
+            result, = MarkdownConverter(encoding_fallback='gb18030').convert_many([md_file])
+            self.assertIsNone(result.error)
+            self.assertEqual(result.title, '旧通知')
+
+            result, = MarkdownConverter().convert_many([md_file])
+            self.assertIsInstance(result.error, UnicodeDecodeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 拆分输出
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from docx import Document
+
+from md2doc import MarkdownConverter
+from md2doc.parser import Title, Heading, Paragraph
+from md2doc.split import SplitOptions, iter_chunks, split_convert
+
+
+class TestSplit(unittest.TestCase):
+    """测试按标题或预算拆分"""
+
+    def test_chunks_by_heading(self):
+        """在一级标题处拆分，只有主标题时与第一章合并"""
+        blocks = [Title('题'), Heading(1, '一'), Paragraph('a'), Heading(2, '小'), Heading(1, '二'), Paragraph('b')]
+        chunks = list(iter_chunks(blocks, SplitOptions()))
+        self.assertEqual(chunks, [blocks[:4], blocks[4:]])
+
+    def test_chunks_by_budget(self):
+        """按块数或字节预算拆分，超出预算的单个块单独成为一部分"""
+        blocks = [Paragraph('x' * 10) for _ in range(5)]
+        by_blocks = list(iter_chunks(blocks, SplitOptions(by_heading=False, max_blocks=2)))
+        self.assertEqual([len(c) for c in by_blocks], [2, 2, 1])
+
+        blocks.insert(2, Paragraph('y' * 100))
+        by_bytes = list(iter_chunks(blocks, SplitOptions(by_heading=False, max_bytes=25)))
+        self.assertEqual([len(c) for c in by_bytes], [2, 1, 2, 1])
+
+    def test_split_convert_writes_parts_and_index(self):
+        """每部分一个文档并带主标题，索引列出各部分"""
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            md_file = root / 'big.md'
+            md_file.write_text('# 总标题\n\n## 第一章\n\n内容一\n\n## 第二章\n\n内容二\n\n## 第三章\n\n内容三\n',
+                               encoding='utf-8')
+
+            for jobs in (1, 2):
+                outputs = split_convert(md_file, root, MarkdownConverter(), SplitOptions(jobs=jobs))
+                self.assertEqual(outputs, ['总标题_001.docx', '总标题_002.docx', '总标题_003.docx',
+                                           '总标题_index.json'])
+
+                index = json.loads((root / '总标题_index.json').read_text(encoding='utf-8'))
+                self.assertEqual([p['heading'] for p in index['parts']], ['第一章', '第二章', '第三章'])
+                texts = [p.text for p in Document(str(root / '总标题_003.docx')).paragraphs]
+                self.assertEqual(texts, ['总标题', '第三章', '内容三'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 启动耗时预算
+"""
+
+import unittest
+from pathlib import Path
+
+import sys
+SRC = str(Path(__file__).parent.parent / 'src')
+sys.path.insert(0, SRC)
+
+from md2doc.startup import STARTUP_BUDGET_MS, measure_import, total_ms, heavy_imports
+
+
+class TestStartup(unittest.TestCase):
+    """测试命令行启动不加载重量级依赖"""
+
+    def test_cli_import_is_light(self):
+        """导入命令行模块不加载 python-docx / docx2pdf，且在预算之内"""
+        timings = measure_import('md2doc.cli', SRC)
+        self.assertEqual(heavy_imports(timings), [])
+        # 取多次测量的最小值，减少机器负载造成的波动
+        best = min([total_ms(timings, 'md2doc.cli')] +
+                   [total_ms(measure_import('md2doc.cli', SRC), 'md2doc.cli') for _ in range(2)])
+        self.assertLess(best, STARTUP_BUDGET_MS)
+
+    def test_parser_import_is_light(self):
+        """解析模块可以脱离 python-docx 单独使用"""
+        self.assertEqual(heavy_imports(measure_import('md2doc.parser', SRC)), [])
+
+    def test_lazy_package_exports(self):
+        """包级公开接口在访问时加载"""
+        import md2doc
+        self.assertEqual(md2doc.MarkdownConverter.__name__, 'MarkdownConverter')
+        with self.assertRaises(AttributeError):
+            md2doc.missing_name
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 目录监视
+"""
+
+import sys
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import cli
+from md2doc.cache import BuildCache
+from md2doc.converter import MarkdownConverter
+from md2doc.watch import PollingWatcher, InotifyWatcher, debounced
+
+
+class _FakeWatcher:
+    """按顺序返回预设的事件（stop 为 True 时事件用完后模拟 Ctrl-C）"""
+
+    def __init__(self, events, stop=False):
+        self.events = list(events)
+        self.stop = stop
+
+    def wait(self, timeout=None):
+        if not self.events and self.stop:
+            raise KeyboardInterrupt
+        return self.events.pop(0) if self.events else set()
+
+    def close(self):
+        pass
+
+
+class TestWatch(unittest.TestCase):
+    """测试目录监视"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _check_watcher(self, watcher):
+        try:
+            (self.root / 'a.md').write_text('# 甲\n', encoding='utf-8')
+            (self.root / 'notes.txt').write_text('忽略', encoding='utf-8')
+            self.assertEqual(watcher.wait(2), {'a.md'})
+
+            (self.root / 'a.md').unlink()
+            self.assertEqual(watcher.wait(2), {'a.md'})
+            self.assertEqual(watcher.wait(0.1), set())
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        """定时扫描检测新建和删除，忽略非Markdown文件"""
+        self._check_watcher(PollingWatcher(self.root, interval=0.05))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), '需要 Linux inotify')
+    def test_inotify_watcher(self):
+        """inotify 检测新建和删除，忽略非Markdown文件"""
+        self._check_watcher(InotifyWatcher(self.root))
+
+    def _check_recursive(self, watcher):
+        try:
+            (self.root / 'sub' / 'a.md').write_text('# 甲\n', encoding='utf-8')
+            (self.root / 'sub' / 'draft.md').write_text('# 草稿\n', encoding='utf-8')
+            (self.root / 'out' / 'x.md').write_text('# 输出\n', encoding='utf-8')
+            self.assertEqual(watcher.wait(2), {'sub/a.md'})
+
+            # 新建的子目录：inotify 要求重新扫描（其中可能已有文件），定时扫描直接报告文件
+            new = self.root / 'new'
+            new.mkdir()
+            (new / 'b.md').write_text('# 乙\n', encoding='utf-8')
+            changed = watcher.wait(2)
+            while changed == set():
+                changed = watcher.wait(2)
+            self.assertIn(changed, (None, {'new/b.md'}))
+            (new / 'b.md').write_text('# 乙2\n', encoding='utf-8')
+            self.assertEqual(watcher.wait(2), {'new/b.md'})
+        finally:
+            watcher.close()
+
+    def _recursive_tree(self):
+        (self.root / 'sub').mkdir()
+        (self.root / 'out').mkdir()
+        return dict(recursive=True, exclude=['draft.md'], skip_dirs=[self.root / 'out'])
+
+    def test_polling_watcher_recursive(self):
+        """递归监视子目录，按排除模式筛选，不监视输出目录"""
+        self._check_recursive(PollingWatcher(self.root, 0.05, **self._recursive_tree()))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), '需要 Linux inotify')
+    def test_inotify_watcher_recursive(self):
+        self._check_recursive(InotifyWatcher(self.root, **self._recursive_tree()))
+
+    def test_watch_directory_mirrors_tree(self):
+        """监视模式与批量转换使用同样的筛选，子目录的输出写入镜像目录"""
+        input_dir = self.root / 'input'
+        output_dir = self.root / 'output'
+        (input_dir / 'sub').mkdir(parents=True)
+        output_dir.mkdir()
+        (input_dir / 'sub' / 'a.md').write_text('# 甲\n', encoding='utf-8')
+        (input_dir / 'draft.md').write_text('# 草稿\n', encoding='utf-8')
+
+        converter = MarkdownConverter()
+        logger = logging.getLogger('test_watch')
+        cache = BuildCache(output_dir, 'fp', logger)
+        watcher = _FakeWatcher([{'sub/a.md'}, set(), None, set()], stop=True)
+        with mock.patch.object(cli, 'create_watcher', return_value=watcher) as create:
+            with self.assertRaises(KeyboardInterrupt):
+                cli.watch_directory(input_dir, output_dir, converter, cache, logger, debounce=0,
+                                    recursive=True, exclude=['draft.md'])
+        self.assertEqual(create.call_args.kwargs['exclude'], ['draft.md'])
+        self.assertTrue((output_dir / 'sub' / '甲.docx').exists())
+        self.assertFalse((output_dir / '草稿.docx').exists())  # 重新扫描时同样排除
+        self.assertEqual(list(cache.entries), ['sub/a.md'])
+
+    def test_debounce_merges_rapid_events(self):
+        """连续事件合并为一批，静默后才产出"""
+        batches = debounced(_FakeWatcher([{'a.md'}, {'a.md', 'b.md'}, set(), None, set()]), delay=0)
+        self.assertEqual(next(batches), {'a.md', 'b.md'})
+        self.assertIsNone(next(batches))
+
+
+if __name__ == '__main__':
+    unittest.main()
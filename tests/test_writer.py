@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 流式写入功能测试
+"""
+
+import io
+import zipfile
+import tempfile
+import unittest
+import tracemalloc
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md2doc import MarkdownConverter
+from md2doc.parser import Paragraph
+from md2doc.writer import StreamingDocxWriter
+
+
+SAMPLE = """# 测试 & <标题>
+
+## 一级标题
+### 二级标题
+
+正文\t含制表符，  尾部空格
+> 引用
+- 列表项
+---
+| a | b | c |
+|---|---|---|
+| 1 |
+| x | y | z | 多余 |
+| **粗** |  | `码` |
+
+日期：2026年1月4日
+"""
+
+
+class TestStreamingWriter(unittest.TestCase):
+    """测试流式写入"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.converter = MarkdownConverter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_object_model_output(self):
+        """流式输出与python-docx渲染结果逐部件一致"""
+        md_file = self.root / 'sample.md'
+        md_file.write_text(SAMPLE, encoding='utf-8')
+
+        doc, title = self.converter.convert(md_file)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        output_path = self.converter.convert_streaming(md_file, self.root)
+
+        self.assertEqual(output_path.name, f'{title}.docx')
+        with zipfile.ZipFile(buffer) as expected, zipfile.ZipFile(output_path) as actual:
+            self.assertEqual(expected.namelist(), actual.namelist())
+            for name in expected.namelist():
+                self.assertEqual(expected.read(name), actual.read(name), name)
+
+    def test_memory_is_flat(self):
+        """内存占用不随文档大小增长"""
+        writer = StreamingDocxWriter(self.converter.template)
+
+        def peak(count):
+            blocks = (Paragraph(f'第{i}段正文内容，用于测试流式写入的内存占用。') for i in range(count))
+            tracemalloc.start()
+            try:
+                writer.write(blocks, self.root / f'{count}.docx')
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small = peak(2000)
+        large = peak(40000)
+        self.assertLess(large, small * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()